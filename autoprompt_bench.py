@@ -0,0 +1,370 @@
+"""Benchmarks de autoprompt sobre árboles sintéticos grandes.
+
+Genera (una vez, se reutilizan) árboles de N archivos .cs con tamaños de distribución
+log-normal y carpetas ignoradas repartidas (bin, obj, Properties, .vs, node_modules),
+y mide escaneo, ordenación, generación completa y de estructura, el modelo de la
+interfaz sin Tk y la selección por consulta. Cada medición corre en un proceso propio
+para que el pico de memoria sea solo suyo. Los resultados se añaden a un historial JSON y se comparan con las
+ejecuciones anteriores de la misma máquina:
+
+    python autoprompt_bench.py
+    python autoprompt_bench.py --sizes 1000 10000 --cases scan_cold generate_full --repeat 3
+
+Sale con código 1 si algún caso es más lento o usa más memoria que la mediana previa
+más la tolerancia.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from autoprompt_lib.config import CACHE_DIR
+
+TREE_VERSION = 2  # Subirlo regenera los árboles sintéticos
+DEFAULT_SIZES = [1000, 10000, 100000]
+CASES = {
+    # caso: (descripción, necesita el índice ya poblado)
+    'scan_cold': ("scan_files con índice vacío", False),
+    'scan_warm': ("scan_files con índice al día", True),
+    'scan_sort': ("scan_and_sort_files con índice al día", True),
+    'generate_structure': ("generate_context solo estructura", True),
+    'generate_full': ("generate_context completo", True),
+    'refresh_model': ("refresh_file_list sin Tk: lotes al SelectionModel, estadísticas y orden final", True),
+    'query': ("generate_context con una consulta e índice de fragmentos al día", True),
+}
+BENCH_QUERY = "¿Qué métodos lanzan ArgumentException con un TimeSpan?"  # Términos frecuentes y raros a la vez
+HISTORY_FILE = os.path.join(CACHE_DIR, 'bench-history.json')
+HISTORY_WINDOW = 5  # Ejecuciones previas con las que se calcula la mediana de referencia
+# Diferencias por debajo de estas no cuentan como regresión (ruido en casos muy rápidos)
+NOISE_FLOOR = {"seconds": 0.05, "peak_rss_mb": 2.0}
+REFRESH_BATCH = 256  # Igual que gui.SCAN_BATCH
+
+# Nombres de carpeta para el árbol sintético
+FOLDERS = ['Core', 'Rules', 'Engine', 'Models', 'Services', 'Infrastructure', 'Internal', 'Handlers']
+TYPES = ['int', 'long', 'string', 'bool', 'double', 'ReadOnlySpan<byte>', 'List<int>', 'TimeSpan']
+# Carpetas de IGNORE_DIRS bajo las que se dejan copias de archivos que el escaneo debe podar
+IGNORED_LAYOUTS = [('obj', 'Debug', 'net8.0'), ('bin', 'Release'), ('Properties',), ('.vs', 'cache'),
+                   ('node_modules', 'pkg', 'src')]
+
+
+# --- ÁRBOL SINTÉTICO ---
+
+def _file_size(rng):
+    """Tamaño objetivo en bytes: log-normal con mediana ~2.5 KB y cola hasta 256 KB"""
+    return int(min(256 * 1024, max(200, rng.lognormvariate(math.log(2500), 1.0))))
+
+
+def _member(rng, n):
+    kind = rng.random()
+    if kind < 0.2:
+        return f"        private {rng.choice(TYPES)} _field{n};\n\n"
+    if kind < 0.4:
+        return (f"        /// <summary>Propiedad {n}.</summary>\n"
+                f"        public {rng.choice(TYPES)} Property{n} {{ get; set; }}\n\n")
+    lines = [f"            var value{i} = input * {i} + {rng.randint(0, 999)}; // paso {i}\n"
+             for i in range(rng.randint(2, 40))]
+    return (f"        /// <summary>\n        /// Método {n}.\n        /// </summary>\n"
+            f"        public {rng.choice(TYPES)} Method{n}(int input, string name)\n        {{\n"
+            "            if (input < 0)\n            {\n                throw new ArgumentException(name);\n            }\n"
+            + "".join(lines) +
+            "            return default;\n        }\n\n")
+
+
+def _source(rng, namespace, type_name, size):
+    parts = ["using System;\nusing System.Collections.Generic;\nusing System.Runtime.CompilerServices;\n\n",
+             f"namespace {namespace}\n{{\n    /// <summary>Tipo sintético {type_name}.</summary>\n",
+             f"    public sealed class {type_name}\n    {{\n"]
+    total = sum(len(p) for p in parts)
+    n = 0
+    region = rng.random() < 0.3
+    if region:
+        parts.append("        #region Miembros\n")
+    while total < size:
+        member = _member(rng, n)
+        parts.append(member)
+        total += len(member)
+        n += 1
+    if region:
+        parts.append("        #endregion\n")
+    parts.append("    }\n}\n")
+    return "".join(parts)
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8', newline='\n') as fh:
+        fh.write(text)
+
+
+def make_tree(root, count, seed=0):
+    """Crea en `root` un árbol de `count` .cs visibles más ~10% en carpetas ignoradas.
+
+    Devuelve {"files", "bytes"} de los archivos visibles. Si el árbol ya existe con los
+    mismos parámetros no se regenera.
+    """
+    marker = os.path.join(root, '.bench-tree.json')
+    params = {"version": TREE_VERSION, "count": count, "seed": seed}
+    try:
+        with open(marker, encoding='utf-8') as fh:
+            meta = json.load(fh)
+        if meta["params"] == params:
+            return meta
+    except (OSError, ValueError, KeyError):
+        pass
+    shutil.rmtree(root, ignore_errors=True)
+    rng = random.Random(seed)
+    projects = max(1, count // 500)
+    total_bytes = 0
+    for i in range(count):
+        project = f"Bench.P{i % projects:03d}"
+        depth = rng.choice((0, 1, 1, 2, 2, 3))
+        folders = [f"{rng.choice(FOLDERS)}{rng.randint(0, 9)}" for _ in range(depth)]
+        type_name = f"Type{i}"
+        text = _source(rng, ".".join([project] + folders), type_name, _file_size(rng))
+        _write(os.path.join(root, project, *folders, type_name + '.cs'), text)
+        total_bytes += len(text.encode('utf-8'))
+        if i % 10 == 0:
+            # Archivos que el escaneo debe podar: la carpeta ignorada cambia de sitio y de profundidad
+            ignored = rng.choice(IGNORED_LAYOUTS)
+            _write(os.path.join(root, project, *folders[:rng.randint(0, depth)], *ignored, type_name + '.g.cs'),
+                   text)
+    for p in range(projects):
+        project = f"Bench.P{p:03d}"
+        _write(os.path.join(root, project, project + '.csproj'),
+               '<Project Sdk="Microsoft.NET.Sdk">\n  <PropertyGroup>\n'
+               '    <TargetFramework>net8.0</TargetFramework>\n  </PropertyGroup>\n</Project>\n')
+    meta = {"params": params, "files": count, "bytes": total_bytes}
+    _write(marker, json.dumps(meta))
+    return meta
+
+
+# --- MEDICIÓN (proceso hijo) ---
+
+def peak_rss_mb():
+    """Pico de memoria residente del proceso actual en MB, o None si no se puede medir"""
+    try:
+        import resource
+    except ImportError:
+        return _windows_peak_rss_mb()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024  # macOS: bytes; Linux: KB
+
+
+def _windows_peak_rss_mb():
+    try:
+        import ctypes
+        from ctypes import wintypes
+    except ImportError:
+        return None
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+    try:
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return None
+        return counters.PeakWorkingSetSize / (1024 * 1024)
+    except (AttributeError, OSError):
+        return None
+
+
+def _refresh_model(tree, index):
+    """Lo que hace refresh_file_list fuera de Tk: lotes al modelo, estadísticas por lote y orden final"""
+    from autoprompt_lib.model import SelectionModel
+    from autoprompt_lib.scanner import iter_scan_files
+    previous = SelectionModel()
+    model = SelectionModel()
+    pending = 0
+    for f in iter_scan_files(tree, False, index):
+        model.add(f, previous.is_path_selected(f['path']))
+        pending += 1
+        if pending >= REFRESH_BATCH:
+            model.stats()
+            pending = 0
+    model.sort()
+    model.sorted_folders()
+    model.stats()
+    return len(model)
+
+
+def run_case(case, tree, workdir):
+    """Ejecuta un caso en este proceso (con cwd = workdir) y devuelve su medición"""
+    from autoprompt_lib.core import generate_context
+    from autoprompt_lib.scanner import ScanIndex, default_index_path, scan_and_sort_files, scan_files
+
+    os.chdir(workdir)  # Índice y caché de bloques viven en workdir/.autoprompt
+    index = ScanIndex(tree, default_index_path(tree))
+    out = os.path.join(workdir, 'out.txt')
+    start = time.perf_counter()
+    if case in ('prime', 'scan_cold', 'scan_warm'):
+        files = len(scan_files(tree, index=index))
+    elif case == 'prime_query':
+        # Como 'prime', y además puebla el índice de fragmentos que usa 'query'
+        files = len(generate_context(tree, out=out, index=index, query=BENCH_QUERY))
+    elif case == 'scan_sort':
+        files = len(scan_and_sort_files(tree, index=index))
+    elif case == 'generate_structure':
+        files = len(generate_context(tree, structure_only=True, out=out, index=index))
+    elif case == 'generate_full':
+        files = len(generate_context(tree, out=out, index=index))
+    elif case == 'refresh_model':
+        files = _refresh_model(tree, index)
+    elif case == 'query':
+        files = len(generate_context(tree, out=out, index=index, query=BENCH_QUERY))
+    else:
+        raise ValueError(f"Caso desconocido: {case}")
+    seconds = time.perf_counter() - start
+    return {"files": files, "seconds": seconds, "peak_rss_mb": peak_rss_mb()}
+
+
+def _child(case, tree, workdir):
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', case, '--tree', tree,
+                             '--workdir', workdir], stdout=subprocess.PIPE, check=False)
+    if result.returncode != 0:
+        raise RuntimeError(f"El caso {case} falló (código {result.returncode})")
+    return json.loads(result.stdout)
+
+
+def measure(case, tree, meta, repeat, base_dir, primed):
+    """Mejor tiempo y mayor pico de memoria de `repeat` ejecuciones, cada una en un directorio limpio.
+
+    Los casos con índice al día parten de una copia del de `primed` (escaneado una vez por árbol).
+    """
+    runs = []
+    for _ in range(repeat):
+        workdir = tempfile.mkdtemp(prefix='work-', dir=base_dir)
+        try:
+            if CASES[case][1]:
+                shutil.copytree(os.path.join(primed, CACHE_DIR), os.path.join(workdir, CACHE_DIR))
+            runs.append(_child(case, tree, workdir))
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    seconds = min(r["seconds"] for r in runs)
+    peaks = [r["peak_rss_mb"] for r in runs if r["peak_rss_mb"] is not None]
+    return {
+        "case": case,
+        "size": meta["files"],
+        "files": runs[0]["files"],
+        "seconds": round(seconds, 4),
+        "files_per_s": round(meta["files"] / seconds, 1) if seconds else None,
+        "mb_per_s": round(meta["bytes"] / (1024 * 1024) / seconds, 2) if seconds else None,
+        "peak_rss_mb": round(max(peaks), 1) if peaks else None,
+    }
+
+
+# --- HISTORIAL Y REGRESIONES ---
+
+def machine_id():
+    """Las comparaciones solo tienen sentido en la misma máquina y versión de Python"""
+    return f"{platform.node()}/{platform.system()}/{platform.machine()}/py{platform.python_version()}"
+
+
+def git_commit():
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=False)
+    except OSError:
+        return None
+    return result.stdout.decode('ascii', 'replace').strip() or None
+
+
+def load_history(path):
+    try:
+        with open(path, encoding='utf-8') as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return []
+
+
+def save_history(path, history):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as fh:
+        json.dump(history, fh, indent=1)
+    os.replace(tmp, path)
+
+
+def find_regressions(history, run, tolerance):
+    """Mensajes de los casos de `run` peores que la mediana de las últimas ejecuciones comparables"""
+    previous = [r for r in history if r["machine"] == run["machine"]]
+    messages = []
+    for result in run["results"]:
+        for metric, floor in NOISE_FLOOR.items():
+            values = [old[metric] for r in previous for old in r["results"]
+                      if old["case"] == result["case"] and old["size"] == result["size"]
+                      and old.get(metric) is not None][-HISTORY_WINDOW:]
+            if not values or result[metric] is None:
+                continue
+            reference = statistics.median(values)
+            if result[metric] > reference * (1 + tolerance) and result[metric] - reference > floor:
+                messages.append(f"{result['case']} ({result['size']} archivos): {metric} {result[metric]} "
+                                f"> mediana {reference:g} + {tolerance:.0%}")
+    return messages
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de escaneo y generación sobre árboles sintéticos.")
+    parser.add_argument("--sizes", type=int, nargs='+', default=DEFAULT_SIZES, help="Archivos .cs por árbol")
+    parser.add_argument("--cases", nargs='+', choices=list(CASES), default=list(CASES), help="Casos a medir")
+    parser.add_argument("--repeat", type=int, default=1, help="Ejecuciones por caso (se toma el mejor tiempo)")
+    parser.add_argument("--trees", default=os.path.join(tempfile.gettempdir(), 'autoprompt-bench'),
+                        help="Carpeta donde se generan y reutilizan los árboles sintéticos")
+    parser.add_argument("--history", default=HISTORY_FILE, help="Historial JSON de resultados")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Margen sobre la mediana previa antes de marcar una regresión (0.2 = 20%%)")
+    parser.add_argument("--no-save", action="store_true", help="No añadir esta ejecución al historial")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--tree", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_case(args.child, args.tree, args.workdir)))
+        return 0
+
+    os.makedirs(args.trees, exist_ok=True)
+    run = {"timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'), "machine": machine_id(), "commit": git_commit(),
+           "results": []}
+    print(f"{'caso':<20}{'archivos':>10}{'s':>10}{'archivos/s':>12}{'MB/s':>9}{'pico MB':>10}")
+    for size in args.sizes:
+        tree = os.path.join(args.trees, f"tree-{size}")
+        meta = make_tree(tree, size)
+        primed = tempfile.mkdtemp(prefix='primed-', dir=args.trees)
+        try:
+            if any(CASES[case][1] for case in args.cases):
+                _child('prime_query' if 'query' in args.cases else 'prime', tree, primed)
+            for case in args.cases:
+                result = measure(case, tree, meta, args.repeat, args.trees, primed)
+                run["results"].append(result)
+                print(f"{case:<20}{result['size']:>10}{result['seconds']:>10.3f}"
+                      f"{result['files_per_s'] or 0:>12.0f}{result['mb_per_s'] or 0:>9.1f}"
+                      f"{result['peak_rss_mb'] or 0:>10.1f}", flush=True)
+        finally:
+            shutil.rmtree(primed, ignore_errors=True)
+
+    history = load_history(args.history)
+    regressions = find_regressions(history, run, args.tolerance)
+    if not args.no_save:
+        history.append(run)
+        save_history(args.history, history)
+    for message in regressions:
+        print(f"REGRESIÓN: {message}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,23 @@
+"""Generador de contexto IA: núcleo sin Tk reutilizable desde CLI, CI o la interfaz gráfica."""
+from .core import generate_context, render_changes, resolve_mode, select_files
+from .prompts import PROMPTS
+from .render import render_context
+from .scanner import ScanIndex, scan_and_sort_files, scan_files, sort_files
+from .shards import render_sharded
+from .tokens import count_tokens, fit_to_budget
+
+__all__ = [
+    "PROMPTS",
+    "ScanIndex",
+    "count_tokens",
+    "fit_to_budget",
+    "generate_context",
+    "render_changes",
+    "render_context",
+    "render_sharded",
+    "resolve_mode",
+    "scan_and_sort_files",
+    "scan_files",
+    "select_files",
+    "sort_files",
+]
@@ -0,0 +1,148 @@
+"""Caché de bloques renderizados, direccionada por contenido.
+
+El cuerpo de cada bloque <file> (lo que va dentro de CDATA) depende solo del contenido
+del archivo y de la variante (completo o estructura), así que se guarda en BLOCKS_DIR
+con clave hash(contenido, variante). Archivos idénticos comparten entrada. La expulsión
+es LRU por fecha de modificación (se actualiza en cada acierto) con tope de bytes.
+"""
+import hashlib
+import os
+import tempfile
+
+from .config import BLOCK_CACHE_MAX_BYTES, BLOCKS_DIR, MINIFY_MAX_BODY_LINES
+from .csharp import OUTLINE_VERSION
+from .minify import MINIFY_VERSION
+from .profiling import current as current_profiler
+
+BLOCK_FORMAT = 1  # Subirlo invalida los cuerpos guardados (cambios en strip_lines o iter_block)
+FULL = 'full'
+STRUCTURE = 'structure'
+
+
+def minified_variant(level):
+    """Variante de un cuerpo completo minificado a `level` (ver minify.LEVELS)"""
+    return f"{FULL}-{level}-{MINIFY_MAX_BODY_LINES}"
+
+
+def block_key(content_hash, variant):
+    """Clave de la caché para el cuerpo de un archivo con ese hash de contenido"""
+    if variant == STRUCTURE:
+        version = OUTLINE_VERSION
+    elif variant == FULL:
+        version = 0
+    else:
+        version = MINIFY_VERSION
+    return hashlib.blake2b(f"{BLOCK_FORMAT}:{version}:{variant}:{content_hash}".encode('ascii'),
+                           digest_size=16).hexdigest()
+
+
+class CachedBlock:
+    """Fragmento de salida que vive en un archivo de la caché (ver output.write_chunk)"""
+
+    __slots__ = ('path', 'size')
+
+    def __init__(self, path, size):
+        self.path = path
+        self.size = size
+
+    def text(self):
+        with open(self.path, 'r', encoding='utf-8', newline='') as fh:
+            return fh.read()
+
+
+class BlockCache:
+    def __init__(self, cache_dir=BLOCKS_DIR, max_bytes=BLOCK_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.blk')
+
+    def get(self, key):
+        """CachedBlock de la clave, o None; un acierto lo marca como usado recientemente"""
+        path = self._path(key)
+        try:
+            os.utime(path)
+            size = os.stat(path).st_size
+        except OSError:
+            self.misses += 1
+            current_profiler().count('cache.miss')
+            return None
+        self.hits += 1
+        current_profiler().count('cache.hit')
+        return CachedBlock(path, size)
+
+    def put(self, key, text):
+        """Guarda un cuerpo de forma atómica; un fallo de escritura no impide generar"""
+        for _ in self.tee(key, (text,)):
+            pass
+
+    def tee(self, key, chunks):
+        """Devuelve los fragmentos de `chunks` a la vez que los guarda como cuerpo de `key`, sin
+        juntarlos en memoria. La entrada solo se crea si se consumen todos; un fallo de escritura
+        deja de guardar pero no interrumpe la salida"""
+        fh = tmp = None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            fh = os.fdopen(fd, 'w', encoding='utf-8', newline='')
+        except OSError:
+            pass
+        try:
+            for chunk in chunks:
+                if fh is not None:
+                    try:
+                        fh.write(chunk)
+                    except OSError:
+                        fh = self._discard(fh, tmp)
+                yield chunk
+            if fh is not None:
+                try:
+                    fh.close()
+                    os.replace(tmp, self._path(key))
+                    fh = None
+                except OSError:
+                    pass
+        finally:
+            if fh is not None:
+                self._discard(fh, tmp)
+
+    @staticmethod
+    def _discard(fh, tmp):
+        try:
+            fh.close()
+        except OSError:
+            pass
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        return None
+
+    def evict(self):
+        """Borra las entradas menos usadas hasta quedar bajo max_bytes"""
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.name.endswith('.blk'):
+                        try:
+                            st = entry.stat()
+                        except OSError:
+                            continue
+                        entries.append((st.st_mtime_ns, st.st_size, entry.path))
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= self.max_bytes:
+                break
@@ -0,0 +1,96 @@
+"""Cambios desde una referencia: la última generación (índice) o un ref de git.
+
+Ninguna operación lanza un proceso por archivo: git se invoca un número fijo de veces
+(diff --name-only, ls-files de no rastreados y cat-file --batch para los originales).
+"""
+import os
+import subprocess
+
+from .roots import index_roots
+from .scanner import decode_source
+
+LAST_RUN = 'last'  # Valor de `since` que compara con la última generación
+
+
+def _git(root_dir, *args, input=None):
+    try:
+        result = subprocess.run(['git', *args], cwd=root_dir, input=input,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
+    except OSError as e:
+        raise ValueError(f"No se pudo ejecutar git: {e}") from e
+    if result.returncode != 0:
+        raise ValueError(f"git {args[0]}: {result.stderr.decode('utf-8', 'replace').strip()}")
+    return result.stdout
+
+
+def _split_paths(output):
+    return {p.replace('/', os.sep) for p in os.fsdecode(output).split('\0') if p}
+
+
+def git_changed_paths(root_dir, ref):
+    """Rutas (relativas a root_dir) que difieren de `ref` en el árbol de trabajo, más las no rastreadas"""
+    changed = _split_paths(_git(root_dir, 'diff', '--name-only', '--relative', '-z', ref, '--'))
+    changed |= _split_paths(_git(root_dir, 'ls-files', '-z', '--others', '--exclude-standard'))
+    return changed
+
+
+def git_texts(root_dir, ref, paths):
+    """{ruta: texto en `ref`} de las rutas que existen en ese ref, con un único cat-file --batch"""
+    paths = list(paths)
+    if not paths:
+        return {}
+    request = "".join(f"{ref}:./{p.replace(os.sep, '/')}\n" for p in paths).encode('utf-8')
+    output = _git(root_dir, 'cat-file', '--batch', input=request)
+    texts = {}
+    pos = 0
+    for path in paths:
+        end = output.index(b'\n', pos)
+        header = output[pos:end].split()
+        pos = end + 1
+        if header[-1] == b'missing':
+            continue  # Archivo nuevo desde `ref`
+        size = int(header[2])
+        texts[path] = decode_source(output[pos:pos + size])
+        pos += size + 1
+    return texts
+
+
+def collect_changes(files, index, root_dir, since=LAST_RUN, diffs=False):
+    """Archivos de `files` cambiados desde `since` (LAST_RUN o un ref de git).
+
+    Devuelve (cambiados, rutas eliminadas, textos originales). Los textos originales
+    solo se cargan con `diffs`; un archivo nuevo no tiene entrada y, con LAST_RUN, uno modificado
+    sin contenido guardado tiene None (se guarda desde el primer uso de LAST_RUN, ver
+    ScanIndex.enable_snapshots).
+    Con un roots.MultiIndex el ref de git se compara en cada raíz.
+    """
+    exts = tuple({os.path.splitext(f['path'])[1] for f in files})
+    present = {f['path'] for f in files}
+    if since == LAST_RUN:
+        index.enable_snapshots()  # Las próximas generaciones guardan el contenido para los diffs
+        previous = index.last_run_hashes()
+        changed = [f for f in files if previous.get(f['path']) != f['hash']]
+        deleted = sorted(p for p in previous if p not in present and p.endswith(exts))
+        old_texts = index.last_run_texts([f['path'] for f in changed] + deleted) if diffs else {}
+        if diffs:
+            old_texts.update((f['path'], None) for f in changed
+                             if f['path'] in previous and f['path'] not in old_texts)
+    else:
+        roots = index_roots(index, root_dir)
+        names = {}  # ruta del modelo -> (raíz, ruta relativa a ella)
+        for root in roots:
+            try:
+                root_names = git_changed_paths(root.path, since)
+            except ValueError as e:
+                raise ValueError(f"Raíz {root.name}: {e}") if root.name is not None else e
+            names.update((root.prefixed(p), (root, p)) for p in root_names)
+        changed = [f for f in files if f['path'] in names]
+        deleted = sorted(p for p, (root, rel_path) in names.items() if p not in present and p.endswith(exts)
+                         and not os.path.exists(os.path.join(root.path, rel_path)))
+        old_texts = {}
+        if diffs:
+            for root in roots:
+                wanted = {names[p][1]: p for p in [f['path'] for f in changed] + deleted if names[p][0] is root}
+                old_texts.update((wanted[p], text) for p, text in git_texts(root.path, since, wanted).items())
+    return changed, deleted, old_texts
+
@@ -0,0 +1,186 @@
+import argparse
+import sys
+from contextlib import nullcontext
+
+from .config import EXCLUDE, INCLUDE, MINIFY, OUTPUT_FILE, POOL, QUERY_TOP_K, ROOT_DIR, ROOTS, USE_GITIGNORE, WORKERS
+from .core import generate_context
+from .minify import LEVELS
+from .parallel import POOL_KINDS
+from .profiles import load_profiles, store_profile
+from .profiling import Profiler, profiled
+from .prompts import PROMPTS
+from .roots import parse_root_args
+from .shards import existing_shards
+from .tokens import file_tokens
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="autoprompt.py",
+        description="Generador de Contexto IA. Sin argumentos abre la interfaz gráfica.")
+    parser.add_argument("--gui", action="store_true", help="Abrir la interfaz gráfica (Tk)")
+    parser.add_argument("--mode", help=f"Prompt predefinido, nombre o prefijo (p. ej. \"Modo 2\"). "
+                                       f"Disponibles: {'; '.join(PROMPTS)}")
+    parser.add_argument("--prompt-file", help="Leer el prompt desde un archivo ('-' para stdin)")
+    parser.add_argument("--root", action="append", metavar="[NOMBRE=]RUTA",
+                        help=f"Directorio a escanear (por defecto {ROOT_DIR!r} o ROOTS de config). Repetible: "
+                             "varias raíces se escanean en paralelo y sus rutas llevan el prefijo NOMBRE/ "
+                             "(por defecto el nombre de la carpeta)")
+    parser.add_argument("--include-csproj", action="store_true", help="Incluir archivos .csproj")
+    parser.add_argument("--structure-only", action="store_true", help="Solo estructura de los .cs: usings, namespaces, tipos y firmas públicas")
+    parser.add_argument("--minify", choices=LEVELS, default=MINIFY,
+                        help="Minificar los .cs del modo completo (niveles acumulativos): sin docs ///, "
+                             "sin comentarios, espacios compactos o cuerpos largos resumidos")
+    parser.add_argument("--select", action="append", metavar="GLOB",
+                        help="Incluir solo rutas que coincidan, sintaxis de .gitignore: 'carpeta/**' "
+                             "para todo un subárbol (repetible)")
+    parser.add_argument("--selection", metavar="NOMBRE",
+                        help="Partir de un perfil de selección guardado; si nada cambió desde la última vez "
+                             "no se reescanea (ver --list-selections)")
+    parser.add_argument("--save-selection", metavar="NOMBRE",
+                        help="Guardar los patrones de --select como perfil de selección y generar con él")
+    parser.add_argument("--list-selections", action="store_true", help="Listar los perfiles de selección y salir")
+    parser.add_argument("--include", action="append", metavar="GLOB",
+                        help="Escanear solo archivos que coincidan, sintaxis de .gitignore (repetible; "
+                             "sustituye a INCLUDE de config)")
+    parser.add_argument("--exclude", action="append", metavar="GLOB",
+                        help="No escanear lo que coincida, sintaxis de .gitignore; las carpetas se podan "
+                             "(repetible; se suma a EXCLUDE de config)")
+    parser.add_argument("--no-gitignore", action="store_true", help="No respetar los .gitignore del árbol")
+    parser.add_argument("--out", default=OUTPUT_FILE, help="Archivo de salida ('.gz'/'.zst' se comprimen), '-' para stdout")
+    parser.add_argument("--max-tokens", type=int, metavar="N",
+                        help="Ajustar la selección (por PRIORITY_DIRS) para no superar N tokens")
+    parser.add_argument("--seed", action="append", metavar="PATH",
+                        help="Incluir solo la semilla (ruta o glob, repetible) y los archivos de los que depende, "
+                             "según el grafo de .csproj, usings y tipos referenciados")
+    parser.add_argument("--depth", type=int, metavar="N", help="Con --seed, máximo de saltos en el grafo")
+    parser.add_argument("--since", metavar="REF",
+                        help="Solo archivos cambiados desde un ref de git, o 'last' (última generación), "
+                             "más la estructura de sus dependientes directos")
+    parser.add_argument("--query", metavar="TEXTO",
+                        help="Elegir de la selección los fragmentos (tipos y métodos) más relevantes para la "
+                             "pregunta, dentro de --max-tokens; el índice de fragmentos se actualiza solo. "
+                             "Las palabras se comparan tal cual (sin tildes ni mayúsculas, sin traducir): "
+                             "usa los términos del código")
+    parser.add_argument("--top-k", type=int, default=QUERY_TOP_K, metavar="N",
+                        help="Con --query, máximo de fragmentos")
+    parser.add_argument("--diff", action="store_true", help="Con --since, emitir diffs unificados en lugar de archivos completos")
+    shard = parser.add_mutually_exclusive_group()
+    shard.add_argument("--shard-bytes", type=int, metavar="N",
+                       help="Repartir la salida en partes de como mucho N bytes (OUT.part01.txt, ...)")
+    shard.add_argument("--shard-tokens", type=int, metavar="N",
+                       help="Repartir la salida en partes de como mucho N tokens")
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help="Archivos leídos/renderizados en paralelo (1 = secuencial)")
+    parser.add_argument("--pool", choices=POOL_KINDS, default=POOL,
+                        help="Hilos para E/S o procesos para la extracción de estructura")
+    parser.add_argument("--profile", nargs='?', const='', metavar="PATH",
+                        help="Medir fases, tiempos por archivo y bytes y mostrar un resumen en stderr; "
+                             "con PATH vuelca una traza de Chrome (.json) o un perfil cProfile (pstats)")
+    return parser
+
+
+def run_gui():
+    # Tk solo se importa cuando realmente se abre la ventana
+    from .gui import ContextApp
+    import tkinter as tk
+
+    root = tk.Tk()
+    ContextApp(root)
+    root.mainloop()
+    return 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    args = build_parser().parse_args(argv)
+    if args.gui or not argv:
+        return run_gui()
+
+    if args.diff and args.since is None:
+        print("Error: --diff requiere --since", file=sys.stderr)
+        return 1
+    if args.depth is not None and not args.seed:
+        print("Error: --depth requiere --seed", file=sys.stderr)
+        return 1
+    if args.query is None and args.top_k != QUERY_TOP_K:
+        print("Error: --top-k requiere --query", file=sys.stderr)
+        return 1
+    if args.save_selection is not None and (not args.select or args.selection is not None):
+        print("Error: --save-selection requiere --select y no se combina con --selection", file=sys.stderr)
+        return 1
+
+    if args.list_selections:
+        try:
+            profiles = load_profiles()
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        for name, profile in profiles.items():
+            manifest = profile["manifest"]
+            count = f"{len(manifest['files'])} archivos" if manifest else "sin manifiesto"
+            print(f"{name}: {' '.join(profile['patterns'])} ({count})")
+        return 0
+
+    root_dir, roots = ROOT_DIR, ROOTS
+    if args.root:
+        if len(args.root) == 1 and '=' not in args.root[0]:
+            root_dir, roots = args.root[0], {}  # Una sola raíz: rutas sin prefijo, como siempre
+        else:
+            try:
+                roots = parse_root_args(args.root)
+            except ValueError as e:
+                print(f"Error: {e}", file=sys.stderr)
+                return 1
+
+    prompt = None
+    if args.prompt_file:
+        if args.prompt_file == '-':
+            prompt = sys.stdin.read()
+        else:
+            with open(args.prompt_file, 'r', encoding='utf-8') as fh:
+                prompt = fh.read()
+
+    selection, patterns = args.selection, args.select
+    if args.save_selection is not None:
+        try:
+            store_profile(args.save_selection, args.select)
+        except (ValueError, OSError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        selection, patterns = args.save_selection, None
+
+    profiler = None
+    if args.profile is not None:
+        profiler = Profiler(cprofile=bool(args.profile) and not args.profile.endswith('.json'))
+    try:
+        with profiled(profiler) if profiler is not None else nullcontext():
+            files = generate_context(
+                root_dir=root_dir, roots=roots, mode=args.mode, prompt=prompt,
+                include_csproj=args.include_csproj, structure_only=args.structure_only, minify=args.minify,
+                out=args.out, patterns=patterns, selection=selection, workers=args.workers, pool=args.pool,
+                max_tokens=args.max_tokens, since=args.since, diffs=args.diff,
+                seeds=args.seed, depth=args.depth, query=args.query, top_k=args.top_k,
+                shard_bytes=args.shard_bytes, shard_tokens=args.shard_tokens,
+                include=args.include or INCLUDE, exclude=EXCLUDE + (args.exclude or []),
+                gitignore=USE_GITIGNORE and not args.no_gitignore)
+        if profiler is not None:
+            print(profiler.summary(), file=sys.stderr)
+            if args.profile:
+                profiler.dump(args.profile)
+                print(f"Perfil guardado: {args.profile}", file=sys.stderr)
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.out != '-' and args.query is not None:
+        print(f"Contexto generado: {args.out} (fragmentos de {len(files)} archivos para la consulta)", file=sys.stderr)
+    elif args.out != '-':
+        tokens = sum(file_tokens(f, args.structure_only, args.minify) for f in files)
+        target = args.out
+        if args.shard_bytes is not None or args.shard_tokens is not None:
+            shards = existing_shards(args.out)
+            target = f"{len(shards)} partes ({shards[0]} … {shards[-1]})" if len(shards) > 1 else shards[0]
+        print(f"Contexto generado: {target} ({len(files)} archivos, ~{tokens} tokens de código)",
+              file=sys.stderr)
+    return 0
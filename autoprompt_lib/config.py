@@ -0,0 +1,68 @@
+import os
+
+# --- CONFIGURACIÓN ---
+ROOT_DIR = '.'
+EXTENSIONS = ['.cs']
+IGNORE_DIRS = {'bin', 'obj', '.git', '.vs', '.idea', 'Properties', 'node_modules', '.autoprompt'}
+# Filtros del recorrido con sintaxis de .gitignore (ver ignore.py); las carpetas excluidas se podan
+INCLUDE = []  # Si no está vacío, solo se escanean los archivos que coincidan (p. ej. 'NetShaper.Engine/**')
+EXCLUDE = []  # Excluidos además de IGNORE_DIRS (p. ej. 'Generated/', '*.Designer.cs')
+USE_GITIGNORE = True  # Respetar los .gitignore del árbol y .git/info/exclude
+OUTPUT_FILE = 'analisis.proyecto.txt'
+# Índice persistente del escaneo (junto a OUTPUT_FILE)
+CACHE_DIR = os.path.join(os.path.dirname(OUTPUT_FILE), '.autoprompt')
+INDEX_FILE = os.path.join(CACHE_DIR, 'index.sqlite')
+BG_COLOR = "#ffffff"
+
+# --- SALIDA ---
+FULL_HEADER = "CÓDIGO FUENTE COMPLETO"
+STRUCTURE_HEADER = "ESTRUCTURA (Usings, Namespaces, Tipos y Firmas públicas)"
+DIFF_HEADER = "DIFF UNIFICADO"
+DEPENDENTS_HEADER = "DEPENDIENTES DIRECTOS - ESTRUCTURA"
+DEDUPE_BLOCKS = True  # Archivos con contenido idéntico se emiten una vez y luego como <file ref="..."/>
+BLOCK_CACHE = True  # Reutilizar bloques renderizados entre generaciones (caché por hash de contenido)
+BLOCKS_DIR = os.path.join(CACHE_DIR, 'blocks')
+BLOCK_CACHE_MAX_BYTES = 256 * 1024 * 1024  # Tope de la caché de bloques; se expulsan los menos usados
+SHARD_SUFFIX = ".part{number:02d}"  # Salida por partes: analisis.proyecto.part01.txt, ...
+MINIFY = None  # Modo completo minificado: None, 'docs', 'comments', 'whitespace' o 'bodies' (acumulativos)
+MINIFY_MAX_BODY_LINES = 25  # Con 'bodies', métodos con cuerpos más largos se resumen
+
+# --- ESCANEO ---
+READ_CHUNK = 1024 * 1024  # Bloque de lectura de archivos no retenidos (hash, líneas y tokens) y de copia de bloques
+CACHE_FILE_MAX_BYTES = 512 * 1024  # Archivos mayores no se guardan en memoria
+CACHE_TOTAL_MAX_BYTES = 64 * 1024 * 1024  # Tope de bytes retenidos entre escaneo y generación
+WATCH_INTERVAL = 0.5  # Segundos entre comprobaciones del modo vigilancia (inotify o sondeo de stat)
+# Varias raíces (repos hermanos) en un mismo contexto; vacío = solo ROOT_DIR. Cada raíz se escanea en
+# paralelo con su propio índice y sus rutas salen como "nombre/ruta". Valor: ruta o un dict con
+# "path" y opcionalmente "extensions", "include", "exclude" (se suma a EXCLUDE) y "gitignore", p. ej.
+# {'engine': '../engine', 'native': {'path': '../native', 'extensions': ['.cs', '.h'], 'exclude': ['third_party/']}}
+ROOTS = {}
+
+# --- PARALELISMO ---
+WORKERS = 1  # 1 = secuencial; >1 lee y renderiza archivos en un pool
+POOL = 'thread'  # 'thread' (E/S) o 'process' (extracción de estructura, CPU)
+
+# --- TOKENS ---
+TOKENIZER = 'auto'  # 'auto' (tiktoken si está instalado), 'estimate' o 'tiktoken:<encoding>'
+CHARS_PER_TOKEN = 3.5  # Estimación sin tokenizador exacto
+DEFAULT_TOKEN_BUDGET = 128000  # Valor inicial del campo "Presupuesto" en la interfaz
+# Carpetas prioritarias al ajustar la selección a un presupuesto de tokens
+PRIORITY_DIRS = ['NetShaper.Engine', 'NetShaper.Rules', 'NetShaper.Abstractions', 'NetShaper.Native']
+
+# --- PERFILES DE SELECCIÓN ---
+# Perfiles guardados con su manifiesto (ver profiles.py); los de SELECTION_PROFILES están siempre
+# disponibles, con patrones de core.select_files
+PROFILES_FILE = os.path.join(CACHE_DIR, 'profiles.json')
+SELECTION_PROFILES = {
+    "Engine hot path": ['NetShaper.Engine/**', 'NetShaper.Rules/**', 'NetShaper.Abstractions/**'],
+}
+
+# --- CONSULTAS ---
+# Selección automática por pregunta (ver retrieval.py): fragmentos de tipo o método puntuados con BM25
+QUERY_HEADER = "FRAGMENTOS RELEVANTES PARA"
+QUERY_TOP_K = 40  # Fragmentos como máximo por consulta (además del presupuesto de tokens)
+CHUNK_MIN_LINES = 8  # Miembros más cortos (campos, propiedades) se agrupan con los siguientes del mismo tipo
+CHUNK_MAX_LINES = 200  # Tramos más largos, y los archivos que no son .cs, se parten en ventanas de estas líneas
+# Reordenación semántica de los candidatos con un modelo local: None, 'auto' (all-MiniLM-L6-v2 si
+# sentence-transformers y el modelo ya están instalados) o el nombre o ruta de un modelo
+EMBEDDING_MODEL = None
@@ -0,0 +1,204 @@
+"""Núcleo sin interfaz gráfica: escanear → seleccionar → renderizar."""
+from contextlib import closing
+
+from .blocks import BlockCache
+from .changes import collect_changes
+from .config import (BLOCK_CACHE, DEFAULT_TOKEN_BUDGET, EXCLUDE, INCLUDE, OUTPUT_FILE, POOL, QUERY_HEADER, QUERY_TOP_K,
+                     ROOT_DIR, ROOTS, USE_GITIGNORE, WORKERS)
+from .output import open_output, write_chunk
+from .parallel import make_executor
+from .profiling import current as current_profiler
+from .graph import build_graph
+from .ignore import RuleSet
+from .profiles import get_profile, manifest_files, store_profile
+from .prompts import PROMPTS
+from .render import iter_changes_context, render_context, render_query_context
+from .retrieval import chunk_index, query_chunks
+from .roots import MultiIndex, iter_scan_roots, make_roots, roots_index
+from .shards import render_sharded
+from .scanner import MINIFIED, STRUCTURE, derive_files, sort_files
+from .tokens import count_tokens, fit_to_budget, header_tokens
+
+
+def resolve_mode(mode):
+    """Clave de PROMPTS a partir del nombre exacto o de un prefijo único ("Modo 2")"""
+    if mode in PROMPTS:
+        return mode
+    matches = [key for key in PROMPTS if key.lower().startswith(mode.lower())]
+    if len(matches) != 1:
+        raise ValueError(f"Modo desconocido o ambiguo: {mode!r}")
+    return matches[0]
+
+
+def select_files(files, patterns=None):
+    """Filtra por patrones sobre la ruta relativa, con la sintaxis de .gitignore (ver ignore.py):
+    `*` no cruza '/', 'carpeta/**' es todo lo que hay dentro, un patrón sin '/' mira solo el
+    nombre y '!' descarta. Sin patrones selecciona todo"""
+    if not patterns:
+        return list(files)
+    rules = RuleSet(p.replace('\\', '/') for p in patterns)
+    return [f for f in files if rules.match(f['path'].replace('\\', '/')) is True]
+
+
+def render_changes(out, files, prompt, index, root_dir, since, diffs=False, path_filter=None, executor=None):
+    """Escribe en `out` (ver open_output) el contexto de solo cambios de `files` desde `since`.
+
+    Devuelve los archivos incluidos (cambiados y dependientes). Si no hay cambios lanza
+    ValueError sin tocar la salida. `path_filter` y `executor` ver graph.build_graph.
+    """
+    profiler = current_profiler()
+    with profiler.phase('changes'):
+        changed, deleted, old_texts = collect_changes(files, index, root_dir, since, diffs)
+    if not changed and not deleted:
+        raise ValueError(f"No hay cambios desde {since}.")
+    with profiler.phase('graph'):
+        graph = build_graph(files, index, root_dir, path_filter, executor)
+    changed_paths = {f['path'] for f in changed}
+    dependent_paths = set().union(*(graph.dependents(p) for p in changed_paths)) - changed_paths
+    dependents = [f for f in files if f['path'] in dependent_paths]
+    with profiler.phase('output'), open_output(out) as stream:
+        for chunk in iter_changes_context(changed, deleted, dependents, prompt, index, since,
+                                          old_texts if diffs else None):
+            write_chunk(stream, chunk)
+    return changed + dependents
+
+
+def render_query(out, files, scanned, prompt, index, query, budget, top_k=QUERY_TOP_K, executor=None, evict=True):
+    """Escribe en `out` (ver open_output) los fragmentos de `files` más relevantes para `query` que
+    caben en `budget` tokens, tras poner al día el índice de fragmentos con `scanned` (ver retrieval.py;
+    `evict` solo si es un escaneo completo).
+
+    Devuelve los archivos de los fragmentos elegidos. Si no hay ninguno lanza ValueError sin tocar la salida.
+    """
+    profiler = current_profiler()
+    reserved = header_tokens(prompt, top_k) + count_tokens(f"{QUERY_HEADER}: {query}")
+    with closing(chunk_index(index)) as chunks:
+        with profiler.phase('chunks'):
+            chunks.update(scanned, executor, evict)
+        with profiler.phase('query'):
+            chosen = query_chunks(chunks, query, files, budget - reserved, top_k)
+    if not chosen:
+        raise ValueError(f"Ningún fragmento de la selección coincide con la consulta: {query}")
+    with profiler.phase('output'), open_output(out) as stream:
+        render_query_context(stream, chosen, prompt, index, query)
+    return sort_files({c['file']['path']: c['file'] for c in chosen}.values())
+
+
+def seed_closure(files, index, root_dir, seeds, depth=None, path_filter=None, executor=None):
+    """{ruta: distancia} de los archivos de los que dependen las semillas (rutas o globs)"""
+    seed_paths = [f['path'] for f in select_files(files, seeds)]
+    if not seed_paths:
+        raise ValueError(f"Ninguna semilla coincide con: {', '.join(seeds)}")
+    with current_profiler().phase('graph'):
+        return build_graph(files, index, root_dir, path_filter, executor).closure(seed_paths, depth)
+
+
+def generate_context(root_dir=ROOT_DIR, mode=None, prompt=None, include_csproj=False,
+                     structure_only=False, out=OUTPUT_FILE, patterns=None, index=None,
+                     workers=WORKERS, pool=POOL, max_tokens=None, since=None, diffs=False,
+                     seeds=None, depth=None, shard_bytes=None, shard_tokens=None, minify=None,
+                     include=INCLUDE, exclude=EXCLUDE, gitignore=USE_GITIGNORE, roots=ROOTS, selection=None,
+                     query=None, top_k=QUERY_TOP_K):
+    """Genera el contexto sin Tk. `out` es una ruta (.gz/.zst se comprimen), '-' (stdout) o un objeto de texto.
+
+    `max_tokens` recorta la selección por prioridad para que la salida no supere ese presupuesto.
+    `workers` > 1 lee y renderiza en paralelo (`pool` 'thread' o 'process'); el orden no cambia.
+    `since` ('last' o un ref de git) emite solo lo cambiado, en diff unificado si `diffs`.
+    `seeds` limita la selección al cierre de dependencias de esas rutas (hasta `depth` saltos);
+    con `max_tokens` se prioriza por distancia a las semillas.
+    `shard_bytes`/`shard_tokens` reparten la salida en partes de `out` con ese tamaño máximo
+    (ver shards.render_sharded). `minify` (nivel de minify.LEVELS) reduce los .cs del modo completo;
+    no afecta al modo de solo cambios.
+    `include`/`exclude` (globs de .gitignore) y `gitignore` filtran el recorrido (ver ignore.PathFilter);
+    a diferencia de `patterns`, las carpetas excluidas ni se listan.
+    `roots` ({nombre: ruta u opciones}, ver roots.make_roots) escanea varias raíces en paralelo en
+    lugar de root_dir, con rutas "nombre/ruta"; `index` solo se puede indicar con una raíz.
+    `selection` (nombre de un perfil de selección, ver profiles.py) parte de la selección de sus
+    patrones, que `patterns` puede acotar más. Sin semillas ni `since`, si su manifiesto sigue
+    vigente no se escanea (y esa generación no cuenta como última para `since` 'last'); si no, se
+    escanea y el manifiesto se rehace.
+    `query` (una pregunta) sustituye los archivos completos por los `top_k` fragmentos de tipo o
+    método más relevantes de la selección que caben en `max_tokens` (o DEFAULT_TOKEN_BUDGET), ver
+    retrieval.py; no se combina con `since`, partes, `structure_only` ni `minify`.
+    Devuelve la lista de archivos incluidos.
+    """
+    if prompt is None:
+        prompt = PROMPTS[resolve_mode(mode)] if mode else ""
+    selection_profile = get_profile(selection) if selection is not None else None
+    roots = make_roots(roots, root_dir, include, exclude, gitignore)
+    if index is None:
+        index = roots_index(roots)
+    elif isinstance(index, MultiIndex) != (roots[0].name is not None):
+        raise ValueError("Con raíces con nombre el índice debe ser un roots.MultiIndex.")
+
+    sharded = shard_bytes is not None or shard_tokens is not None
+    if since is not None and (max_tokens is not None or sharded):
+        raise ValueError("El modo de solo cambios no se combina con presupuesto de tokens ni partes.")
+    if query is not None and (since is not None or sharded or structure_only or minify is not None):
+        raise ValueError("La consulta no se combina con solo cambios, partes, solo estructura ni minificado.")
+
+    profiler = current_profiler()
+    path_filter = roots[0].path_filter  # Con MultiIndex el grafo usa el filtro de cada raíz
+    executor = make_executor(workers, pool)
+    try:
+        scanned = None
+        if selection_profile is not None and not seeds and since is None:
+            with profiler.phase('selection'):
+                scanned = manifest_files(selection_profile["manifest"], roots, include_csproj,
+                                         selection_profile["patterns"])
+        from_manifest = scanned is not None
+        if scanned is None:
+            with profiler.phase('scan'):
+                scanned = sort_files(iter_scan_roots(roots, index, include_csproj, executor))
+        files = scanned
+        if selection_profile is not None and not from_manifest:
+            files = select_files(scanned, selection_profile["patterns"])
+            try:
+                store_profile(selection, selection_profile["patterns"], files, index, roots, include_csproj)
+            except OSError:
+                pass  # El manifiesto es solo una caché: un fallo no debe impedir generar
+        files = select_files(files, patterns)
+        distances = None
+        if seeds:
+            distances = seed_closure(scanned, index, root_dir, seeds, depth, path_filter, executor)
+            files = [f for f in files if f['path'] in distances]
+        if since is not None:
+            files = render_changes(out, files, prompt, index, root_dir, since, diffs, path_filter, executor)
+            index.record_run(scanned)
+            return files
+        if query is not None:
+            # Con un filtro que recorta o desde un manifiesto el escaneo es parcial: no se olvida nada
+            evict = not from_manifest and not any(root.path_filter.narrows for root in roots)
+            budget = max_tokens if max_tokens is not None else DEFAULT_TOKEN_BUDGET
+            files = render_query(out, files, scanned, prompt, index, query, budget, top_k, executor, evict)
+            if not from_manifest:
+                index.record_run(scanned)
+            return files
+        # Estructuras para el presupuesto y el render; ahorros de minificado para presupuesto y resumen
+        derived = (STRUCTURE,) if structure_only else (MINIFIED,) if minify is not None else ()
+        if derived:
+            with profiler.phase('derive'):
+                derive_files(files, index, derived, executor)
+        if max_tokens is not None:
+            reserved = header_tokens(prompt, len(files), structure_only)
+            rank = (lambda f: distances[f['path']]) if distances is not None else None
+            with profiler.phase('budget'):
+                files = fit_to_budget(files, max_tokens, structure_only, reserved, rank=rank, minify=minify)
+        if not files:
+            raise ValueError("No hay archivos seleccionados.")
+
+        cache = BlockCache() if BLOCK_CACHE else None
+        with profiler.phase('output'):
+            if sharded:
+                render_sharded(out, files, prompt, index, structure_only, executor, cache,
+                               max_bytes=shard_bytes, max_tokens=shard_tokens, minify=minify)
+            else:
+                with open_output(out) as stream:
+                    render_context(stream, files, prompt, index, structure_only, executor, cache,
+                                   minify=minify)
+        if not from_manifest:
+            index.record_run(scanned)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return files
@@ -0,0 +1,588 @@
+"""Extractor de estructura C# a nivel de tokens.
+
+Emite usings, namespaces, declaraciones de tipos y firmas de miembros visibles
+(public/protected/internal) sin cuerpos. No es un parser completo: reconoce
+comentarios, literales (normales, verbatim, interpolados y raw) y directivas
+de preprocesador para poder saltar cuerpos contando llaves con seguridad.
+"""
+import re
+
+OUTLINE_VERSION = 2  # Subirlo invalida las estructuras guardadas en el índice
+FACTS_VERSION = 1  # Ídem para los datos del grafo de dependencias (file_facts)
+NO_DECLARATIONS = "// (Sin declaraciones)"
+
+TYPE_KEYWORDS = {'class', 'struct', 'interface', 'enum', 'record'}
+VISIBLE_MODIFIERS = {'public', 'protected', 'internal'}
+MAX_INITIALIZER_CHARS = 80  # Inicializadores más largos se resumen como "= ..."
+
+_TOKEN_RE = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))
+  | (?P<pp>\#[^\n]*)
+  | (?P<str>[$@]*")
+  | (?P<chr>'(?:\\.|[^'\\\n])*')
+  | (?P<word>@?[^\W\d]\w*)
+  | (?P<num>\d[\w.]*)
+  | (?P<op>=>|==|!=|<=|>=|&&|\|\||\+\+|--|[-+*/%&|^]=|<<=?|\?\?=?|::|->|.)
+""", re.VERBOSE | re.DOTALL)
+
+
+def _skip_string(text, pos):
+    """Fin (exclusivo) del literal de cadena que empieza en pos, con prefijos $/@"""
+    start = pos
+    while text[pos] in '$@':
+        pos += 1
+    prefix = text[start:pos]
+    interpolated = '$' in prefix
+    n = len(text)
+    quotes = 0
+    while pos + quotes < n and text[pos + quotes] == '"':
+        quotes += 1
+    if quotes >= 3:
+        # Raw string literal: termina con la misma cantidad de comillas
+        end = text.find('"' * quotes, pos + quotes)
+        return len(text) if end < 0 else end + quotes
+    verbatim = '@' in prefix
+    pos += 1
+    while pos < n:
+        c = text[pos]
+        if c == '"':
+            if verbatim and text.startswith('""', pos):
+                pos += 2
+                continue
+            return pos + 1
+        if c == '\\' and not verbatim:
+            pos += 2
+            continue
+        if c == '\n' and not verbatim:
+            return pos  # Literal sin cerrar: no arrastrar el resto del archivo
+        if c == '{' and interpolated:
+            if text.startswith('{{', pos):
+                pos += 2
+                continue
+            pos = _skip_hole(text, pos + 1)
+            continue
+        pos += 1
+    return n
+
+
+def _skip_hole(text, pos):
+    """Salta una expresión {…} de una cadena interpolada, que puede contener otras cadenas"""
+    depth = 1
+    n = len(text)
+    while pos < n:
+        c = text[pos]
+        if c == '"' or (c in '$@' and text[pos:pos + 3].lstrip('$@').startswith('"')):
+            pos = _skip_string(text, pos)
+            continue
+        if c == "'":
+            m = _TOKEN_RE.match(text, pos)
+            pos = m.end() if m and m.lastgroup == 'chr' else pos + 1
+            continue
+        if c == '{':
+            depth += 1
+        elif c == '}':
+            depth -= 1
+            if depth == 0:
+                return pos + 1
+        pos += 1
+    return n
+
+
+def tokenize(text):
+    """Tokens significativos (sin espacios, comentarios ni preprocesador) como lista de str"""
+    tokens = []
+    pos = 0
+    n = len(text)
+    match = _TOKEN_RE.match
+    while pos < n:
+        m = match(text, pos)
+        kind = m.lastgroup
+        if kind == 'str':
+            end = _skip_string(text, pos)
+            tokens.append(text[pos:end])
+            pos = end
+            continue
+        if kind not in ('ws', 'comment', 'pp'):
+            tokens.append(m.group())
+        pos = m.end()
+    return tokens
+
+
+def iter_tokens(lines, chunk_chars=64 * 1024):
+    """Como tokenize, a partir de las líneas del archivo y sin unirlas en un texto.
+
+    Se tokeniza por bloques de líneas; lo que empieza en la última línea de un bloque, o
+    llega a su final (comentarios o cadenas de varias líneas), se arrastra al siguiente.
+    """
+    carry = ''
+    pending = []
+    size = 0
+    for line in lines:
+        pending.append(line)
+        size += len(line)
+        if size >= chunk_chars:
+            carry = yield from _chunk_tokens(carry + ''.join(pending), False)
+            pending.clear()
+            size = 0
+    yield from _chunk_tokens(carry + ''.join(pending), True)
+
+
+def _chunk_tokens(text, final):
+    """Tokens de un bloque de iter_tokens; devuelve el texto a arrastrar al siguiente"""
+    n = len(text)
+    safe = n if final else text.rfind('\n', 0, n - 1) + 1  # Inicio de la última línea
+    pos = 0
+    match = _TOKEN_RE.match
+    while pos < n:
+        m = match(text, pos)
+        kind = m.lastgroup
+        end = _skip_string(text, pos) if kind == 'str' else m.end()
+        if not final and (pos >= safe or end >= n):
+            return text[pos:]
+        if kind not in ('ws', 'comment', 'pp'):
+            yield text[pos:end]
+        pos = end
+    return ''
+
+
+_NO_SPACE_BEFORE = {',', ';', ')', ']', '>', '.', '(', '[', '?', '<'}
+_NO_SPACE_AFTER = {'(', '[', '<', '.', '!', '~'}
+
+
+def join_tokens(tokens):
+    """Texto compacto de una declaración a partir de sus tokens"""
+    parts = []
+    prev = None
+    for tok in tokens:
+        if prev is not None and tok not in _NO_SPACE_BEFORE and prev not in _NO_SPACE_AFTER:
+            parts.append(' ')
+        parts.append(tok)
+        prev = tok
+    return ''.join(parts)
+
+
+def _strip_attributes(tokens):
+    """Quita los [Atributos] iniciales de una declaración"""
+    i = 0
+    while i < len(tokens) and tokens[i] == '[':
+        depth = 0
+        while i < len(tokens):
+            if tokens[i] == '[':
+                depth += 1
+            elif tokens[i] == ']':
+                depth -= 1
+                if depth == 0:
+                    i += 1
+                    break
+            i += 1
+    return tokens[i:]
+
+
+def _type_keyword(tokens):
+    """Palabra clave de tipo de la declaración, si la hay antes de parámetros, bases o genéricos"""
+    for tok in tokens:
+        if tok in ('(', ':', '<', '=', 'where'):
+            return None
+        if tok in TYPE_KEYWORDS:
+            return tok
+    return None
+
+
+def _matching(tokens, i, open_tok, close_tok):
+    """Índice siguiente al cierre que empareja tokens[i] == open_tok"""
+    depth = 0
+    n = len(tokens)
+    while i < n:
+        tok = tokens[i]
+        if tok == open_tok:
+            depth += 1
+        elif tok == close_tok:
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return n
+
+
+def _skip_statement(tokens, i):
+    """Índice siguiente al ';' que cierra la expresión actual (respetando llaves y paréntesis)"""
+    depth = 0
+    n = len(tokens)
+    while i < n:
+        tok = tokens[i]
+        if tok in ('{', '(', '['):
+            depth += 1
+        elif tok in ('}', ')', ']'):
+            depth -= 1
+            if depth < 0:
+                return i  # Fin del bloque contenedor sin ';'
+        elif tok == ';' and depth == 0:
+            return i + 1
+        i += 1
+    return n
+
+
+class _Outliner:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.out = []
+        self.scopes = []  # 'namespace' | 'type' | 'interface' emitidos y abiertos
+
+    def emit(self, text):
+        self.out.append('    ' * len(self.scopes) + text)
+
+    def visible(self, decl):
+        scope = self.scopes[-1] if self.scopes else None
+        if scope == 'interface':
+            return 'private' not in decl
+        if scope == 'type':
+            return any(tok in VISIBLE_MODIFIERS for tok in decl)
+        return True  # Tipos de nivel superior: public o internal implícito
+
+    def run(self):
+        tokens = self.tokens
+        n = len(tokens)
+        header = []
+        i = 0
+        while i < n:
+            tok = tokens[i]
+            if tok in ('(', '['):
+                end = _matching(tokens, i, tok, ')' if tok == '(' else ']')
+                header.extend(tokens[i:end])
+                i = end
+            elif tok == ';':
+                self.statement(header)
+                header = []
+                i += 1
+            elif tok == '{':
+                i = self.block(header, i)
+                header = []
+            elif tok == '}':
+                if self.scopes:
+                    self.scopes.pop()
+                    if self.out and self.out[-1] == '    ' * len(self.scopes) + '{':
+                        self.out[-1] += ' }'  # Tipo sin miembros visibles
+                    else:
+                        self.emit('}')
+                header = []
+                i += 1
+            elif tok == '=>':
+                # Miembro con cuerpo de expresión: método, o propiedad de solo lectura
+                self.member(header, expression_bodied=True)
+                header = []
+                i = _skip_statement(tokens, i + 1)
+            elif tok == '=' and header and self.scopes and self.scopes[-1] != 'namespace':
+                i = self.initializer(header, i)
+                header = []
+            else:
+                header.append(tok)
+                i += 1
+        return self.out
+
+    def statement(self, header):
+        """Declaración terminada en ';' a nivel de namespace o tipo"""
+        decl = _strip_attributes(header)
+        if not decl:
+            return
+        if decl[0] == 'using' or decl[:2] == ['global', 'using']:
+            if not self.scopes or self.scopes[-1] == 'namespace':
+                self.emit(join_tokens(decl) + ';')
+        elif decl[0] == 'namespace':
+            self.emit(join_tokens(decl) + ';')  # File-scoped namespace
+        elif _type_keyword(decl) or 'delegate' in decl:
+            if self.visible(decl):
+                self.emit(join_tokens(header if _type_keyword(decl) else decl) + ';')
+        elif self.scopes and self.scopes[-1] != 'namespace':
+            self.member(header)
+
+    def member(self, header, expression_bodied=False):
+        decl = _strip_attributes(header)
+        if decl and self.scopes and self.scopes[-1] != 'namespace' and self.visible(decl):
+            if expression_bodied and '(' not in decl:
+                self.emit(join_tokens(decl) + ' { get; }')
+            else:
+                self.emit(join_tokens(decl) + ';')
+
+    def initializer(self, header, i):
+        """Campo o propiedad con inicializador: conserva valores cortos, resume los largos"""
+        end = _skip_statement(self.tokens, i + 1)
+        decl = _strip_attributes(header)
+        if decl and self.visible(decl):
+            value = join_tokens(self.tokens[i + 1:end - 1 if self.tokens[end - 1:end] == [';'] else end])
+            if len(value) > MAX_INITIALIZER_CHARS:
+                value = '...'
+            self.emit(f"{join_tokens(decl)} = {value};")
+        return end
+
+    def block(self, header, i):
+        """'{' a nivel de declaración: namespace, tipo, miembro o bloque a saltar"""
+        tokens = self.tokens
+        decl = _strip_attributes(header)
+        kind = _type_keyword(decl)
+        end = _matching(tokens, i, '{', '}')
+
+        if decl[:1] == ['namespace'] and (not self.scopes or self.scopes[-1] == 'namespace'):
+            self.emit(join_tokens(decl))
+            self.emit('{')
+            self.scopes.append('namespace')
+            return i + 1
+        if kind and self.visible(decl):
+            self.emit(join_tokens(header))
+            if kind == 'enum':
+                members = join_tokens(_strip_enum_attributes(tokens[i + 1:end - 1]))
+                self.emit('{ ' + members + ' }' if members else '{ }')
+                return end
+            self.emit('{')
+            self.scopes.append('interface' if kind == 'interface' else 'type')
+            return i + 1
+        if kind or not self.scopes or self.scopes[-1] == 'namespace' or not decl:
+            return end  # Tipo no visible o bloque suelto (p. ej. sentencias de nivel superior)
+        if self.visible(decl):
+            if '(' in decl:
+                self.emit(join_tokens(decl) + ';')  # Método, constructor u operador
+            else:
+                self.emit(f"{join_tokens(decl)} {{ {_accessors(tokens[i + 1:end - 1])} }}")
+        if tokens[end:end + 1] == ['=']:
+            end = _skip_statement(tokens, end + 1)  # Propiedad con inicializador
+        return end
+
+
+def _strip_enum_attributes(tokens):
+    result = []
+    i = 0
+    while i < len(tokens):
+        if tokens[i] == '[':
+            i = _matching(tokens, i, '[', ']')
+            continue
+        result.append(tokens[i])
+        i += 1
+    return result
+
+
+def _accessors(tokens):
+    """'get; private set;' a partir del cuerpo de una propiedad, indexador o evento"""
+    parts = []
+    current = []
+    i = 0
+    n = len(tokens)
+    while i < n:
+        tok = tokens[i]
+        if tok == '[':
+            i = _matching(tokens, i, '[', ']')
+            continue
+        if tok == '{':
+            i = _matching(tokens, i, '{', '}')
+        elif tok == '=>':
+            i = _skip_statement(tokens, i + 1)
+        elif tok == ';':
+            i += 1
+        else:
+            current.append(tok)
+            i += 1
+            continue
+        if current:
+            parts.append(join_tokens(current) + ';')
+            current = []
+    return ' '.join(parts)
+
+
+_IDENTIFIER_RE = re.compile(r'@?[^\W\d]\w*$')
+
+
+def _dotted_name(tokens, i):
+    """(nombre con puntos que empieza en tokens[i], índice siguiente)"""
+    parts = []
+    while i < len(tokens) and _IDENTIFIER_RE.match(tokens[i]):
+        parts.append(tokens[i].lstrip('@'))
+        if tokens[i + 1:i + 2] != ['.']:
+            return '.'.join(parts), i + 1
+        i += 2
+    return '.'.join(parts), i
+
+
+def file_facts(tokens):
+    """Datos de un archivo .cs para el grafo de dependencias (ver graph.py):
+    namespaces declarados, usings de namespace (locales y globales), tipos declarados
+    y nombres de tipo referenciados (identificadores en PascalCase).
+
+    `tokens` puede ser un iterador (ver iter_tokens): se recorre por tramos que acaban en
+    ';', '{' o '}', que es lo más lejos que mira atrás o adelante cada regla.
+    """
+    facts = [], [], [], [], set()
+    segment = []
+    for tok in tokens:
+        segment.append(tok)
+        if tok in (';', '{', '}'):
+            _segment_facts(segment, *facts)
+            segment = []
+    _segment_facts(segment, *facts)
+    namespaces, usings, global_usings, types, refs = facts
+    refs.difference_update(types)
+    return {"namespaces": sorted(set(namespaces)), "usings": sorted(set(usings)),
+            "global_usings": sorted(set(global_usings)), "types": sorted(set(types)), "refs": sorted(refs)}
+
+
+def _segment_facts(tokens, namespaces, usings, global_usings, types, refs):
+    """Acumula los datos de file_facts de un tramo; el tramo anterior acaba en ';', '{' o '}'"""
+    n = len(tokens)
+    i = 0
+    while i < n:
+        tok = tokens[i]
+        if tok == 'namespace':
+            name, i = _dotted_name(tokens, i + 1)  # Sus partes no son referencias a tipos
+            if name:
+                namespaces.append(name)
+            continue
+        if tok == 'using' and (i == 0 or tokens[i - 1] in ('global', ']')):
+            # "using A.B;" (no alias, static, using de recursos ni declaración using var)
+            name, end = _dotted_name(tokens, i + 1)
+            if name and tokens[end:end + 1] == [';'] and tokens[i + 1] not in ('static', 'var'):
+                (global_usings if i and tokens[i - 1] == 'global' else usings).append(name)
+                i = end
+                continue
+        elif tok in TYPE_KEYWORDS and i + 1 < n and _IDENTIFIER_RE.match(tokens[i + 1]):
+            if tokens[i + 1] not in TYPE_KEYWORDS and (i == 0 or tokens[i - 1] not in (':', ',')):
+                types.append(tokens[i + 1].lstrip('@'))  # No cuenta "where T : class"
+        elif tok[:1].isupper() and _IDENTIFIER_RE.match(tok):
+            refs.add(tok)
+        i += 1
+
+
+def member_boundaries(text):
+    """Posiciones (justo tras un salto de línea) donde termina un miembro o un tipo.
+
+    Son los puntos seguros para partir un archivo demasiado grande sin cortar un método.
+    """
+    cuts = []
+    depth = 0
+    member_depth = 1  # Profundidad de los miembros: 2 dentro de un namespace con bloque
+    namespace_pending = False
+    pending = False
+    pos = 0
+    n = len(text)
+    match = _TOKEN_RE.match
+    while pos < n:
+        m = match(text, pos)
+        kind = m.lastgroup
+        if kind == 'str':
+            pos = _skip_string(text, pos)
+            continue
+        tok = m.group()
+        if kind == 'ws':
+            if pending and '\n' in tok:
+                cuts.append(pos + tok.index('\n') + 1)
+                pending = False
+        elif tok == 'namespace':
+            namespace_pending = True
+        elif tok == '{':
+            if namespace_pending:
+                member_depth = 2
+                namespace_pending = False
+            depth += 1
+        elif tok == '}':
+            depth -= 1
+            pending = pending or depth <= member_depth
+        elif tok == ';':
+            namespace_pending = False
+            pending = pending or depth <= member_depth
+        pos = m.end()
+    return cuts
+
+
+# Lo único que declaration_spans necesita ver: llaves, ';' y lo que puede contenerlos sin contar
+_SPAN_RE = re.compile(r"""
+    (?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))
+  | (?P<pp>\#[^\n]*)
+  | (?P<str>[$@]*")
+  | (?P<chr>'(?:\\.|[^'\\\n])*')
+  | (?P<mark>[{};])
+""", re.VERBOSE | re.DOTALL)
+
+
+def declaration_spans(text):
+    """Tramos (inicio, fin, ámbito) en que se parte un archivo, uno por declaración.
+
+    Como member_boundaries pero a cualquier profundidad de tipos anidados: cada tramo acaba
+    tras la línea que cierra un miembro, un tipo o una sentencia de nivel superior, e incluye
+    los comentarios y atributos que lo preceden. `ámbito` es el namespace y los tipos que
+    contienen la declaración ("A.B.Tipo"), o "" fuera de ellos. Solo se tokenizan las
+    cabeceras de declaración; los cuerpos se saltan de llave en llave.
+    """
+    spans = []
+    scopes = []  # Por cada '{' abierta: nombre del namespace o tipo ('' si no se reconoce), None si es un cuerpo
+    file_namespace = []  # "namespace A.B;" de archivo
+    header_start = 0  # Inicio de la declaración en curso (tras la última llave o ';')
+    start = 0
+    scope = ''
+    pending = None  # Posición tras el cierre de una declaración, hasta cortar en el siguiente salto de línea
+    pos = 0
+    n = len(text)
+    search = _SPAN_RE.search
+    while True:
+        m = search(text, pos)
+        end = m.start() if m else n
+        if pending is not None:
+            newline = text.find('\n', pending, end)
+            if newline >= 0:
+                spans.append((start, newline + 1, scope))
+                start = newline + 1
+                pending = None
+        if m is None:
+            break
+        kind = m.lastgroup
+        if kind == 'str':
+            pos = _skip_string(text, m.start())
+            continue
+        pos = m.end()
+        if kind != 'mark':
+            continue
+        tok = m.group()
+        declaring = None not in scopes
+        if tok == '{':
+            name = None
+            if declaring:
+                decl = _strip_attributes(tokenize(text[header_start:m.start()]))
+                keyword = _type_keyword(decl)
+                if decl[:1] == ['namespace']:
+                    name = _dotted_name(decl, 1)[0]
+                elif keyword:
+                    rest = [t for t in decl[decl.index(keyword) + 1:] if t not in TYPE_KEYWORDS]
+                    name = rest[0].lstrip('@') if rest and _IDENTIFIER_RE.match(rest[0]) else ''
+            scopes.append(name)
+        elif tok == '}' or declaring:
+            if tok == '}':
+                if scopes:
+                    scopes.pop()
+            elif 'namespace' in text[header_start:m.start()]:
+                decl = _strip_attributes(tokenize(text[header_start:m.start()]))
+                if decl[:1] == ['namespace']:
+                    file_namespace = [_dotted_name(decl, 1)[0]]
+            if None not in scopes:
+                pending = pos
+                scope = '.'.join(filter(None, file_namespace + scopes))
+        header_start = pos
+    if start < n:
+        spans.append((start, n, scope))
+    return spans
+
+
+_PROJECT_REFERENCE_RE = re.compile(r'<ProjectReference\s[^>]*?Include\s*=\s*"([^"]+)"', re.IGNORECASE)
+
+
+def project_facts(text):
+    """Datos de un .csproj para el grafo: rutas de sus ProjectReference tal como aparecen"""
+    return {"project_refs": _PROJECT_REFERENCE_RE.findall(text)}
+
+
+def outline(text, tokens=None):
+    """Estructura de un archivo C#: usings, namespaces, tipos y firmas visibles, sin cuerpos"""
+    lines = _Outliner(tokenize(text) if tokens is None else tokens).run()
+    if not lines:
+        return NO_DECLARATIONS
+    return '\n'.join(lines) + '\n'
+
+
+def outline_lines(lines):
+    """Como outline a partir de las líneas del archivo (ver iter_tokens)"""
+    return outline(None, list(iter_tokens(lines)))
@@ -0,0 +1,221 @@
+"""Grafo de dependencias entre los archivos .cs de la solución.
+
+Un archivo A depende de B si A nombra un tipo que B declara y ese tipo es visible
+desde A: el namespace de B es el de A (o un padre), está en sus usings o en los
+`global using` de su proyecto, y el proyecto de B es el de A o uno alcanzable por
+sus ProjectReference. Los datos por archivo (csharp.file_facts) se calculan al
+construir el grafo la primera vez y se guardan en el índice del escaneo, así que
+después no se releen archivos sin cambios (escanear sin grafo no los calcula);
+actualizar un archivo solo invalida las aristas afectadas.
+"""
+import collections
+import os
+
+from .roots import index_roots
+from .scanner import FACTS, walk_source_files
+
+
+def _parents(namespace):
+    """"A.B.C" -> ["A.B.C", "A.B", "A"]"""
+    parts = namespace.split('.')
+    return ['.'.join(parts[:i]) for i in range(len(parts), 0, -1)]
+
+
+class DependencyGraph:
+    def __init__(self):
+        self.facts = {}  # ruta .cs -> file_facts
+        self.declarers = {}  # nombre de tipo -> {rutas que lo declaran}
+        self.projects = {}  # ruta .csproj -> {rutas .csproj referenciadas}
+        self.project_dirs = {}  # directorio -> ruta .csproj que contiene
+        self._edges = {}  # ruta -> frozenset de dependencias (caché)
+        self._reverse = None  # ruta -> {dependientes} (caché, se rehace tras cambios)
+        self._project_of = {}  # directorio -> .csproj o None (caché)
+        self._reach = {}  # .csproj -> proyectos alcanzables (caché)
+        self._global_usings = None  # .csproj o None -> {namespaces} (caché)
+
+    def _invalidate(self, path=None):
+        """Descarta aristas cacheadas: las de `path`, o todas si cambió algo que afecta a otros"""
+        if path is None:
+            self._edges.clear()
+        else:
+            self._edges.pop(path, None)
+        self._reverse = None
+
+    def _invalidate_projects(self):
+        self._project_of.clear()
+        self._reach.clear()
+        self._global_usings = None
+        self._invalidate()
+
+    def set_project(self, csproj, project_refs):
+        """Registra (o actualiza) un .csproj con los Include de sus ProjectReference"""
+        base = os.path.dirname(csproj)
+        refs = {os.path.normpath(os.path.join(base, ref.replace('\\', os.sep).replace('/', os.sep)))
+                for ref in project_refs}
+        if self.projects.get(csproj) == refs:
+            return
+        self.projects[csproj] = refs
+        self.project_dirs[base] = csproj
+        self._invalidate_projects()
+
+    def remove_project(self, csproj):
+        if self.projects.pop(csproj, None) is not None:
+            self.project_dirs.pop(os.path.dirname(csproj), None)
+            self._invalidate_projects()
+
+    def set_file(self, path, facts):
+        """Registra (o actualiza) los datos de un archivo .cs"""
+        old = self.facts.get(path)
+        if old == facts:
+            return
+        self._forget_types(path, old)
+        self.facts[path] = facts
+        for name in facts["types"]:
+            self.declarers.setdefault(name, set()).add(path)
+        if old is None or any(old[k] != facts[k] for k in ("types", "namespaces", "global_usings")):
+            # Cambia lo que otros archivos pueden ver: rehacer todas las aristas
+            self._global_usings = None
+            self._invalidate()
+        else:
+            self._invalidate(path)
+
+    def remove_file(self, path):
+        old = self.facts.pop(path, None)
+        if old is None:
+            return
+        self._forget_types(path, old)
+        self._global_usings = None
+        self._invalidate()
+
+    def _forget_types(self, path, facts):
+        if facts is None:
+            return
+        for name in facts["types"]:
+            paths = self.declarers.get(name)
+            if paths is not None:
+                paths.discard(path)
+                if not paths:
+                    del self.declarers[name]
+
+    def project_of(self, path):
+        """.csproj del directorio más cercano que contiene a `path`, o None"""
+        directory = os.path.dirname(path)
+        if directory in self._project_of:
+            return self._project_of[directory]
+        project = self.project_dirs.get(directory)
+        if project is None and directory:
+            project = self.project_of(directory)
+        self._project_of[directory] = project
+        return project
+
+    def reachable_projects(self, project):
+        """Proyectos visibles desde `project` (él mismo y sus referencias transitivas)"""
+        reach = self._reach.get(project)
+        if reach is None:
+            reach = {project}
+            pending = [project]
+            while pending:
+                for ref in self.projects.get(pending.pop(), ()):
+                    if ref not in reach:
+                        reach.add(ref)
+                        pending.append(ref)
+            self._reach[project] = reach
+        return reach
+
+    def global_usings(self, project):
+        if self._global_usings is None:
+            self._global_usings = collections.defaultdict(set)
+            for path, facts in self.facts.items():
+                if facts["global_usings"]:
+                    self._global_usings[self.project_of(path)].update(facts["global_usings"])
+        return self._global_usings.get(project, ())
+
+    def dependencies(self, path):
+        """Archivos de los que depende `path` (aristas salientes)"""
+        edges = self._edges.get(path)
+        if edges is not None:
+            return edges
+        facts = self.facts.get(path)
+        if facts is None:
+            return frozenset()
+        project = self.project_of(path)
+        visible = set(facts["usings"]) | set(self.global_usings(project))
+        for namespace in facts["namespaces"]:
+            visible.update(_parents(namespace))
+        reach = self.reachable_projects(project) if project is not None else None
+
+        result = set()
+        for name in facts["refs"]:
+            for other in self.declarers.get(name, ()):
+                if other == path:
+                    continue
+                namespaces = self.facts[other]["namespaces"]
+                if namespaces and not visible.intersection(namespaces):
+                    continue
+                if reach is not None:
+                    other_project = self.project_of(other)
+                    if other_project is not None and other_project not in reach:
+                        continue
+                result.add(other)
+        edges = self._edges[path] = frozenset(result)
+        return edges
+
+    def dependents(self, path):
+        """Archivos que dependen de `path` (aristas entrantes)"""
+        if self._reverse is None:
+            self._reverse = collections.defaultdict(set)
+            for source in self.facts:
+                for target in self.dependencies(source):
+                    self._reverse[target].add(source)
+        return self._reverse.get(path, set())
+
+    def closure(self, seeds, depth=None, reverse=False):
+        """{ruta: distancia} de todo lo alcanzable desde `seeds` (BFS), hasta `depth` saltos.
+
+        Por defecto sigue dependencias; con `reverse`, dependientes.
+        """
+        step = self.dependents if reverse else self.dependencies
+        distances = {seed: 0 for seed in seeds}
+        queue = collections.deque(distances)
+        while queue:
+            path = queue.popleft()
+            distance = distances[path]
+            if depth is not None and distance >= depth:
+                continue
+            for other in step(path):
+                if other not in distances:
+                    distances[other] = distance + 1
+                    queue.append(other)
+        return distances
+
+
+def build_graph(files, index, root_dir, path_filter=None, executor=None):
+    """Grafo de los .cs de `files` con los proyectos de root_dir, usando los datos del índice.
+
+    Los .csproj se buscan aunque el escaneo no los incluya; se indexan como cualquier archivo.
+    `path_filter` (ignore.PathFilter) poda el recorrido; su INCLUDE no se aplica a los .csproj.
+    Con un roots.MultiIndex se recorre cada raíz con su filtro y root_dir no se usa.
+    Los datos que falten en el índice se calculan antes (en `executor` si se indica).
+    """
+    graph = DependencyGraph()
+    projects = []
+    for root in index_roots(index, root_dir, path_filter):
+        for entry, st in walk_source_files(root.path, ['.csproj'], root.path_filter.without_include()):
+            rel_path = root.prefixed(os.path.relpath(entry.path, root.path))
+            try:
+                index.scan_file(rel_path, entry.path, st)
+            except OSError:
+                continue
+            projects.append(rel_path)
+    sources = [f['path'] for f in files if f['path'].endswith('.cs')]
+    index.derive(projects + sources, (FACTS,), executor)
+    for rel_path in projects:
+        facts = index.facts(rel_path)
+        if facts is not None:
+            graph.set_project(rel_path, facts["project_refs"])
+    for path in sources:
+        facts = index.facts(path)
+        if facts is not None:
+            graph.set_file(path, facts)
+    index.flush()
+    return graph
@@ -0,0 +1,1057 @@
+import bisect
+import os
+import queue
+import threading
+import time
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox, scrolledtext, simpledialog
+
+from .blocks import BlockCache
+from .changes import LAST_RUN
+from .config import (BG_COLOR, BLOCK_CACHE, DEFAULT_TOKEN_BUDGET, MINIFY, OUTPUT_FILE, POOL, QUERY_TOP_K,
+                     WATCH_INTERVAL, WORKERS)
+from .core import render_changes, render_query, select_files
+from .graph import build_graph
+from .minify import BODIES, COMMENTS, DOCS, WHITESPACE
+from .model import ROOT_FOLDER, SelectionModel, folder_of
+from .output import open_output
+from .parallel import make_executor
+from .profiles import delete_profile, get_profile, load_profiles, manifest_files, store_profile
+from .profiling import NullProfiler, Profiler, activate, current as current_profiler
+from .prompts import PROMPTS
+from .render import render_context
+from .roots import iter_scan_roots, make_roots, roots_index, split_path
+from .shards import render_sharded
+from .scanner import MINIFIED, STRUCTURE, derive_files, file_entry, scan_extensions
+from .tokens import fit_to_budget, header_tokens
+from .watch import ADDED, MODIFIED, REMOVED, InotifyWatcher, make_watcher
+
+SCAN_POLL_MS = 50  # Cada cuánto la interfaz recoge resultados del hilo de escaneo
+SCAN_BATCH = 256  # Archivos por lote enviado desde el hilo de escaneo
+MAX_BATCHES_PER_POLL = 20  # Lotes aplicados por ciclo, para no bloquear el bucle de Tk
+
+
+# Opciones del selector de minificado (niveles acumulativos de minify.LEVELS)
+MINIFY_CHOICES = {
+    "Sin minificar": None,
+    "Sin docs ///": DOCS,
+    "Sin comentarios": COMMENTS,
+    "Espacios compactos": WHITESPACE,
+    "Cuerpos largos resumidos": BODIES,
+}
+
+
+class ContextApp:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("Generador de Contexto IA - Estratégico")
+        
+        style = ttk.Style()
+        style.theme_use('clam')
+        style.configure("White.TFrame", background=BG_COLOR)
+        style.configure("Bold.TLabel", font=('Segoe UI', 9, 'bold'))
+        style.configure("TCheckbutton", background=BG_COLOR)
+        style.configure("Treeview", background=BG_COLOR, fieldbackground=BG_COLOR, rowheight=20)
+        style.configure("Accent.TButton", font=('Segoe UI', 10, 'bold'), foreground="black")
+
+        # Variables para los modos
+        self.include_csproj = tk.BooleanVar(value=False)
+        self.structure_only = tk.BooleanVar(value=False)
+        self.select_all_var = tk.BooleanVar(value=True)  # Para checkbox de selección
+        self.workers = tk.IntVar(value=WORKERS)  # Hilos de lectura/renderizado
+        self.token_budget = tk.IntVar(value=DEFAULT_TOKEN_BUDGET)
+        self.watch_enabled = tk.BooleanVar(value=False)
+        self.changes_only = tk.BooleanVar(value=False)
+        self.changes_since = tk.StringVar(value=LAST_RUN)  # 'last' o un ref de git
+        self.changes_as_diff = tk.BooleanVar(value=False)
+        self.seed = tk.StringVar(value="")  # Rutas o globs separados por ';'
+        self.seed_depth = tk.IntVar(value=0)  # 0 = sin límite
+        self.query = tk.StringVar(value="")  # Pregunta: genera solo los fragmentos relevantes (retrieval.py)
+        self.minify_choice = tk.StringVar(value=next(k for k, v in MINIFY_CHOICES.items() if v == MINIFY))
+        self.sharded = tk.BooleanVar(value=False)
+        self.shard_tokens = tk.IntVar(value=DEFAULT_TOKEN_BUDGET)  # Tope de tokens por parte
+        self.profiling = tk.BooleanVar(value=False)  # Panel de depuración: registrar tiempos
+        self.profile_cprofile = tk.BooleanVar(value=False)
+        self.selection_profile = tk.StringVar(value="")  # Perfil de selección elegido (profiles.py)
+
+        self.index = None  # Se carga en el hilo de escaneo para no retrasar la ventana
+        self.roots = make_roots()  # ROOT_DIR o las ROOTS de config, con sus filtros (ignore.PathFilter)
+        self.model = SelectionModel()
+        self.previous_model = SelectionModel()  # Selección a conservar durante un reescaneo
+        self.folder_expanded = set()  # Carpetas abiertas en el árbol
+        self.populated = set()  # Carpetas cuyas filas de archivo ya existen en el árbol
+        self.folder_order = []  # Claves de orden de las carpetas ya insertadas en el árbol
+        self.graph = None  # Grafo de dependencias; se construye al pedir una semilla
+
+        # Escaneo en segundo plano
+        self.scan_thread = None
+        self.scan_queue = None
+        self.scan_cancel = None
+        self.deriving = False  # El hilo de escaneo solo calcula columnas derivadas (ver derive_costs)
+
+        # Modo vigilancia: un hilo detecta cambios y la interfaz los aplica sin reescanear
+        self.watch_thread = None
+        self.watch_queue = None
+        self.watch_stop = None
+
+        self.debug_window = None
+        self.debug_text = None
+
+        self.create_ui()
+        self.refresh_profile_choices()
+        # Escaneo inicial (en segundo plano: la ventana responde de inmediato)
+        self.refresh_file_list()
+        self.root.after(10, self.adjust_window_size)
+
+    def read_workers(self):
+        """Valor del spinbox de hilos (1 si no es numérico)"""
+        try:
+            return self.workers.get()
+        except tk.TclError:
+            return 1
+
+    def make_executor(self):
+        """Pool según el spinbox de hilos (None = secuencial)"""
+        return make_executor(self.read_workers(), POOL)
+
+    def root_args(self):
+        """(root_dir, path_filter) para el grafo y los cambios, como en core.generate_context: los
+        de la raíz única; con varias raíces el MultiIndex aporta las suyas (ver roots.index_roots)"""
+        root = self.roots[0]
+        return root.path, root.path_filter
+
+    def create_ui(self):
+        main_frame = ttk.Frame(self.root, padding="15")
+        main_frame.pack(fill='both', expand=True)
+
+        # 1. SELECTOR
+        lbl_mode = ttk.Label(main_frame, text="Estrategia de Prompt:", style="Bold.TLabel")
+        lbl_mode.pack(anchor='w', pady=(0, 2))
+        
+        self.combo_mode = ttk.Combobox(main_frame, values=list(PROMPTS.keys()), state="readonly")
+        self.combo_mode.current(0)
+        self.combo_mode.pack(fill='x', pady=(0, 10))
+        self.combo_mode.bind("<<ComboboxSelected>>", self.on_mode_change)
+
+        # 2. EDITOR
+        self.txt_prompt = scrolledtext.ScrolledText(main_frame, height=5, font=('Consolas', 9), borderwidth=1, relief="solid")
+        self.txt_prompt.pack(fill='x', pady=(0, 10))
+        self.txt_prompt.insert(tk.END, PROMPTS[self.combo_mode.get()])
+
+        # 3. TOOLBAR
+        toolbar = ttk.Frame(main_frame)
+        toolbar.pack(fill='x', pady=(0, 5))
+        
+        # Checkbox de selección todo/nada
+        ttk.Checkbutton(
+            toolbar, 
+            text="Seleccionar todo",
+            variable=self.select_all_var,
+            command=self.toggle_select_all
+        ).pack(side='left', padx=(0, 10))
+        
+        # Botón expandir/colapsar todo
+        self.btn_expand = ttk.Button(
+            toolbar, 
+            text="▼ Expandir todo",
+            command=self.expand_collapse_all,
+            width=15
+        )
+        self.btn_expand.pack(side='left', padx=(0, 10))
+        
+        # --- CHECKBOXES DE MODO ---
+        ttk.Checkbutton(
+            toolbar, 
+            text="Incluir .csproj", 
+            variable=self.include_csproj, 
+            command=self.refresh_file_list
+        ).pack(side='left', padx=(10, 5))
+        
+        self.chk_structure = ttk.Checkbutton(
+            toolbar, 
+            text="Solo Estructura (Firmas)", 
+            variable=self.structure_only, 
+            command=self.on_cost_mode_change  # No recarga lista, solo afecta output y tokens
+        )
+        self.chk_structure.pack(side='left', padx=(5, 5))
+
+        ttk.Label(toolbar, text="Minificar:").pack(side='left', padx=(5, 2))
+        self.combo_minify = ttk.Combobox(toolbar, values=list(MINIFY_CHOICES), textvariable=self.minify_choice,
+                                         state="readonly", width=22)
+        self.combo_minify.pack(side='left', padx=(0, 5))
+        self.combo_minify.bind("<<ComboboxSelected>>", lambda e: self.on_cost_mode_change())
+
+        ttk.Label(toolbar, text="Hilos:").pack(side='left', padx=(5, 2))
+        ttk.Spinbox(toolbar, from_=1, to=64, width=3, textvariable=self.workers).pack(side='left')
+
+        ttk.Checkbutton(
+            toolbar,
+            text="Vigilar cambios",
+            variable=self.watch_enabled,
+            command=self.toggle_watch
+        ).pack(side='left', padx=(10, 5))
+        # ----------------------
+
+        self.lbl_stats = ttk.Label(toolbar, text="...", foreground="#0055cc")
+        self.lbl_stats.pack(side='right')
+
+        # Presupuesto de tokens
+        budget_bar = ttk.Frame(main_frame)
+        budget_bar.pack(fill='x', pady=(0, 5))
+        ttk.Label(budget_bar, text="Presupuesto (tokens):").pack(side='left', padx=(0, 5))
+        ttk.Entry(budget_bar, textvariable=self.token_budget, width=10).pack(side='left')
+        ttk.Button(
+            budget_bar,
+            text="Ajustar selección",
+            command=self.fit_selection_to_budget
+        ).pack(side='left', padx=(5, 0))
+
+        # Solo cambios: de la selección, lo modificado desde la última generación o un ref de git
+        ttk.Checkbutton(budget_bar, text="Solo cambios desde:", variable=self.changes_only).pack(side='left', padx=(20, 5))
+        ttk.Entry(budget_bar, textvariable=self.changes_since, width=12).pack(side='left')
+        ttk.Checkbutton(budget_bar, text="Como diff", variable=self.changes_as_diff).pack(side='left', padx=(5, 0))
+
+        # Salida por partes acotadas en tokens
+        ttk.Checkbutton(budget_bar, text="Dividir en partes de", variable=self.sharded).pack(side='left', padx=(20, 5))
+        ttk.Entry(budget_bar, textvariable=self.shard_tokens, width=10).pack(side='left')
+        ttk.Label(budget_bar, text="tokens").pack(side='left', padx=(2, 0))
+
+        # Selección por dependencias a partir de una semilla
+        seed_bar = ttk.Frame(main_frame)
+        seed_bar.pack(fill='x', pady=(0, 5))
+        ttk.Label(seed_bar, text="Semilla:").pack(side='left', padx=(0, 5))
+        ttk.Entry(seed_bar, textvariable=self.seed, width=40).pack(side='left', fill='x', expand=True)
+        ttk.Label(seed_bar, text="Profundidad:").pack(side='left', padx=(5, 2))
+        ttk.Spinbox(seed_bar, from_=0, to=99, width=3, textvariable=self.seed_depth).pack(side='left')
+        ttk.Button(
+            seed_bar,
+            text="Seleccionar dependencias",
+            command=self.select_seed_closure
+        ).pack(side='left', padx=(5, 0))
+
+        # Consulta: de la selección, solo los fragmentos relevantes para una pregunta
+        query_bar = ttk.Frame(main_frame)
+        query_bar.pack(fill='x', pady=(0, 5))
+        ttk.Label(query_bar, text="Consulta:").pack(side='left', padx=(0, 5))
+        ttk.Entry(query_bar, textvariable=self.query, width=40).pack(side='left', fill='x', expand=True)
+
+        # Perfiles de selección guardados
+        profile_bar = ttk.Frame(main_frame)
+        profile_bar.pack(fill='x', pady=(0, 5))
+        ttk.Label(profile_bar, text="Perfil de selección:").pack(side='left', padx=(0, 5))
+        self.combo_profile = ttk.Combobox(profile_bar, textvariable=self.selection_profile, state="readonly", width=30)
+        self.combo_profile.pack(side='left')
+        ttk.Button(profile_bar, text="Aplicar", command=self.apply_selection_profile).pack(side='left', padx=(5, 0))
+        ttk.Button(profile_bar, text="Guardar selección como…",
+                   command=self.save_selection).pack(side='left', padx=(5, 0))
+        ttk.Button(profile_bar, text="Borrar", command=self.delete_selection_profile).pack(side='left', padx=(5, 0))
+
+        # 4. BOTÓN
+        btn_gen = ttk.Button(main_frame, text="GENERAR CONTEXTO", command=self.generate_file, style="Accent.TButton")
+        btn_gen.pack(side='bottom', fill='x', pady=(10, 0), ipady=5)
+
+        # Progreso del escaneo
+        status_bar = ttk.Frame(main_frame)
+        status_bar.pack(side='bottom', fill='x')
+        self.progress = ttk.Progressbar(status_bar, mode='indeterminate', length=120)
+        self.progress.pack(side='left', padx=(0, 5))
+        self.lbl_progress = ttk.Label(status_bar, text="")
+        self.lbl_progress.pack(side='left')
+        self.btn_cancel = ttk.Button(status_bar, text="Cancelar", command=self.cancel_scan, state='disabled')
+        self.btn_cancel.pack(side='right')
+        ttk.Button(status_bar, text="Depuración", command=self.open_debug_panel).pack(side='right', padx=(0, 5))
+
+        # 5. LISTA
+        list_frame = tk.LabelFrame(main_frame, text=" Archivos ", bg=BG_COLOR, padx=5, pady=5)
+        list_frame.pack(side='top', fill='both', expand=True, pady=5)
+
+        # Árbol virtualizado: las filas de archivo se crean solo al abrir su carpeta
+        self.tree = ttk.Treeview(list_frame, columns=("lines", "kb", "tokens"), selectmode='browse')
+        self.tree.heading("#0", text="Archivo", anchor='w')
+        self.tree.heading("lines", text="Líneas")
+        self.tree.heading("kb", text="KB")
+        self.tree.heading("tokens", text="Tokens")
+        self.tree.column("#0", stretch=True, width=460)
+        for col in ("lines", "kb", "tokens"):
+            self.tree.column(col, stretch=False, width=80, anchor='e')
+        self.v_scroll = ttk.Scrollbar(list_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.v_scroll.set)
+        self.v_scroll.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+
+        self.tree.tag_configure("folder", font=('Segoe UI', 9, 'bold'))
+        self.tree.bind("<<TreeviewOpen>>", self.on_tree_open)
+        self.tree.bind("<<TreeviewClose>>", self.on_tree_close)
+        self.tree.bind("<Button-1>", self.on_tree_click)
+        self.tree.bind("<space>", self.on_tree_space)
+
+    def refresh_file_list(self):
+        """Reescanea en segundo plano; las carpetas aparecen en el árbol a medida que se descubren"""
+        self.stop_watch()
+        self.stop_scan()
+        self.graph = None
+        self.previous_model = self.model
+        self.model = SelectionModel()
+        self.tree.delete(*self.tree.get_children())
+        self.populated.clear()
+        self.folder_order = []
+
+        self.scan_cancel = threading.Event()
+        self.scan_queue = queue.Queue()
+        self.scan_thread = threading.Thread(
+            target=self.scan_worker,
+            args=(self.scan_queue, self.scan_cancel, self.include_csproj.get(), self.read_workers(),
+                  self.cost_columns()),
+            daemon=True)
+        self.scan_thread.start()
+
+        self.progress.start(10)
+        self.btn_cancel.config(state='normal')
+        self.lbl_progress.config(text="Escaneando…")
+        self.root.after(SCAN_POLL_MS, self.poll_scan, self.scan_queue)
+
+    def scan_worker(self, out, cancel, include_csproj, workers, derived):
+        """Hilo de escaneo: no toca Tk, solo envía lotes de archivos por la cola.
+
+        Al terminar calcula las columnas `derived` que pide el modo elegido (ver cost_columns)
+        y envía los archivos que cambiaron.
+        """
+        try:
+            if self.index is None:
+                self.index = roots_index(self.roots)
+            executor = make_executor(workers, POOL)
+            try:
+                scanned = []
+                batch = []
+                last_sent = time.monotonic()
+                with current_profiler().phase('scan'):
+                    for f in iter_scan_roots(self.roots, self.index, include_csproj, executor, cancel):
+                        scanned.append(f)
+                        batch.append(f)
+                        if len(batch) >= SCAN_BATCH or time.monotonic() - last_sent >= SCAN_POLL_MS / 1000:
+                            out.put(('batch', batch))
+                            batch = []
+                            last_sent = time.monotonic()
+                if batch:
+                    out.put(('batch', batch))
+                if derived and not cancel.is_set():
+                    with current_profiler().phase('derive'):
+                        out.put(('derived', derive_files(scanned, self.index, derived, executor)))
+            finally:
+                if executor is not None:
+                    executor.shutdown()
+            out.put(('done', cancel.is_set()))
+        except Exception as e:
+            out.put(('error', str(e)))
+
+    def poll_scan(self, scan_queue):
+        """Aplica en el hilo de Tk los lotes recibidos del escaneo en curso"""
+        if scan_queue is not self.scan_queue:
+            return  # Escaneo reemplazado por otro más reciente
+        for _ in range(MAX_BATCHES_PER_POLL):
+            try:
+                kind, payload = scan_queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'batch':
+                self.add_scanned(payload)
+            elif kind == 'derived':
+                self.apply_derived(payload)
+            elif kind == 'done':
+                return self.finish_derive() if self.deriving else self.finish_scan(cancelled=payload)
+            elif self.deriving:
+                self.finish_derive()
+                return messagebox.showerror("Error", payload)
+            else:
+                self.finish_scan(cancelled=True)
+                return messagebox.showerror("Error", payload)
+        if not self.deriving:
+            self.lbl_progress.config(text=f"Escaneando… {len(self.model)} archivos")
+        self.update_stats()
+        self.root.after(SCAN_POLL_MS, self.poll_scan, scan_queue)
+
+    def add_scanned(self, batch):
+        """Añade archivos recién descubiertos al modelo y a las filas ya visibles"""
+        with current_profiler().phase('tk.add'):
+            touched = set()
+            for f in batch:
+                idx = self.model.add(f, self.previous_model.is_path_selected(f['path']))
+                folder_name = folder_of(f)
+                if len(self.model.folders[folder_name]) == 1:
+                    self.insert_folder_row(folder_name)
+                elif folder_name in self.populated:
+                    self.insert_file_row(idx)
+                touched.add(folder_name)
+            for folder_name in touched:
+                self.tree.item(self.folder_iid(folder_name), text=self.folder_text(folder_name),
+                               values=self.folder_values(folder_name))
+
+    def finish_scan(self, cancelled):
+        """Ordena el resultado final y reconstruye el árbol con el orden definitivo"""
+        self.scan_thread = None
+        self.scan_queue = None
+        self.progress.stop()
+        self.btn_cancel.config(state='disabled')
+        self.model.sort()
+        self.rebuild_tree()
+        if cancelled:
+            self.lbl_progress.config(text=f"Escaneo cancelado ({len(self.model)} archivos)")
+        else:
+            self.lbl_progress.config(text="")
+            if self.watch_enabled.get():
+                self.start_watch()
+            self.derive_costs()  # Por si el modo cambió durante el escaneo
+
+    def cancel_scan(self):
+        if self.scan_cancel is not None:
+            self.scan_cancel.set()
+
+    def stop_scan(self):
+        """Cancela el escaneo en curso y espera a que el hilo suelte el índice"""
+        thread = self.scan_thread
+        self.cancel_scan()
+        if thread is not None:
+            thread.join()
+        self.scan_thread = None
+        self.scan_queue = None
+        if self.deriving:
+            self.finish_derive()
+
+    def toggle_watch(self):
+        if not self.watch_enabled.get():
+            self.stop_watch()
+            self.lbl_progress.config(text="")
+        elif self.scan_thread is None:
+            self.start_watch()  # Si hay un escaneo en curso, finish_scan arranca la vigilancia
+
+    def start_watch(self):
+        self.stop_watch()
+        self.watch_stop = threading.Event()
+        self.watch_queue = queue.Queue()
+        self.watch_thread = threading.Thread(
+            target=self.watch_worker,
+            args=(self.watch_queue, self.watch_stop, self.include_csproj.get()),
+            daemon=True)
+        self.watch_thread.start()
+        self.root.after(SCAN_POLL_MS, self.poll_watch, self.watch_queue)
+
+    def stop_watch(self):
+        thread = self.watch_thread
+        if self.watch_stop is not None:
+            self.watch_stop.set()
+        if thread is not None:
+            thread.join()
+        self.watch_thread = None
+        self.watch_queue = None
+        self.watch_stop = None
+
+    def watch_worker(self, out, stop, include_csproj):
+        """Hilo de vigilancia: no toca Tk ni el índice, solo envía listas de cambios por la cola"""
+        watchers = []  # (raíz, vigilante); uno por raíz, con las rutas prefijadas al enviarlas
+        try:
+            for root in self.roots:
+                exts = scan_extensions(include_csproj, root.extensions)
+                watchers.append((root, make_watcher(root.path, exts, root.path_filter)))
+            kinds = {"inotify" if isinstance(watcher, InotifyWatcher) else "sondeo" for _, watcher in watchers}
+            out.put(('ready', "/".join(sorted(kinds))))
+            while not stop.wait(WATCH_INTERVAL):
+                changes = [(kind, root.prefixed(rel_path))
+                           for root, watcher in watchers for kind, rel_path in watcher.poll()]
+                if changes:
+                    out.put(('changes', changes))
+        except OSError as e:
+            out.put(('error', str(e)))
+        finally:
+            for _, watcher in watchers:
+                watcher.close()
+
+    def poll_watch(self, watch_queue):
+        if watch_queue is not self.watch_queue:
+            return  # Vigilancia detenida o reiniciada
+        while not self.deriving:  # Mientras otro hilo usa el índice, los cambios esperan en la cola
+            try:
+                kind, payload = watch_queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'changes':
+                self.apply_changes(payload)
+            elif kind == 'ready':
+                self.lbl_progress.config(text=f"Vigilando cambios ({payload})")
+            else:
+                self.watch_enabled.set(False)
+                self.stop_watch()
+                return messagebox.showerror("Error", payload)
+        self.root.after(SCAN_POLL_MS, self.poll_watch, watch_queue)
+
+    def apply_changes(self, changes):
+        """Aplica altas, bajas y modificaciones al modelo, al índice y solo a las filas afectadas"""
+        touched = set()
+        counts = {ADDED: 0, MODIFIED: 0, REMOVED: 0}
+        for kind, rel_path in changes:
+            if kind == REMOVED:
+                folder_name = self.remove_file(rel_path)
+            else:
+                folder_name = self.update_file(rel_path)
+            if folder_name is not None:
+                touched.add(folder_name)
+                counts[kind] += 1
+        self.index.flush()
+        if self.graph is not None:
+            for kind, rel_path in changes:
+                facts = self.index.facts(rel_path) if kind != REMOVED else None
+                if rel_path.endswith('.cs'):
+                    if facts is None:
+                        self.graph.remove_file(rel_path)
+                    else:
+                        self.graph.set_file(rel_path, facts)
+                elif rel_path.endswith('.csproj'):
+                    if facts is None:
+                        self.graph.remove_project(rel_path)
+                    else:
+                        self.graph.set_project(rel_path, facts["project_refs"])
+
+        for folder_name in touched:
+            if folder_name in self.model.folders:
+                self.tree.item(self.folder_iid(folder_name), text=self.folder_text(folder_name),
+                               values=self.folder_values(folder_name))
+        if len(self.model) == 0 and not self.tree.exists("empty"):
+            self.tree.insert("", 'end', iid="empty", text="No se encontraron archivos.")
+        self.update_stats()
+        self.lbl_progress.config(text=f"Cambios: +{counts[ADDED]} ~{counts[MODIFIED]} -{counts[REMOVED]} "
+                                      f"({time.strftime('%H:%M:%S')})")
+
+    def update_file(self, rel_path):
+        """Relee un archivo nuevo o modificado; devuelve su carpeta, o None si ya no se puede leer"""
+        root, root_path = split_path(self.roots, rel_path)
+        full_path = os.path.join(root.path, root_path)
+        try:
+            st = os.stat(full_path)
+            f = file_entry(rel_path, full_path, st, self.index.scan_file(rel_path, full_path, st))
+        except OSError:
+            return None
+        if self.cost_columns():
+            derive_files([f], self.index, self.cost_columns())
+        folder_name = folder_of(f)
+        idx = self.model.index_of.get(rel_path)
+        if idx is not None:
+            self.model.replace(idx, f)
+            if self.tree.exists(self.file_iid(idx)):
+                self.tree.item(self.file_iid(idx), values=(f['lines'], f['kb'], f['tokens']))
+            return folder_name
+
+        idx = self.model.add(f, True)
+        # Mantener la carpeta ordenada por nombre, igual que tras un escaneo
+        indices = self.model.folders[folder_name]
+        indices.pop()
+        position = sum(1 for i in indices if self.model.name(i) < f['name'])
+        indices.insert(position, idx)
+        if self.tree.exists("empty"):
+            self.tree.delete("empty")
+        if len(indices) == 1:
+            self.insert_folder_row(folder_name)
+        elif folder_name in self.populated:
+            self.insert_file_row(idx, position)
+        return folder_name
+
+    def remove_file(self, rel_path):
+        """Quita un archivo borrado; devuelve su carpeta, o None si no estaba en la lista"""
+        idx = self.model.index_of.get(rel_path)
+        self.index.discard(rel_path)
+        if idx is None:
+            return None
+        folder_name = self.model.folder(idx)
+        self.model.remove(rel_path)
+        if self.tree.exists(self.file_iid(idx)):
+            self.tree.delete(self.file_iid(idx))
+        if folder_name not in self.model.folders:
+            # Carpeta vacía: desaparece del árbol
+            self.tree.delete(self.folder_iid(folder_name))
+            self.folder_order.remove((folder_name != ROOT_FOLDER, folder_name))
+            self.populated.discard(folder_name)
+        return folder_name
+
+    def rebuild_tree(self):
+        """Crea una fila por carpeta; los archivos se insertan al abrirla (ver populate_folder)"""
+        self.tree.delete(*self.tree.get_children())
+        self.populated.clear()
+        self.folder_order = []
+
+        if len(self.model) == 0:
+            self.tree.insert("", 'end', iid="empty", text="No se encontraron archivos.")
+            self.update_stats()
+            return
+
+        with current_profiler().phase('tk.rebuild'):
+            for folder_name in self.model.sorted_folders():
+                self.insert_folder_row(folder_name)
+
+        self.update_stats()
+
+    def insert_folder_row(self, folder_name):
+        """Inserta la fila de una carpeta en su posición ordenada ([ROOT] primero)"""
+        key = (folder_name != ROOT_FOLDER, folder_name)
+        position = bisect.bisect(self.folder_order, key)
+        self.folder_order.insert(position, key)
+        folder_iid = self.folder_iid(folder_name)
+        self.tree.insert("", position, iid=folder_iid, text=self.folder_text(folder_name),
+                         values=self.folder_values(folder_name), tags=("folder",))
+        if folder_name in self.folder_expanded:
+            self.populate_folder(folder_name)
+            self.tree.item(folder_iid, open=True)
+        else:
+            # Hijo ficticio para que el árbol muestre el indicador de expandir
+            self.tree.insert(folder_iid, 'end', iid=folder_iid + "|placeholder")
+
+    @staticmethod
+    def folder_iid(folder_name):
+        return "d:" + folder_name
+
+    @staticmethod
+    def file_iid(idx):
+        return f"f:{idx}"
+
+    def folder_text(self, folder_name):
+        mark = {'all': "☑", 'none': "☐", 'some': "◩"}[self.model.folder_state(folder_name)]
+        return f"{mark} {folder_name} ({len(self.model.folders[folder_name])})"
+
+    def folder_values(self, folder_name):
+        return self.model.folder_values(folder_name)
+
+    def file_text(self, idx):
+        return f"{'☑' if self.model.is_selected(idx) else '☐'} {self.model.name(idx)}"
+
+    def populate_folder(self, folder_name):
+        """Inserta las filas de archivo de una carpeta la primera vez que se abre"""
+        if folder_name in self.populated:
+            return
+        folder_iid = self.folder_iid(folder_name)
+        placeholder = folder_iid + "|placeholder"
+        if self.tree.exists(placeholder):
+            self.tree.delete(placeholder)
+        with current_profiler().phase('tk.populate'):
+            for idx in self.model.folders[folder_name]:
+                self.insert_file_row(idx)
+        self.populated.add(folder_name)
+
+    def insert_file_row(self, idx, position='end'):
+        self.tree.insert(self.folder_iid(self.model.folder(idx)), position, iid=self.file_iid(idx),
+                         text=self.file_text(idx), values=self.model.row_values(idx))
+
+    def on_tree_open(self, event):
+        iid = self.tree.focus()
+        if iid.startswith("d:"):
+            folder_name = iid[2:]
+            self.folder_expanded.add(folder_name)
+            self.populate_folder(folder_name)
+
+    def on_tree_close(self, event):
+        iid = self.tree.focus()
+        if iid.startswith("d:"):
+            self.folder_expanded.discard(iid[2:])
+
+    def on_tree_click(self, event):
+        """Clic sobre una fila: marca/desmarca; el indicador sigue expandiendo/colapsando"""
+        if self.tree.identify_region(event.x, event.y) not in ('tree', 'cell'):
+            return None
+        if 'indicator' in self.tree.identify_element(event.x, event.y):
+            return None
+        iid = self.tree.identify_row(event.y)
+        if iid:
+            self.tree.focus(iid)
+            self.tree.selection_set(iid)
+            self.toggle_item(iid)
+        return "break"
+
+    def on_tree_space(self, event):
+        iid = self.tree.focus()
+        if iid:
+            self.toggle_item(iid)
+        return "break"
+
+    def toggle_item(self, iid):
+        if iid.startswith("d:"):
+            self.toggle_folder(iid[2:])
+        elif iid.startswith("f:"):
+            self.toggle_file(int(iid[2:]))
+
+    def toggle_folder(self, folder_name):
+        """Selecciona/deselecciona todos los archivos de una carpeta"""
+        self.model.set_folder(folder_name, self.model.folder_state(folder_name) != 'all')
+        self.refresh_folder_rows(folder_name)
+        self.update_stats()
+
+    def toggle_file(self, idx):
+        """Marca/desmarca un archivo y actualiza el estado de su carpeta"""
+        self.model.set(idx, not self.model.is_selected(idx))
+        self.tree.item(self.file_iid(idx), text=self.file_text(idx))
+        self.tree.item(self.folder_iid(self.model.folder(idx)), text=self.folder_text(self.model.folder(idx)))
+        self.update_stats()
+
+    def refresh_folder_rows(self, folder_name):
+        """Redibuja la fila de la carpeta y, si ya existen, las de sus archivos"""
+        self.tree.item(self.folder_iid(folder_name), text=self.folder_text(folder_name))
+        if folder_name in self.populated:
+            for idx in self.model.folders[folder_name]:
+                self.tree.item(self.file_iid(idx), text=self.file_text(idx))
+
+    def refresh_all_rows(self):
+        for folder_name in self.model.folders:
+            self.refresh_folder_rows(folder_name)
+
+    def on_mode_change(self, event):
+        key = self.combo_mode.get()
+        self.txt_prompt.delete("1.0", tk.END)
+        self.txt_prompt.insert(tk.END, PROMPTS[key])
+
+    def adjust_window_size(self):
+        self.root.update_idletasks()
+        self.root.geometry("800x550")
+
+    def toggle_select_all(self):
+        """Toggle selección de todos los archivos según checkbox"""
+        self.model.set_all(self.select_all_var.get())
+        self.refresh_all_rows()
+        self.update_stats()
+
+    def expand_collapse_all(self):
+        """Expande o colapsa todas las carpetas"""
+        # Si hay alguna colapsada, expandir todas; sino, colapsar todas
+        new_state = any(folder not in self.folder_expanded for folder in self.model.folders)
+
+        for folder_name in self.model.folders:
+            if new_state:
+                self.folder_expanded.add(folder_name)
+                self.populate_folder(folder_name)
+            else:
+                self.folder_expanded.discard(folder_name)
+            self.tree.item(self.folder_iid(folder_name), open=new_state)
+
+        self.btn_expand.config(text="▲ Colapsar todo" if new_state else "▼ Expandir todo")
+
+    def select_all(self):
+        self.model.set_all(True)
+        self.refresh_all_rows()
+        self.update_stats()
+
+    def deselect_all(self):
+        self.model.set_all(False)
+        self.refresh_all_rows()
+        self.update_stats()
+
+    def minify_level(self):
+        return MINIFY_CHOICES[self.minify_choice.get()]
+
+    def cost_columns(self):
+        """Columnas derivadas del índice (ver scanner.DERIVED) que necesitan las estadísticas del modo elegido"""
+        if self.structure_only.get():
+            return (STRUCTURE,)
+        return (MINIFIED,) if self.minify_level() is not None else ()
+
+    def on_cost_mode_change(self):
+        self.derive_costs()
+        self.update_stats()
+
+    def derive_costs(self):
+        """Calcula en segundo plano lo que el modo elegido necesita y el índice aún no tiene (p. ej. las
+        estructuras al marcar "Solo Estructura" o los ahorros al elegir un minificado); durante un
+        escaneo lo hace finish_scan. Los resultados llegan por la cola del escaneo (ver poll_scan)."""
+        derived = self.cost_columns()
+        if not derived or self.scan_thread is not None or self.index is None:
+            return
+        self.deriving = True
+        self.chk_structure.config(state='disabled')
+        self.combo_minify.config(state='disabled')
+        self.scan_cancel = threading.Event()
+        self.scan_queue = queue.Queue()
+        self.scan_thread = threading.Thread(
+            target=self.derive_worker,
+            args=(self.scan_queue, self.model.live_files(), derived, self.read_workers()),
+            daemon=True)
+        self.scan_thread.start()
+        self.progress.start(10)
+        self.lbl_progress.config(text="Calculando tokens…")
+        self.root.after(SCAN_POLL_MS, self.poll_scan, self.scan_queue)
+
+    def derive_worker(self, out, files, derived, workers):
+        """Hilo de derive_costs: no toca Tk, envía por la cola los archivos que cambiaron"""
+        try:
+            executor = make_executor(workers, POOL)
+            try:
+                with current_profiler().phase('derive'):
+                    out.put(('derived', derive_files(files, self.index, derived, executor)))
+            finally:
+                if executor is not None:
+                    executor.shutdown()
+            out.put(('done', False))
+        except Exception as e:
+            out.put(('error', str(e)))
+
+    def finish_derive(self):
+        """Rehabilita los controles de modo al terminar derive_costs"""
+        self.deriving = False
+        self.scan_thread = None
+        self.scan_queue = None
+        self.progress.stop()
+        self.chk_structure.config(state='normal')
+        self.combo_minify.config(state='readonly')
+        self.lbl_progress.config(text="")
+        self.update_stats()
+
+    def apply_derived(self, files):
+        """Actualiza en el modelo los archivos cuyas columnas derivadas se acaban de calcular"""
+        for f in files:
+            idx = self.model.index_of.get(f['path'])
+            if idx is not None:
+                self.model.replace(idx, f)
+
+    def update_stats(self):
+        with current_profiler().phase('tk.stats'):
+            structure_only = self.structure_only.get()
+            count, total_lines, total_kb, total_tokens = self.model.stats(structure_only)
+            text = f"{count}/{len(self.model)} sel | {total_lines} líneas | {int(total_kb)} KB | ~{total_tokens} tokens"
+            level = self.minify_level()
+            if level is not None and not structure_only and total_tokens:
+                minified = self.model.stats(structure_only, level)[3]
+                text += f" → ~{minified} minificado (-{100 * (total_tokens - minified) // total_tokens}%)"
+            self.lbl_stats.config(text=text)
+
+    def fit_selection_to_budget(self):
+        """Selecciona por prioridad los archivos que caben en el presupuesto de tokens"""
+        try:
+            budget = self.token_budget.get()
+        except tk.TclError:
+            return messagebox.showwarning("!", "Presupuesto de tokens no válido.")
+        structure_only = self.structure_only.get()
+        reserved = header_tokens(self.txt_prompt.get("1.0", tk.END), len(self.model), structure_only)
+        chosen = fit_to_budget(self.model.live_files(), budget, structure_only, reserved, minify=self.minify_level())
+        self.model.select_only(f['path'] for f in chosen)
+        self.refresh_all_rows()
+        self.update_stats()
+
+    def select_seed_closure(self):
+        """Selecciona la semilla y todo aquello de lo que depende, según el grafo de dependencias"""
+        if self.scan_thread is not None:
+            return messagebox.showwarning("!", "Espera a que termine el escaneo.")
+        patterns = [p.strip() for p in self.seed.get().split(';') if p.strip()]
+        if not patterns:
+            # Sin texto: usar el archivo con el foco en el árbol
+            iid = self.tree.focus()
+            if not iid.startswith("f:"):
+                return messagebox.showwarning("!", "Escribe una semilla o marca un archivo en la lista.")
+            patterns = [self.model.path(int(iid[2:]))]
+        files = self.model.live_files()
+        seeds = [f['path'] for f in select_files(files, patterns)]
+        if not seeds:
+            return messagebox.showwarning("!", "Ninguna semilla coincide.")
+        try:
+            depth = self.seed_depth.get() or None
+        except tk.TclError:
+            depth = None
+        if self.graph is None:
+            executor = self.make_executor()
+            try:
+                self.graph = build_graph(files, self.index, *self.root_args(), executor)
+            finally:
+                if executor is not None:
+                    executor.shutdown()
+        distances = self.graph.closure(seeds, depth)
+        self.model.select_only(distances)
+        self.refresh_all_rows()
+        self.update_stats()
+        self.lbl_progress.config(text=f"Dependencias: {len(distances)} archivos, "
+                                      f"distancia máx. {max(distances.values())}")
+
+    def refresh_profile_choices(self):
+        try:
+            names = list(load_profiles())
+        except ValueError as e:
+            names = []
+            self.lbl_progress.config(text=str(e))
+        self.combo_profile.config(values=names)
+        if self.selection_profile.get() not in names:
+            self.selection_profile.set(names[0] if names else "")
+
+    def apply_selection_profile(self):
+        """Selecciona lo que indica el perfil: del manifiesto si nada cambió en disco, si no por sus patrones"""
+        if self.scan_thread is not None:
+            return messagebox.showwarning("!", "Espera a que termine el escaneo.")
+        name = self.selection_profile.get()
+        if not name:
+            return messagebox.showwarning("!", "Elige un perfil.")
+        try:
+            profile = get_profile(name)
+        except ValueError as e:
+            return messagebox.showerror("Error", str(e))
+        include_csproj = self.include_csproj.get()
+        with current_profiler().phase('selection'):
+            files = manifest_files(profile["manifest"], self.roots, include_csproj, profile["patterns"])
+        if files is None:
+            files = select_files(self.model.live_files(), profile["patterns"])
+            try:
+                store_profile(name, profile["patterns"], files, self.index, self.roots, include_csproj)
+            except OSError:
+                pass  # Sin manifiesto el próximo uso vuelve a seleccionar por patrones
+        self.model.select_only(f['path'] for f in files)
+        self.refresh_all_rows()
+        self.update_stats()
+        self.lbl_progress.config(text=f"Perfil «{name}»: {len(files)} archivos")
+
+    def save_selection(self):
+        """Guarda la selección actual como perfil (patrones compactos más su manifiesto)"""
+        if self.scan_thread is not None:
+            return messagebox.showwarning("!", "Espera a que termine el escaneo.")
+        files = self.model.selected_files()
+        if not files:
+            return messagebox.showwarning("!", "Selecciona archivos.")
+        name = simpledialog.askstring("Guardar perfil", "Nombre del perfil:", parent=self.root,
+                                      initialvalue=self.selection_profile.get())
+        if not name or not name.strip():
+            return None
+        name = name.strip()
+        try:
+            store_profile(name, self.model.selection_patterns(), files, self.index, self.roots,
+                          self.include_csproj.get())
+        except (ValueError, OSError) as e:
+            return messagebox.showerror("Error", str(e))
+        self.selection_profile.set(name)
+        self.refresh_profile_choices()
+        self.lbl_progress.config(text=f"Perfil «{name}» guardado ({len(files)} archivos)")
+
+    def delete_selection_profile(self):
+        name = self.selection_profile.get()
+        if not name or not messagebox.askyesno("Borrar perfil", f"¿Borrar el perfil «{name}»?"):
+            return
+        try:
+            delete_profile(name)
+        except (ValueError, OSError) as e:
+            return messagebox.showerror("Error", str(e))
+        self.refresh_profile_choices()
+
+    def generate_file(self):
+        if self.scan_thread is not None:
+            return messagebox.showwarning("!", "Espera a que termine el escaneo.")
+        sel = self.model.selected_files()
+        if not sel: return messagebox.showwarning("!", "Selecciona archivos.")
+        
+        is_structure_only = self.structure_only.get()
+        is_include_csproj = self.include_csproj.get()
+        
+        try:
+            prompt = self.txt_prompt.get("1.0", tk.END)
+            since = self.changes_since.get().strip() or LAST_RUN
+            query = " ".join(self.query.get().split()) or None
+            if query is not None and (self.changes_only.get() or self.sharded.get() or is_structure_only or
+                                      self.minify_level() is not None):
+                return messagebox.showwarning(
+                    "!", "La consulta no se combina con solo cambios, partes, estructura ni minificado.")
+            target = OUTPUT_FILE
+            profiler = current_profiler()
+            executor = self.make_executor()
+            try:
+                if self.changes_only.get():
+                    root_dir, path_filter = self.root_args()
+                    sel = render_changes(OUTPUT_FILE, sel, prompt, self.index, root_dir, since,
+                                         self.changes_as_diff.get(), path_filter, executor)
+                else:
+                    cache = BlockCache() if BLOCK_CACHE else None
+                    with profiler.phase('generate'):
+                        if query is not None:
+                            sel = render_query(OUTPUT_FILE, sel, self.model.live_files(), prompt, self.index, query,
+                                               self.token_budget.get(), QUERY_TOP_K, executor,
+                                               evict=not any(root.path_filter.narrows for root in self.roots))
+                        elif self.sharded.get():
+                            shards = render_sharded(OUTPUT_FILE, sel, prompt, self.index, is_structure_only,
+                                                    executor, cache, max_tokens=self.shard_tokens.get(),
+                                                    minify=self.minify_level())
+                            target = f"{shards[0]} … {shards[-1]}" if len(shards) > 1 else shards[0]
+                        else:
+                            with open_output(OUTPUT_FILE) as out:
+                                render_context(out, sel, prompt, self.index, is_structure_only, executor, cache,
+                                               minify=self.minify_level())
+            finally:
+                if executor is not None:
+                    executor.shutdown()
+            self.index.record_run(self.model.live_files())
+
+            # Mensaje según modos activos
+            msg = f"Contexto generado: {target}"
+            status_parts = []
+            if self.changes_only.get():
+                status_parts.append(f"{len(sel)} archivos, cambios desde {since}")
+            elif query is not None:
+                status_parts.append(f"fragmentos de {len(sel)} archivos para la consulta")
+            if is_include_csproj:
+                status_parts.append("con .csproj")
+            if is_structure_only:
+                status_parts.append("solo estructura")
+            elif self.minify_level() is not None and not self.changes_only.get():
+                status_parts.append(f"minificado: {self.minify_choice.get().lower()}")
+            if status_parts:
+                msg += f"\n({', '.join(status_parts)})"
+            
+            messagebox.showinfo("Listo", msg)
+            if profiler.enabled:
+                self.refresh_debug_panel()  # Midiendo: la ventana sigue abierta para revisar el resultado
+            else:
+                self.root.destroy()
+        except Exception as e: messagebox.showerror("Error", str(e))
+
+    def open_debug_panel(self):
+        """Ventana de depuración: activar la medición y ver o guardar sus resultados"""
+        if self.debug_window is not None:
+            self.debug_window.lift()
+            return self.refresh_debug_panel()
+        window = tk.Toplevel(self.root)
+        window.title("Depuración")
+        window.protocol("WM_DELETE_WINDOW", self.close_debug_panel)
+        bar = ttk.Frame(window, padding=5)
+        bar.pack(fill='x')
+        ttk.Checkbutton(bar, text="Registrar tiempos", variable=self.profiling,
+                        command=self.toggle_profiling).pack(side='left')
+        ttk.Checkbutton(bar, text="Con cProfile (hilo de la interfaz)", variable=self.profile_cprofile,
+                        command=self.toggle_profiling).pack(side='left', padx=(10, 0))
+        ttk.Button(bar, text="Guardar traza…", command=self.save_profile).pack(side='right')
+        ttk.Button(bar, text="Actualizar", command=self.refresh_debug_panel).pack(side='right', padx=(0, 5))
+        self.debug_text = scrolledtext.ScrolledText(window, font=('Consolas', 9), width=110, height=30)
+        self.debug_text.pack(fill='both', expand=True)
+        self.debug_window = window
+        self.refresh_debug_panel()
+
+    def close_debug_panel(self):
+        # La medición sigue activa si estaba marcada; el panel solo la muestra
+        self.debug_window.destroy()
+        self.debug_window = None
+        self.debug_text = None
+
+    def toggle_profiling(self):
+        """Sustituye el perfilador activo: uno nuevo (vacío) al marcar, NullProfiler al desmarcar"""
+        current_profiler().stop()
+        profiler = Profiler(cprofile=self.profile_cprofile.get()) if self.profiling.get() else NullProfiler()
+        profiler.start()
+        activate(profiler)
+        self.refresh_debug_panel()
+
+    def refresh_debug_panel(self):
+        if self.debug_text is None:
+            return
+        profiler = current_profiler()
+        if profiler.enabled:
+            text = profiler.summary(top=25)
+        else:
+            text = "Marca «Registrar tiempos» y reescanea o genera para medir."
+        self.debug_text.delete("1.0", tk.END)
+        self.debug_text.insert(tk.END, text)
+
+    def save_profile(self):
+        profiler = current_profiler()
+        if not profiler.enabled:
+            return messagebox.showwarning("!", "No hay medición activa.")
+        path = filedialog.asksaveasfilename(
+            parent=self.debug_window, defaultextension=".json",
+            filetypes=[("Traza de Chrome", "*.json"), ("cProfile (pstats)", "*.prof")])
+        if not path:
+            return
+        try:
+            profiler.dump(path)
+        except (ValueError, OSError) as e:
+            messagebox.showerror("Error", str(e))
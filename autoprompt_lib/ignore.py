@@ -0,0 +1,229 @@
+"""Filtro de rutas del recorrido: IGNORE_DIRS, globs de inclusión/exclusión y .gitignore.
+
+Los patrones usan la sintaxis de .gitignore (`*`, `?`, `[...]`, `**`, `/` inicial para
+anclar, `/` final para solo carpetas y `!` para re-incluir). Cada fuente de reglas (los
+globs de configuración, cada .gitignore, .git/info/exclude) se compila una vez en pocas
+regex: por cada tramo de reglas consecutivas del mismo signo, una alternancia para las
+que solo miran el nombre (sin '/', las más comunes) y otra para las de ruta. Las carpetas
+excluidas se podan antes de bajar a ellas, así que lo que contienen no se lista.
+
+Precedencia, de mayor a menor: EXCLUDE, el .gitignore más profundo, ..., el de la raíz,
+.git/info/exclude. Dentro de una fuente gana la última regla que coincide, como en git.
+"""
+import os
+import re
+
+from .config import EXCLUDE, IGNORE_DIRS, INCLUDE, USE_GITIGNORE
+
+GITIGNORE = '.gitignore'
+# Sin distinguir mayúsculas donde el sistema de archivos no lo hace (como os.path.normcase)
+_FLAGS = re.IGNORECASE if os.path.normcase('A') == 'a' else 0
+
+
+def _glob_regex(pattern):
+    """Regex (sin anclar) de un glob de .gitignore; `*` y `?` no cruzan '/'"""
+    out = []
+    i = 0
+    n = len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern.startswith('**/', i):
+                out.append('(?:.*/)?')
+                i += 3
+                continue
+            if pattern.startswith('**', i) and i + 2 == n:
+                out.append('.+')  # 'dir/**': todo lo que hay dentro, no la carpeta misma
+                i += 2
+                continue
+            while i < n and pattern[i] == '*':
+                i += 1
+            out.append('[^/]*')
+            continue
+        if c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            end = pattern.find(']', i + 2 if pattern.startswith(('[!', '[^'), i) else i + 1)
+            if end < 0:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                if body[:1] in ('!', '^'):
+                    body = '^/' + body[1:]
+                out.append('[' + body.replace('\\', '\\\\').replace('[', '\\[') + ']')
+                i = end
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+
+class RuleSet:
+    """Reglas de una fuente, compiladas. match() devuelve True (excluida), False
+    (re-incluida con '!') o None si ninguna regla coincide"""
+
+    def __init__(self, lines, base=''):
+        self.segments = []  # [(regex de nombre, regex de ruta, negada)]; se evalúan del último al primero
+        names, paths = [], []
+        negated = False
+        for line in lines:
+            rule = self._parse(line, base)
+            if rule is None:
+                continue
+            regex, by_name, is_negated = rule
+            if (names or paths) and is_negated != negated:
+                self._add_segment(names, paths, negated)
+                names, paths = [], []
+            (names if by_name else paths).append(regex)
+            negated = is_negated
+        if names or paths:
+            self._add_segment(names, paths, negated)
+        self.segments.reverse()
+
+    def _add_segment(self, names, paths, negated):
+        compiled = [re.compile('|'.join(alternatives), _FLAGS).match if alternatives else None
+                    for alternatives in (names, paths)]
+        self.segments.append((*compiled, negated))
+
+    def __bool__(self):
+        return bool(self.segments)
+
+    @staticmethod
+    def _parse(line, base):
+        line = line.rstrip('\r\n')
+        stripped = line.rstrip(' ')
+        if stripped.endswith('\\') and len(stripped) < len(line):
+            stripped += ' '  # '\ ' final: espacio escapado
+        line = stripped
+        if not line or line.startswith('#'):
+            return None
+        negated = line.startswith('!')
+        if negated:
+            line = line[1:]
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        if not line:
+            return None
+        # Las carpetas se comprueban con '/' final: las reglas de solo carpetas lo exigen
+        end = ('/' if dir_only else '/?') + '\\Z'
+        if '/' not in line:
+            # Sin '/': coincide con el nombre a cualquier profundidad bajo `base`, y solo se
+            # consulta para rutas bajo `base`, así que basta mirar el nombre
+            return f"(?:{_glob_regex(line)}{end})", True, negated
+        prefix = re.escape(base + '/') if base else ''
+        return f"(?:{prefix}{_glob_regex(line.lstrip('/'))}{end})", False, negated
+
+    def match(self, path, name=None):
+        """Veredicto para `path` (relativa a la raíz, con '/' final si es carpeta) y su `name`"""
+        if name is None:
+            name = path[path.rstrip('/').rfind('/') + 1:]
+        for by_name, by_path, negated in self.segments:
+            if (by_name is not None and by_name(name)) or (by_path is not None and by_path(path)):
+                return not negated
+        return None
+
+
+def read_rules(path, base=''):
+    """RuleSet de un archivo de patrones (.gitignore), o None si no existe o no tiene reglas"""
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as fh:
+            rules = RuleSet(fh, base)
+    except OSError:
+        return None
+    return rules or None
+
+
+class PathFilter:
+    """Decide qué carpetas recorrer y qué archivos devolver en el recorrido de root_dir.
+
+    Las reglas vigentes en una carpeta son una tupla de RuleSet (la más prioritaria
+    primero) que el recorrido hereda y amplía con el .gitignore de cada carpeta.
+    Las rutas relativas se comparan siempre con '/' como separador.
+    """
+
+    def __init__(self, root_dir, ignore_dirs=IGNORE_DIRS, include=INCLUDE, exclude=EXCLUDE,
+                 gitignore=USE_GITIGNORE):
+        self.root_dir = root_dir
+        self.ignore_dirs = frozenset(ignore_dirs)
+        self.include_patterns = list(include)
+        self.exclude_patterns = list(exclude)
+        self.gitignore = gitignore
+        self.include = RuleSet(self.include_patterns) or None
+        self.exclude = RuleSet(self.exclude_patterns)
+        self._parsed = {}  # ruta de .gitignore -> ((size, mtime_ns), RuleSet o None)
+
+    @property
+    def narrows(self):
+        """True si INCLUDE/EXCLUDE recortan el árbol: lo que no se recorre puede seguir existiendo"""
+        return self.include is not None or bool(self.exclude)
+
+    def without_include(self):
+        """Mismo filtro sin INCLUDE (p. ej. para buscar los .csproj del grafo)"""
+        clone = PathFilter(self.root_dir, self.ignore_dirs, (), self.exclude_patterns, self.gitignore)
+        clone._parsed = self._parsed
+        return clone
+
+    def _load(self, path, base):
+        """RuleSet de un .gitignore, reutilizado mientras no cambie su stat"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        stamp = (st.st_size, st.st_mtime_ns)
+        cached = self._parsed.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        rules = read_rules(path, base)
+        self._parsed[path] = (stamp, rules)
+        return rules
+
+    def base_rules(self):
+        """Reglas anteriores a cualquier .gitignore: .git/info/exclude"""
+        if not self.gitignore:
+            return ()
+        rules = self._load(os.path.join(self.root_dir, '.git', 'info', 'exclude'), '')
+        return (rules,) if rules is not None else ()
+
+    def dir_rules(self, rel_dir, parent, gitignore_path):
+        """Reglas vigentes dentro de rel_dir: las de `parent` más su .gitignore, si lo hay"""
+        if not self.gitignore or gitignore_path is None:
+            return parent
+        rules = self._load(gitignore_path, rel_dir)
+        return parent if rules is None else (rules,) + parent
+
+    def _excluded(self, rules, path, name):
+        verdict = self.exclude.match(path, name) if self.exclude else None
+        if verdict is not None:
+            return verdict
+        for rule_set in rules:
+            verdict = rule_set.match(path, name)
+            if verdict is not None:
+                return verdict
+        return False
+
+    def keep_dir(self, rules, rel_path, name):
+        """False si hay que podar la carpeta (no se baja a ella)"""
+        return name not in self.ignore_dirs and not self._excluded(rules, rel_path + '/', name + '/')
+
+    def keep_file(self, rules, rel_path, name):
+        if self._excluded(rules, rel_path, name):
+            return False
+        return self.include is None or self.include.match(rel_path, name) is True
+
+    def is_ignored(self, rel_path, is_dir=False):
+        """Para rutas sueltas (vigilancia): True si el recorrido no la devolvería o no bajaría a ella"""
+        parts = rel_path.replace(os.sep, '/').split('/')
+        rules = self.dir_rules('', self.base_rules(), os.path.join(self.root_dir, GITIGNORE))
+        rel = ''
+        for i, name in enumerate(parts):
+            child = f"{rel}/{name}" if rel else name
+            if i == len(parts) - 1 and not is_dir:
+                return not self.keep_file(rules, child, name)
+            if not self.keep_dir(rules, child, name):
+                return True
+            rules = self.dir_rules(child, rules, os.path.join(self.root_dir, child, GITIGNORE))
+            rel = child
+        return False
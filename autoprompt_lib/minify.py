@@ -0,0 +1,208 @@
+"""Minificado de código C# para el modo completo, en una sola pasada sobre el texto.
+
+Los niveles son acumulativos, cada uno incluye los anteriores:
+- docs: quita comentarios de documentación (/// y /** */) y las líneas #region/#endregion.
+- comments: quita también el resto de comentarios.
+- whitespace: elimina líneas en blanco e indentación y reduce los espacios a uno.
+- bodies: sustituye los cuerpos de métodos de más de MINIFY_MAX_BODY_LINES líneas por un resumen.
+
+Literales de cadena y directivas de preprocesador se copian intactos. Un comentario que
+ocupa su propia línea se quita con la línea entera.
+"""
+import re
+
+from .config import MINIFY_MAX_BODY_LINES
+from .csharp import TYPE_KEYWORDS, _skip_string
+
+MINIFY_VERSION = 1  # Subirlo invalida los bloques minificados de la caché y los ahorros del índice
+DOCS, COMMENTS, WHITESPACE, BODIES = LEVELS = ('docs', 'comments', 'whitespace', 'bodies')
+
+# Como csharp._TOKEN_RE, pero el código corriente (palabras, números, operadores, literales de
+# carácter y espacios simples) se consume en tramos: solo llegan sueltos espacios con salto de
+# línea o repetidos, comentarios, cadenas, preprocesador y los caracteres que delimitan
+# declaraciones y cuerpos ([ ] ( ) { } ; y '=' de asignación)
+_UNIT = r"""(?:'(?:\\.|[^'\\\n])*'|[<>!+\-*/%&|^?=]=|=>|/(?![/*])|[$@](?![$@"])|[^\s"'/\#$@\[\](){};=])"""
+_MINIFY_RE = re.compile(rf"""
+    (?P<ws>\s+)
+  | (?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))
+  | (?P<pp>\#[^\n]*)
+  | (?P<str>[$@]*")
+  | (?P<code>{_UNIT}(?:{_UNIT}|\ (?={_UNIT}))*)
+  | (?P<op>.)
+""", re.VERBOSE | re.DOTALL)
+_DECLARATION_RE = re.compile(r"(?<![@\w.])(" + "|".join(sorted(TYPE_KEYWORDS | {'namespace'})) + r")(?!\w)")
+
+
+def level_number(level):
+    """0 sin minificar, 1..4 según LEVELS"""
+    if level is None:
+        return 0
+    if level not in LEVELS:
+        raise ValueError(f"Nivel de minificado desconocido: {level!r} (usa {', '.join(LEVELS)})")
+    return LEVELS.index(level) + 1
+
+
+def _is_region(tok):
+    return tok[1:].lstrip().startswith(('region', 'endregion'))
+
+
+def _minify(text, level, max_body_lines):
+    """(texto minificado, caracteres ahorrados por nivel) de una pasada.
+
+    El ahorro se atribuye al nivel que elimina cada fragmento y se mide sobre el texto
+    ya reducido por los niveles anteriores, así que texto original menos la suma de los
+    ahorros hasta el nivel k es la longitud de la salida al nivel k.
+    """
+    level = level_number(level)
+    out = []
+    saved = [0] * len(LEVELS)
+    pending = ""  # Espacio en blanco aún sin emitir (se decide al ver el siguiente token)
+    soft = None  # Nivel del comentario en línea quitado: separa los tokens vecinos con un espacio
+    skip = None  # Nivel de la línea quitada: su salto de línea aún está por consumir
+    stack = []  # Tipo de cada llave abierta: 'namespace', 'type', 'method' u 'other'
+    decl = None  # Primer indicio de la declaración en curso: 'namespace', 'type' o 'call'
+    assigned = False  # '=' fuera de paréntesis: inicializador, no cuerpo de método
+    parens = 0
+    brackets = 0
+    body = None  # (posición en out tras '{', posición de '{' en text, profundidad) del cuerpo a elidir
+
+    def drop(tok, lvl):
+        nonlocal pending, soft, skip
+        saved[lvl - 1] += len(tok)
+        if not out or '\n' in pending:
+            cut = pending.rfind('\n') + 1
+            saved[lvl - 1] += len(pending) - cut
+            pending = pending[:cut]
+            skip = lvl
+        else:
+            saved[lvl - 1] += len(pending)
+            pending = ""
+            soft = lvl
+
+    def emit(tok):
+        nonlocal pending, soft, skip
+        if soft is not None and not pending:
+            pending = " "
+            saved[soft - 1] -= 1
+        if pending:
+            if level >= 3:
+                collapsed = ('\n' if '\n' in pending else ' ') if out else ''
+                saved[2] += len(pending) - len(collapsed)
+                pending = collapsed
+            if pending:
+                out.append(pending)
+            pending = ""
+        soft = None
+        skip = None
+        out.append(tok)
+
+    pos = 0
+    n = len(text)
+    match = _MINIFY_RE.match
+    while pos < n:
+        m = match(text, pos)
+        kind = m.lastgroup
+        if kind == 'str':
+            end = _skip_string(text, pos)
+            emit(text[pos:end])
+            pos = end
+            continue
+        tok = m.group()
+        pos = m.end()
+        if kind == 'ws':
+            if skip is not None:
+                nl = tok.find('\n')
+                cut = len(tok) if nl < 0 else nl + 1
+                saved[skip - 1] += cut
+                tok = tok[cut:]
+                if nl >= 0:
+                    skip = None
+            if soft is not None and tok:
+                soft = None
+            pending += tok
+            continue
+        if kind == 'comment':
+            lvl = 1 if tok.startswith(('///', '/**')) else 2
+            if level >= lvl:
+                drop(tok, lvl)
+            else:
+                emit(tok)
+            continue
+        if kind == 'pp':
+            if level >= 1 and _is_region(tok):
+                drop(tok, 1)
+            else:
+                emit(tok)
+            continue
+
+        emit(tok)
+        if level < 4:
+            continue
+        # Seguimiento de declaraciones y llaves para reconocer cuerpos de método
+        if kind == 'code':
+            if decl is None and not brackets:
+                found = _DECLARATION_RE.search(tok)
+                if found:
+                    decl = 'namespace' if found.group() == 'namespace' else 'type'
+        elif tok == '[':
+            brackets += 1
+        elif tok == ']':
+            brackets -= 1
+        elif brackets:
+            continue
+        elif tok == '(':
+            parens += 1
+            decl = decl or 'call'
+        elif tok == ')':
+            parens -= 1
+        elif tok == '=' and not parens:
+            assigned = True
+        elif tok == '{':
+            enclosing = stack[-1] if stack else None
+            if decl in ('namespace', 'type'):
+                brace = decl
+            elif decl == 'call' and not assigned and enclosing == 'type':
+                brace = 'method'
+            else:
+                brace = 'other'
+            stack.append(brace)
+            if brace == 'method' and body is None:
+                body = (len(out), m.start(), len(stack))
+            decl, assigned, parens = None, False, 0
+        elif tok == '}':
+            if body is not None and body[2] == len(stack):
+                start, source_pos, _ = body
+                body = None
+                lines = text.count('\n', source_pos, m.start())
+                if lines > max_body_lines:
+                    summary = f" /* … {lines} líneas */ "
+                    saved[3] += sum(len(piece) for piece in out[start:-1]) - len(summary)
+                    out[start:-1] = [summary]
+            if stack:
+                stack.pop()
+            decl, assigned, parens = None, False, 0
+        elif tok == ';':
+            decl, assigned, parens = None, False, 0
+    if level >= 3:
+        saved[2] += len(pending)
+        pending = ""
+    return "".join(out) + pending, saved
+
+
+def minify(text, level, max_body_lines=MINIFY_MAX_BODY_LINES):
+    """Texto C# minificado al nivel `level` (uno de LEVELS; None lo devuelve tal cual)"""
+    if level is None:
+        return text
+    return _minify(text, level, max_body_lines)[0]
+
+
+def minify_savings(text, max_body_lines=MINIFY_MAX_BODY_LINES):
+    """[caracteres, ahorro de cada nivel de LEVELS] en una sola pasada al nivel máximo"""
+    return [len(text)] + _minify(text, BODIES, max_body_lines)[1]
+
+
+def remaining_fraction(savings, level):
+    """Fracción del texto que queda al minificar a `level`, según minify_savings"""
+    if not savings or not savings[0]:
+        return 1.0
+    return max(0.0, 1 - sum(savings[1:level_number(level) + 1]) / savings[0])
@@ -0,0 +1,338 @@
+import os
+import re
+from array import array
+
+from .minify import LEVELS
+from .tokens import content_tokens, file_overhead_tokens
+
+ROOT_FOLDER = "[ROOT]"
+
+FULL = 'full'
+STRUCTURE = 'structure'
+# Variantes de coste en tokens con columna y suma propias (ver tokens.file_tokens)
+COST_MODES = (FULL, STRUCTURE) + LEVELS
+# Columnas que se suman: líneas, décimas de KB (enteras, para que las sumas sean exactas), tokens
+# del archivo y costes en la salida; por carpeta solo se suman las FOLDER_SUMMED primeras
+SUMMED = ('lines', 'kb10', 'tokens') + COST_MODES
+FOLDER_SUMMED = 3
+
+
+def folder_of(f):
+    return f['directory'] if f['directory'] else ROOT_FOLDER
+
+
+def cost_mode(structure_only=False, minify=None):
+    """Columna de coste que corresponde a file_tokens(f, structure_only, minify)"""
+    if structure_only:
+        return STRUCTURE
+    return minify if minify is not None else FULL
+
+
+def _or_missing(value):
+    return -1 if value is None else value
+
+
+def _literal(path):
+    """Patrón de core.select_files que solo coincide con `path`: comodines escapados y anclado"""
+    return '/' + re.sub(r'([*?\[])', r'[\1]', path.replace(os.sep, '/'))
+
+
+class FileTable:
+    """Archivos escaneados en columnas en lugar de un dict por archivo.
+
+    Los directorios (relativos y en disco) se internan en tablas y cada fila guarda solo su
+    id y el nombre, de los que salen ruta y ruta completa; los números van en `array` y los
+    costes en tokens se calculan una vez por archivo y modo. entry() reconstruye el dict de
+    scanner.file_entry cuando hace falta (render, grafo, presupuesto).
+    """
+
+    def __init__(self):
+        self.dirs = []  # Directorio relativo ('' = raíz), internado
+        self.dir_ids = {}
+        self.bases = []  # Carpeta en disco (dirname de full_path), internada
+        self.base_ids = {}
+        self.names = []  # None si el archivo se eliminó
+        self.dir = array('l')
+        self.base = array('l')
+        self.columns = {name: array('q') for name in SUMMED}
+        self.summed = list(self.columns.values())  # Las mismas columnas, en el orden de SUMMED
+        self.struct_tokens = array('q')  # -1 = estructura aún no calculada (None en el dict)
+        self.hashes = []
+        self.minified = []
+
+    def __len__(self):
+        return len(self.names)
+
+    @staticmethod
+    def _intern(table, ids, value):
+        idx = ids.get(value)
+        if idx is None:
+            idx = ids[value] = len(table)
+            table.append(value)
+        return idx
+
+    @staticmethod
+    def _summed(f):
+        """Valores de las columnas SUMMED de un dict de scanner.file_entry"""
+        overhead = file_overhead_tokens(f['path'])
+        full = content_tokens(f) + overhead
+        costs = [full, content_tokens(f, True) + overhead]
+        if f['minified']:
+            costs.extend(content_tokens(f, minify=level) + overhead for level in LEVELS)
+        else:
+            costs.extend([full] * len(LEVELS))
+        return [f['lines'], round(f['kb'] * 10), f['tokens']] + costs
+
+    def append(self, f):
+        """Añade un dict de scanner.file_entry; devuelve su índice"""
+        self.dir.append(self._intern(self.dirs, self.dir_ids, f['directory']))
+        self.base.append(self._intern(self.bases, self.base_ids, os.path.dirname(f['full_path'])))
+        self.names.append(f['name'])
+        self.struct_tokens.append(_or_missing(f['struct_tokens']))
+        self.hashes.append(f['hash'])
+        self.minified.append(f['minified'])
+        for column, value in zip(self.summed, self._summed(f)):
+            column.append(value)
+        return len(self.names) - 1
+
+    def overwrite(self, idx, f):
+        """Sustituye los datos de la fila `idx` (misma ruta) por los de `f`"""
+        self.struct_tokens[idx] = _or_missing(f['struct_tokens'])
+        self.hashes[idx] = f['hash']
+        self.minified[idx] = f['minified']
+        for column, value in zip(self.summed, self._summed(f)):
+            column[idx] = value
+
+    def directory(self, idx):
+        return self.dirs[self.dir[idx]]
+
+    def path(self, idx):
+        directory = self.dirs[self.dir[idx]]
+        return os.path.join(directory, self.names[idx]) if directory else self.names[idx]
+
+    def values(self, idx):
+        """Valores de las columnas SUMMED de la fila, en ese orden"""
+        return [column[idx] for column in self.summed]
+
+    def entry(self, idx):
+        """Dict de scanner.file_entry de la fila"""
+        name = self.names[idx]
+        return {
+            "path": self.path(idx),
+            "full_path": os.path.join(self.bases[self.base[idx]], name),
+            "name": name,
+            "lines": self.columns['lines'][idx],
+            "kb": self.columns['kb10'][idx] / 10,
+            "tokens": self.columns['tokens'][idx],
+            "struct_tokens": self.struct_tokens[idx] if self.struct_tokens[idx] >= 0 else None,
+            "hash": self.hashes[idx],
+            "minified": self.minified[idx],
+            "directory": self.directory(idx)
+        }
+
+
+class SelectionModel:
+    """Archivos escaneados (FileTable) agrupados por carpeta, con la selección en un bytearray.
+
+    No depende de Tk: la vista solo consulta el modelo para las filas visibles,
+    así que expandir o marcar una carpeta no toca el disco ni crea variables Tcl.
+    Las sumas de lo seleccionado (y de cada carpeta) se mantienen al marcar y desmarcar,
+    así que las estadísticas cuestan O(1) y no un recorrido de todos los archivos.
+    """
+
+    def __init__(self, files=(), previous=None):
+        self.table = FileTable()
+        self.selected = bytearray()
+        self.folders = {}  # carpeta -> [índices en self.table]
+        self.folder_selected = {}  # carpeta -> nº de archivos seleccionados
+        self.folder_sums = {}  # carpeta -> [líneas, décimas de KB, tokens] de todos sus archivos
+        self.index_of = {}  # path -> índice
+        self.removed = []  # Índices de archivos eliminados (names[idx] is None), siempre desmarcados
+        self.live_sums = [0] * len(SUMMED)
+        self.selected_sums = [0] * len(SUMMED)
+        self.selected_count = 0
+        for f in files:
+            # Tras un reescaneo se conserva la selección de las rutas conocidas
+            selected = previous.is_path_selected(f['path']) if previous is not None else True
+            self.add(f, selected)
+
+    def __len__(self):
+        return len(self.index_of)
+
+    @staticmethod
+    def _accumulate(sums, values, sign):
+        # zip se queda en len(sums): las sumas por carpeta solo llevan las FOLDER_SUMMED primeras
+        for i, value in zip(range(len(sums)), values):
+            sums[i] += sign * value
+
+    def add(self, f, selected=True):
+        return self._added(self.table.append(f), f['path'], selected)
+
+    def _added(self, idx, path, selected):
+        folder = self.folder(idx)
+        values = self.table.values(idx)
+        self.selected.append(1 if selected else 0)
+        self.folders.setdefault(folder, []).append(idx)
+        self.folder_selected[folder] = self.folder_selected.get(folder, 0) + (1 if selected else 0)
+        self._accumulate(self.folder_sums.setdefault(folder, [0] * FOLDER_SUMMED), values, 1)
+        self._accumulate(self.live_sums, values, 1)
+        if selected:
+            self.selected_count += 1
+            self._accumulate(self.selected_sums, values, 1)
+        self.index_of[path] = idx
+        return idx
+
+    def remove(self, path):
+        """Quita un archivo sin renumerar los demás (los índices son ids de fila en la vista).
+
+        Devuelve el índice que ocupaba, o None si no estaba.
+        """
+        idx = self.index_of.pop(path, None)
+        if idx is None:
+            return None
+        folder = self.folder(idx)
+        self.set(idx, False)
+        values = self.table.values(idx)
+        self._accumulate(self.live_sums, values, -1)
+        self._accumulate(self.folder_sums[folder], values, -1)
+        self.folders[folder].remove(idx)
+        if not self.folders[folder]:
+            del self.folders[folder]
+            del self.folder_selected[folder]
+            del self.folder_sums[folder]
+        self.table.names[idx] = None
+        self.removed.append(idx)
+        return idx
+
+    def replace(self, idx, f):
+        """Actualiza los datos de un archivo existente (misma ruta) conservando su selección"""
+        selected = self.selected[idx]
+        old = self.table.values(idx)
+        self.table.overwrite(idx, f)
+        new = self.table.values(idx)
+        folder = self.folder(idx)
+        for sums in ([self.live_sums, self.folder_sums[folder]] + ([self.selected_sums] if selected else [])):
+            self._accumulate(sums, old, -1)
+            self._accumulate(sums, new, 1)
+
+    def sort(self):
+        """Ordena cada carpeta por nombre, como scanner.sort_files (los índices no cambian)"""
+        for indices in self.folders.values():
+            indices.sort(key=self.table.names.__getitem__)
+
+    def _in_order(self, selected_only=False):
+        """Índices vivos en el orden de scanner.sort_files: raíz primero, luego carpeta y nombre"""
+        names = self.table.names
+        for folder in self.sorted_folders():
+            for idx in sorted(self.folders[folder], key=names.__getitem__):
+                if not selected_only or self.selected[idx]:
+                    yield idx
+
+    def name(self, idx):
+        return self.table.names[idx]
+
+    def path(self, idx):
+        return self.table.path(idx)
+
+    def folder(self, idx):
+        return self.table.directory(idx) or ROOT_FOLDER
+
+    def row_values(self, idx):
+        """(líneas, KB, tokens) de un archivo para su fila en la vista"""
+        columns = self.table.columns
+        return columns['lines'][idx], columns['kb10'][idx] / 10, columns['tokens'][idx]
+
+    def folder_values(self, folder):
+        """(líneas, KB, tokens) de todos los archivos de una carpeta"""
+        sums = self.folder_sums[folder]
+        return sums[0], round(sums[1] / 10, 1), sums[2]
+
+    def live_files(self):
+        return [self.table.entry(i) for i in self._in_order()]
+
+    def is_selected(self, idx):
+        return bool(self.selected[idx])
+
+    def is_path_selected(self, path, default=True):
+        idx = self.index_of.get(path)
+        return default if idx is None else bool(self.selected[idx])
+
+    def set(self, idx, value):
+        """Marca/desmarca un archivo; devuelve True si cambió"""
+        value = 1 if value else 0
+        if self.selected[idx] == value:
+            return False
+        self.selected[idx] = value
+        sign = 1 if value else -1
+        self.folder_selected[self.folder(idx)] += sign
+        self.selected_count += sign
+        self._accumulate(self.selected_sums, self.table.values(idx), sign)
+        return True
+
+    def set_folder(self, folder, value):
+        for idx in self.folders.get(folder, ()):
+            self.set(idx, value)
+
+    def set_all(self, value):
+        value = 1 if value else 0
+        self.selected[:] = bytes([value]) * len(self.selected)
+        for idx in self.removed:
+            self.selected[idx] = 0
+        for folder, indices in self.folders.items():
+            self.folder_selected[folder] = len(indices) if value else 0
+        self.selected_count = len(self.index_of) if value else 0
+        self.selected_sums = list(self.live_sums) if value else [0] * len(SUMMED)
+
+    def select_only(self, paths):
+        """Selecciona exactamente las rutas dadas"""
+        self.set_all(False)
+        for path in paths:
+            idx = self.index_of.get(path)
+            if idx is not None:
+                self.set(idx, True)
+
+    def selection_patterns(self):
+        """Patrones de core.select_files que reproducen la selección: '/carpeta/**' por cada subárbol
+        marcado entero (así incluyen lo que aparezca en él) y rutas sueltas para el resto"""
+        complete = {}  # carpeta o antecesora ('' = raíz) -> todo lo que cuelga de ella está marcado
+        for folder in self.folders:
+            full = self.folder_state(folder) == 'all'
+            path = '' if folder == ROOT_FOLDER else folder
+            while True:
+                complete[path] = complete.get(path, True) and full
+                if not path:
+                    break
+                path = os.path.dirname(path)
+
+        def covered(path):
+            while True:
+                if complete.get(path):
+                    return True
+                if not path:
+                    return False
+                path = os.path.dirname(path)
+
+        patterns = [_literal(path) + '/**' if path else '**' for path in sorted(complete)
+                    if complete[path] and not (path and covered(os.path.dirname(path)))]
+        patterns.extend(_literal(f['path']) for f in self.selected_files() if not covered(f['directory']))
+        return patterns
+
+    def folder_state(self, folder):
+        """'all', 'none' o 'some' según cuántos archivos de la carpeta están seleccionados"""
+        count = self.folder_selected.get(folder, 0)
+        if count == 0:
+            return 'none'
+        return 'all' if count == len(self.folders[folder]) else 'some'
+
+    def sorted_folders(self):
+        return sorted(self.folders, key=lambda x: (x != ROOT_FOLDER, x))
+
+    def selected_files(self):
+        return [self.table.entry(i) for i in self._in_order(selected_only=True)]
+
+    def stats(self, structure_only=False, minify=None):
+        """(archivos seleccionados, líneas, KB, tokens) de la selección, de las sumas mantenidas;
+        los tokens son los de tokens.file_tokens con `structure_only` y `minify`"""
+        sums = self.selected_sums
+        return (self.selected_count, sums[0], sums[1] / 10,
+                sums[SUMMED.index(cost_mode(structure_only, minify))])
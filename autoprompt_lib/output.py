@@ -0,0 +1,116 @@
+import contextlib
+import gzip
+import io
+import os
+import shutil
+import sys
+import time
+
+from .config import READ_CHUNK
+from .profiling import current as current_profiler
+
+
+@contextlib.contextmanager
+def open_output(target):
+    """Abre el destino de la salida como flujo de texto UTF-8.
+
+    `target` puede ser '-' (stdout, útil para tuberías), un objeto con `write`,
+    una ruta terminada en .gz o .zst (comprimida al vuelo) o cualquier otra ruta.
+    """
+    if hasattr(target, 'write'):
+        yield target
+    elif target == '-':
+        # Envuelve el buffer binario para forzar UTF-8 sin cerrar stdout al terminar
+        out = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+        try:
+            yield out
+        finally:
+            out.flush()
+            out.detach()
+    elif target.endswith('.gz'):
+        with gzip.open(target, 'wt', encoding='utf-8') as out:
+            yield out
+    elif target.endswith('.zst'):
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("La salida .zst requiere el paquete 'zstandard' (pip install zstandard).")
+        with open(target, 'wb') as raw:
+            with zstandard.ZstdCompressor().stream_writer(raw) as compressed:
+                with io.TextIOWrapper(compressed, encoding='utf-8') as out:
+                    yield out
+    else:
+        with open(target, 'w', encoding='utf-8') as out:
+            yield out
+
+
+def _raw_fd(out):
+    """Descriptor donde se pueden copiar bytes UTF-8 tal cual, o None si `out` comprime,
+    traduce saltos de línea o no es un archivo del sistema operativo"""
+    if os.linesep != '\n' or not isinstance(out, io.TextIOWrapper):
+        return None
+    if out.encoding.lower().replace('-', '').replace('_', '') != 'utf8':
+        return None
+    raw = getattr(out.buffer, 'raw', None)
+    return raw.fileno() if isinstance(raw, io.FileIO) else None
+
+
+def _copy_fd(src, dst, size):
+    """Copia `size` bytes entre descriptores dentro del kernel; False si el sistema no lo
+    permite para este par de descriptores (p. ej. EXDEV, o destino tubería en copy_file_range)"""
+    for copy in (getattr(os, 'copy_file_range', None), getattr(os, 'sendfile', None)):
+        if copy is None:
+            continue
+        copied = 0
+        try:
+            while copied < size:
+                if copy is os.sendfile:
+                    n = os.sendfile(dst, src, copied, size - copied)
+                else:
+                    n = os.copy_file_range(src, dst, size - copied, copied)
+                if n == 0:
+                    break
+                copied += n
+        except OSError:
+            if copied:
+                raise  # Error real de E/S a mitad de copia (p. ej. disco lleno)
+            continue
+        if copied == size:
+            return True
+        if copied:
+            raise OSError(f"Copia incompleta: {copied} de {size} bytes")
+    return False
+
+
+def write_chunk(out, chunk):
+    """Escribe un fragmento de la salida: texto, o un bloque en disco (blocks.CachedBlock)
+    que se copia con copy_file_range/sendfile cuando `out` es un archivo sin transformar"""
+    profiler = current_profiler()
+    if not profiler.enabled:
+        _write_chunk(out, chunk)
+        return
+    start = time.perf_counter()
+    copied = _write_chunk(out, chunk)
+    profiler.add_time('write', time.perf_counter() - start)
+    if isinstance(chunk, str):
+        profiler.count('bytes.written', len(chunk.encode('utf-8')))
+    else:
+        profiler.count('bytes.written', chunk.size)
+        if copied:
+            profiler.count('bytes.copied', chunk.size)
+
+
+def _write_chunk(out, chunk):
+    """write_chunk sin medir; True si el bloque se copió dentro del kernel"""
+    if isinstance(chunk, str):
+        out.write(chunk)
+        return False
+    fd = _raw_fd(out)
+    if fd is not None:
+        out.flush()
+        with open(chunk.path, 'rb') as src:
+            if _copy_fd(src.fileno(), fd, chunk.size):
+                return True
+    with open(chunk.path, 'r', encoding='utf-8', newline='') as src:
+        shutil.copyfileobj(src, out, READ_CHUNK)  # Compresores y tuberías: por bloques, no entero
+    return False
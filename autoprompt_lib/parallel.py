@@ -0,0 +1,29 @@
+import collections
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+POOL_KINDS = ('thread', 'process')
+
+
+def make_executor(workers, pool='thread'):
+    """Pool de trabajo, o None para el modo secuencial (workers <= 1)"""
+    if workers is None or workers <= 1:
+        return None
+    if pool not in POOL_KINDS:
+        raise ValueError(f"Tipo de pool desconocido: {pool!r} (usa {' o '.join(POOL_KINDS)})")
+    if pool == 'process':
+        return ProcessPoolExecutor(max_workers=workers)
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+def ordered_map(executor, fn, arg_tuples, window=None):
+    """Como executor.map pero con un máximo de `window` tareas en vuelo, para no
+    adelantar la lectura de todo el árbol; los resultados salen en el orden de entrada."""
+    if window is None:
+        window = executor._max_workers * 2
+    pending = collections.deque()
+    for args in arg_tuples:
+        pending.append(executor.submit(fn, *args))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
@@ -0,0 +1,196 @@
+"""Perfiles de selección: patrones con nombre y un manifiesto precalculado de lo que seleccionan.
+
+Un perfil guarda sus patrones (globs de core.select_files o rutas exactas) y el manifiesto
+de la última selección que produjeron: ruta, hash, tamaño, mtime, líneas y tokens de cada
+archivo, más el mtime de las carpetas bajo la base de los patrones y de los .gitignore que
+las afectan. Si nada de eso cambió (un stat por archivo seleccionado y por carpeta), la
+selección y sus estadísticas salen del manifiesto sin recorrer el árbol ni leer archivos,
+y el render reutiliza la caché de bloques. Si algo cambió, la selección se rehace sobre un
+escaneo normal y el manifiesto se actualiza.
+
+Los perfiles viven en PROFILES_FILE; los de SELECTION_PROFILES existen aunque no se hayan
+guardado nunca (su manifiesto se calcula en el primer uso).
+"""
+import json
+import os
+import tempfile
+
+from .config import PROFILES_FILE, SELECTION_PROFILES
+from .ignore import GITIGNORE
+from .roots import split_path
+from .scanner import file_entry, scan_extensions
+from .tokens import tokenizer_name
+
+# Campos del registro del índice que guarda el manifiesto (lo que necesita scanner.file_entry)
+MANIFEST_FIELDS = ('size', 'mtime_ns', 'lines', 'tokens', 'struct_tokens', 'hash', 'minified')
+
+
+def _read_saved(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as fh:
+            return json.load(fh).get("profiles", {})
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError, AttributeError) as e:
+        raise ValueError(f"No se pudieron leer los perfiles de {path}: {e}")
+
+
+def load_profiles(path=PROFILES_FILE):
+    """{nombre: {"patterns": [...], "manifest": dict o None}}: SELECTION_PROFILES más los guardados
+    en `path`, que prevalecen"""
+    profiles = {name: {"patterns": list(patterns), "manifest": None}
+                for name, patterns in SELECTION_PROFILES.items()}
+    profiles.update(_read_saved(path))
+    return profiles
+
+
+def get_profile(name, path=PROFILES_FILE):
+    profiles = load_profiles(path)
+    if name not in profiles:
+        raise ValueError(f"Perfil de selección desconocido: {name!r} (disponibles: {', '.join(profiles) or 'ninguno'})")
+    return profiles[name]
+
+
+def _write_saved(profiles, path):
+    """Escribe los perfiles guardados de forma atómica"""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+            json.dump({"profiles": profiles}, fh, ensure_ascii=False, indent=1)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def store_profile(name, patterns, files=None, index=None, roots=None, include_csproj=False, path=PROFILES_FILE):
+    """Guarda (o actualiza) el perfil `name` con sus patrones y el manifiesto de `files`, la
+    selección que producen sobre un escaneo recién hecho con `index`; sin `files`, sin manifiesto"""
+    manifest = build_manifest(files, index, roots, include_csproj, patterns) if files is not None else None
+    profile = {"patterns": list(patterns), "manifest": manifest}
+    saved = _read_saved(path)
+    saved[name] = profile
+    _write_saved(saved, path)
+    return profile
+
+
+def delete_profile(name, path=PROFILES_FILE):
+    """Borra un perfil guardado; si está en SELECTION_PROFILES vuelve a sus patrones de config"""
+    saved = _read_saved(path)
+    if saved.pop(name, None) is not None:
+        _write_saved(saved, path)
+
+
+def _manifest_key(roots, include_csproj, patterns):
+    """Lo que, si cambia, invalida el manifiesto aunque los archivos sigan igual"""
+    return {"tokenizer": tokenizer_name(), "patterns": list(patterns),
+            "roots": [[root.name, os.path.abspath(root.path), scan_extensions(include_csproj, root.extensions),
+                       root.path_filter.include_patterns, root.path_filter.exclude_patterns,
+                       root.path_filter.gitignore] for root in roots]}
+
+
+def _pattern_base(pattern):
+    """Carpeta fija de un patrón: lo que hay antes del primer comodín (la carpeta de una ruta exacta)"""
+    pattern = pattern.replace('\\', '/').lstrip('/')
+    cuts = [pattern.find(c) for c in '*?[' if c in pattern]
+    if not cuts:
+        return os.path.dirname(pattern).replace('/', os.sep)
+    return pattern[:min(cuts)].rpartition('/')[0].replace('/', os.sep)
+
+
+def _base_dirs(roots, base):
+    """(raíz, carpeta relativa a ella) que corresponden a la base de un patrón"""
+    if len(roots) == 1 and roots[0].name is None:
+        return [(roots[0], base)]
+    if not base:
+        return [(root, '') for root in roots]
+    name, _, rel_dir = base.partition(os.sep)
+    return [(root, rel_dir) for root in roots if root.name == name]
+
+
+def _walk_dirs(top, ignore_dirs):
+    """`top` y sus subcarpetas, sin bajar por IGNORE_DIRS ni enlaces simbólicos"""
+    pending = [top]
+    while pending:
+        current = pending.pop()
+        yield current
+        try:
+            with os.scandir(current) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False) and entry.name not in ignore_dirs:
+                    pending.append(entry.path)
+            except OSError:
+                continue
+
+
+def _watched_paths(roots, patterns):
+    """Rutas cuyo mtime delata altas, bajas o cambios de filtro en lo que cubren los patrones:
+    las carpetas bajo cada base y los .gitignore (y .git/info/exclude) que les afectan"""
+    paths = {os.path.join(root.path, '.git', 'info', 'exclude') for root in roots}
+    for base in {_pattern_base(p) for p in patterns or ('*',)}:
+        for root, rel_dir in _base_dirs(roots, base):
+            ancestor = root.path
+            paths.add(os.path.join(ancestor, GITIGNORE))
+            for part in filter(None, rel_dir.split(os.sep)):
+                ancestor = os.path.join(ancestor, part)
+                paths.add(os.path.join(ancestor, GITIGNORE))
+            for directory in _walk_dirs(ancestor, root.path_filter.ignore_dirs):
+                paths.add(directory)
+                paths.add(os.path.join(directory, GITIGNORE))
+    return paths
+
+
+def _stamp(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def build_manifest(files, index, roots, include_csproj=False, patterns=()):
+    """Manifiesto de `files` a partir de sus registros en `index`; None si alguno cambió tras el escaneo"""
+    entries = []
+    for f in files:
+        try:
+            record = index.lookup(f['path'])
+        except OSError:
+            return None
+        if record is None or record['hash'] != f['hash']:
+            return None
+        entry = {"path": f['path']}
+        entry.update((field, record[field]) for field in MANIFEST_FIELDS)
+        entries.append(entry)
+    return {"key": _manifest_key(roots, include_csproj, patterns),
+            "stamps": {path: _stamp(path) for path in sorted(_watched_paths(roots, patterns))},
+            "files": entries}
+
+
+def manifest_files(manifest, roots, include_csproj=False, patterns=()):
+    """Archivos (dicts de scanner.file_entry) del manifiesto si sigue vigente, o None si algo cambió"""
+    if not manifest or manifest.get("key") != _manifest_key(roots, include_csproj, patterns):
+        return None
+    for path, stamp in manifest["stamps"].items():
+        if _stamp(path) != stamp:
+            return None
+    files = []
+    for entry in manifest["files"]:
+        try:
+            root, rel_path = split_path(roots, entry["path"])
+        except KeyError:
+            return None
+        full_path = os.path.join(root.path, rel_path)
+        try:
+            st = os.stat(full_path)
+        except OSError:
+            return None
+        if st.st_size != entry["size"] or st.st_mtime_ns != entry["mtime_ns"]:
+            return None
+        files.append(file_entry(entry["path"], full_path, st, entry))
+    return files
+
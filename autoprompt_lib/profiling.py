@@ -0,0 +1,197 @@
+"""Instrumentación opcional del generador: fases, tiempos por archivo y contadores.
+
+Por defecto el perfilador activo es un NullProfiler cuyas operaciones no hacen nada, así
+que cada punto de medida cuesta una llamada. Con un Profiler activo (ver activate) se
+registran:
+- fases: intervalos con nombre (escaneo, grafo, render...), también desde otros hilos;
+- tiempos por archivo: lectura, análisis y render de cada archivo;
+- tiempos acumulados sin detalle (escritura de la salida);
+- contadores: bytes leídos y escritos, aciertos del índice y de la caché de bloques.
+
+El resultado se resume en texto o se vuelca como traza de Chrome (JSON para
+chrome://tracing o Perfetto) o, si se pidió cProfile, como archivo pstats. Las lecturas
+hechas en un pool de procesos no se registran: ocurren en otro intérprete.
+"""
+import contextlib
+import cProfile
+import json
+import threading
+import time
+
+_NULL_CONTEXT = contextlib.nullcontext()
+
+
+class NullProfiler:
+    """Perfilador desactivado: misma interfaz que Profiler, sin coste ni registro"""
+
+    enabled = False
+
+    def phase(self, name):
+        return _NULL_CONTEXT
+
+    def timer(self, name, path=None):
+        return _NULL_CONTEXT
+
+    def add_time(self, name, seconds, path=None):
+        pass
+
+    def timed(self, name, path, iterable):
+        return iterable
+
+    def count(self, name, n=1):
+        pass
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+class Profiler(NullProfiler):
+    enabled = True
+
+    def __init__(self, cprofile=False):
+        self.origin = time.perf_counter()
+        self.lock = threading.Lock()
+        self.totals = {}  # fase o temporizador -> [segundos, veces]
+        self.files = {}  # ruta -> {temporizador: segundos}
+        self.counters = {}
+        self.events = []  # (nombre, categoría, inicio, duración, id de hilo, ruta) para la traza
+        self.cprofile = cProfile.Profile() if cprofile else None
+
+    def start(self):
+        if self.cprofile is not None:
+            self.cprofile.enable()
+
+    def stop(self):
+        if self.cprofile is not None:
+            self.cprofile.disable()
+
+    def _record(self, name, category, start, seconds, path):
+        with self.lock:
+            total = self.totals.setdefault(name, [0.0, 0])
+            total[0] += seconds
+            total[1] += 1
+            if path is not None:
+                per_file = self.files.setdefault(path, {})
+                per_file[name] = per_file.get(name, 0.0) + seconds
+            if category is not None:
+                self.events.append((name, category, start - self.origin, seconds, threading.get_ident(), path))
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Intervalo con nombre; aparece en la traza aunque se anide o corra en otro hilo"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, 'phase', start, time.perf_counter() - start, None)
+
+    @contextlib.contextmanager
+    def timer(self, name, path=None):
+        """Tiempo acumulado; con `path` se atribuye al archivo y aparece en la traza"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, 'file' if path is not None else None, start, time.perf_counter() - start, path)
+
+    def add_time(self, name, seconds, path=None):
+        self._record(name, 'file' if path is not None else None, time.perf_counter() - seconds, seconds, path)
+
+    def timed(self, name, path, iterable):
+        """Itera `iterable` midiendo solo el tiempo que pasa dentro de él (no el del consumidor)"""
+        seconds = 0.0
+        first = time.perf_counter()
+        iterator = iter(iterable)
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    seconds += time.perf_counter() - start
+                yield item
+        finally:
+            self._record(name, 'file', first, seconds, path)
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def summary(self, top=10):
+        """Resumen en texto: fases y temporizadores, contadores y archivos más lentos"""
+        lines = [f"{'FASE / TEMPORIZADOR':<28}{'segundos':>10}{'veces':>9}"]
+        with self.lock:
+            totals = sorted(self.totals.items(), key=lambda item: -item[1][0])
+            counters = sorted(self.counters.items())
+            files = sorted(self.files.items(), key=lambda item: -sum(item[1].values()))[:top]
+        for name, (seconds, calls) in totals:
+            lines.append(f"{name:<28}{seconds:>10.3f}{calls:>9}")
+        if counters:
+            lines.append("")
+            lines.append("CONTADORES")
+            for name, value in counters:
+                lines.append(f"{name:<28}{value:>19,}")
+        if files:
+            lines.append("")
+            lines.append(f"ARCHIVOS MÁS LENTOS ({top})")
+            for path, timers in files:
+                detail = ", ".join(f"{name} {seconds:.4f}" for name, seconds in sorted(timers.items()))
+                lines.append(f"{sum(timers.values()):>9.4f}  {path}  ({detail})")
+        return "\n".join(lines)
+
+    def chrome_trace(self):
+        """Eventos en el formato de trazas de Chrome (microsegundos desde el inicio)"""
+        with self.lock:
+            events = list(self.events)
+        trace = []
+        for name, category, start, seconds, thread, path in events:
+            event = {"name": name, "cat": category, "ph": "X", "ts": round(start * 1e6, 1),
+                     "dur": round(seconds * 1e6, 1), "pid": 1, "tid": thread}
+            if path is not None:
+                event["args"] = {"path": path}
+            trace.append(event)
+        return {"traceEvents": trace, "displayTimeUnit": "ms",
+                "otherData": {"counters": dict(self.counters)}}
+
+    def dump(self, path):
+        """Vuelca a `path`: traza de Chrome si termina en .json, si no pstats (requiere cprofile)"""
+        if path.endswith('.json'):
+            with open(path, 'w', encoding='utf-8') as fh:
+                json.dump(self.chrome_trace(), fh)
+            return
+        if self.cprofile is None:
+            raise ValueError("El volcado pstats requiere iniciar el perfilador con cProfile.")
+        self.cprofile.dump_stats(path)
+
+
+active = NullProfiler()
+
+
+def current():
+    """Perfilador activo (NullProfiler si no se activó ninguno)"""
+    return active
+
+
+def activate(profiler):
+    """Instala `profiler` como activo y devuelve el anterior"""
+    global active
+    previous = active
+    active = profiler
+    return previous
+
+
+@contextlib.contextmanager
+def profiled(profiler):
+    """Activa `profiler` (y su cProfile, si lo tiene) durante el bloque"""
+    previous = activate(profiler)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        activate(previous)
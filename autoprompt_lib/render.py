@@ -0,0 +1,329 @@
+import difflib
+import os
+import textwrap
+
+from .blocks import FULL, STRUCTURE, block_key, minified_variant
+from .config import CACHE_FILE_MAX_BYTES, DEDUPE_BLOCKS, DEPENDENTS_HEADER, DIFF_HEADER, FULL_HEADER, QUERY_HEADER, STRUCTURE_HEADER
+from .output import write_chunk
+from .minify import minify as minify_source
+from .parallel import ordered_map
+from .profiling import current as current_profiler
+from .scanner import iter_content_lines, sort_files
+
+BLOCK_FOOTER = '\n]]>\n</file>\n'
+
+
+def strip_lines(lines):
+    """Equivalente en streaming de "".join(lines).strip(): solo retiene la última línea con
+    contenido y las líneas en blanco que la siguen, nunca el archivo entero."""
+    started = False
+    pending = None  # Última línea con contenido, aún sin emitir
+    blanks = []  # Líneas en blanco posteriores a `pending`
+    for line in lines:
+        if not line.strip():
+            if started:
+                blanks.append(line)
+            continue
+        if not started:
+            started = True
+            line = line.lstrip()
+        if pending is not None:
+            yield pending
+            yield from blanks
+        blanks.clear()
+        pending = line
+    if pending is not None:
+        yield pending.rstrip()
+
+
+def block_header(path):
+    return f'<file path="{path}">\n<![CDATA[\n'
+
+
+def iter_block(path, lines):
+    return iter_body_block(path, strip_lines(lines))
+
+
+def iter_body_block(path, body):
+    """Bloque <file> a partir de los fragmentos de su cuerpo ya recortado (ver strip_lines)"""
+    yield block_header(path)
+    yield from body
+    yield BLOCK_FOOTER
+
+
+def ref_block(path, original):
+    """Bloque de un archivo idéntico a otro ya emitido"""
+    return f'<file path="{path}" ref="{original}"/>\n'
+
+
+def chunk_body(lines):
+    """Texto de un fragmento (ver retrieval.py): sus líneas sin la sangría común"""
+    return textwrap.dedent("".join(lines)).strip('\n').rstrip()
+
+
+def chunk_block_header(chunk):
+    """Cabecera <file> de un fragmento, con su rango de líneas y el tipo que lo contiene"""
+    scope = f' scope="{chunk["scope"]}"' if chunk['scope'] else ''
+    return f'<file path="{chunk["file"]["path"]}" lines="{chunk["first"]}-{chunk["last"]}"{scope}>\n<![CDATA[\n'
+
+
+def chunk_line(chunk):
+    """Línea del índice de fragmentos"""
+    return f"- {chunk['file']['path']}:{chunk['first']}-{chunk['last']}\n"
+
+
+def iter_diff_block(path, old_text, new_lines):
+    """Bloque <diff> con el diff unificado de un archivo; None como texto = archivo nuevo/eliminado"""
+    old = old_text.splitlines(keepends=True) if old_text is not None else []
+    new = list(new_lines)
+    yield f'<diff path="{path}">\n<![CDATA[\n'
+    for line in difflib.unified_diff(old, new, f"a/{path}" if old_text is not None else "/dev/null",
+                                     f"b/{path}" if new else "/dev/null"):
+        yield line if line.endswith('\n') else line + '\n\\ No newline at end of file\n'
+    yield ']]>\n</diff>\n'
+
+
+def is_structure_file(f, structure_only):
+    # Solo los .cs se reducen a su estructura; .csproj siempre completo
+    return structure_only and f['name'].endswith('.cs')
+
+
+def file_minify(f, structure_only, minify):
+    """Nivel de minificado que se aplica a un archivo: solo .cs en modo completo"""
+    return None if structure_only or not f['name'].endswith('.cs') else minify
+
+
+def iter_file_block(f, index, structure_only=False):
+    """Bloque <file> de un archivo, línea a línea; el índice evita releer lo ya escaneado"""
+    return iter_block(f['path'], index.iter_content(f['path'], is_structure_file(f, structure_only)))
+
+
+def render_block_job(path, full_path, structure_only, data, structure):
+    """Bloque <file> completo como texto; función de módulo para poder ejecutarse en un pool"""
+    return "".join(iter_block(path, iter_content_lines(full_path, structure_only, data, structure)))
+
+
+def iter_body(full_path, structure_only, data, structure):
+    """Contenido de un bloque (sin cabecera ni cierre) línea a línea"""
+    return strip_lines(iter_content_lines(full_path, structure_only, data, structure))
+
+
+def render_body_job(full_path, structure_only, data, structure, minify=None):
+    """Contenido de un bloque (sin cabecera ni cierre) como texto, para la caché de bloques"""
+    if minify is not None:
+        text = "".join(iter_content_lines(full_path, structure_only, data, structure))
+        return minify_source(text, minify).strip()
+    return "".join(iter_body(full_path, structure_only, data, structure))
+
+
+def current_hash(index, f):
+    """Hash de contenido vigente de un archivo (se reindexa si cambió desde el escaneo); None si no existe"""
+    try:
+        record = index.lookup(f['path'])
+        if record is None:
+            record = index.scan_file(f['path'], f['full_path'], os.stat(f['full_path']))
+    except OSError:
+        return None
+    return record['hash']
+
+
+def iter_codebase(files, index, structure_only=False, executor=None, cache=None, dedupe=DEDUPE_BLOCKS,
+                  minify=None):
+    """Fragmentos de los bloques <file> de `files`, en orden (ver iter_codebase_blocks)"""
+    for _, chunks in iter_codebase_blocks(files, index, structure_only, executor, cache, dedupe, minify):
+        yield from chunks
+
+
+def iter_codebase_blocks(files, index, structure_only=False, executor=None, cache=None, dedupe=DEDUPE_BLOCKS,
+                         minify=None):
+    """(archivo, fragmentos de su bloque <file>) por cada archivo de `files`, en orden.
+
+    Los fragmentos pueden ser un generador perezoso: hay que consumirlos antes de pedir
+    el siguiente bloque. Con `dedupe` un archivo idéntico a otro ya emitido sale como
+    referencia. Con `cache` (blocks.BlockCache) los cuerpos ya renderizados se devuelven
+    como CachedBlock, que output.write_chunk copia sin pasar por Python; los demás se
+    renderizan y se guardan. `minify` (nivel de minify.LEVELS) reduce los .cs del modo completo.
+    Los cuerpos sin minificar se emiten línea a línea (guardándose a la vez en la caché) salvo
+    los que se renderizan en `executor`, que solo son los de hasta CACHE_FILE_MAX_BYTES.
+    """
+    profiler = current_profiler()
+    if not dedupe and cache is None and minify is None:
+        if executor is None:
+            for f in files:
+                yield f, profiler.timed('render', f['full_path'], iter_file_block(f, index, structure_only))
+        else:
+            blocks = iter_blocks_parallel(files, index, structure_only, executor)
+            for f in files:
+                with profiler.timer('render', f['full_path']):
+                    block = next(blocks)
+                yield f, (block,)
+        return
+
+    plan = []  # (archivo, clave, ruta original si es duplicado, cuerpo en caché, en streaming)
+    first_path = {}
+    for f in files:
+        digest = current_hash(index, f)
+        key = None
+        level = file_minify(f, structure_only, minify)
+        if digest is not None:
+            if is_structure_file(f, structure_only):
+                variant = STRUCTURE
+            else:
+                variant = FULL if level is None else minified_variant(level)
+            key = block_key(digest, variant)
+        original = first_path.get(key) if dedupe and key is not None else None
+        cached = None
+        if original is None:
+            if key is not None:
+                first_path.setdefault(key, f['path'])
+                cached = cache.get(key) if cache is not None else None
+        streamed = level is None and (executor is None or f['kb'] * 1024 > CACHE_FILE_MAX_BYTES)
+        plan.append((f, key, original, cached, streamed))
+
+    def jobs():
+        for f, _, original, cached, streamed in plan:
+            if original is None and cached is None and not streamed:
+                data, structure = index.block_inputs(f['path'])
+                yield (f['full_path'], is_structure_file(f, structure_only), data, structure,
+                       file_minify(f, structure_only, minify))
+
+    if executor is None:
+        bodies = (render_body_job(*args) for args in jobs())
+    else:
+        bodies = ordered_map(executor, render_body_job, jobs())
+    for f, key, original, cached, streamed in plan:
+        if original is not None:
+            yield f, (ref_block(f['path'], original),)
+            continue
+        if cached is None and streamed:
+            data, structure = index.block_inputs(f['path'])
+            body = iter_body(f['full_path'], is_structure_file(f, structure_only), data, structure)
+            if cache is not None and key is not None:
+                body = cache.tee(key, body)
+            yield f, profiler.timed('render', f['full_path'], iter_body_block(f['path'], body))
+            continue
+        if cached is None:
+            with profiler.timer('render', f['full_path']):
+                cached = next(bodies)
+            if cache is not None and key is not None:
+                cache.put(key, cached)
+        yield f, (block_header(f['path']), cached, BLOCK_FOOTER)
+
+
+def iter_blocks_parallel(files, index, structure_only, executor):
+    """Renderiza los bloques en el pool y los devuelve en el mismo orden que `files`.
+
+    Cada bloque en vuelo se materializa en memoria; ordered_map limita cuántos hay a la vez.
+    """
+    def jobs():
+        for f in files:
+            data, structure = index.block_inputs(f['path'])
+            yield (f['path'], f['full_path'], is_structure_file(f, structure_only), data, structure)
+    return ordered_map(executor, render_block_job, jobs())
+
+
+def context_header(structure_only=False, minify=None):
+    """Descripción del modo para la cabecera `# CONTEXTO`"""
+    if structure_only:
+        return STRUCTURE_HEADER
+    return FULL_HEADER if minify is None else f"{FULL_HEADER} (MINIFICADO: {minify})"
+
+
+def iter_context(files, prompt, index, structure_only=False, executor=None, cache=None, dedupe=DEDUPE_BLOCKS,
+                 minify=None):
+    """Genera el contexto como una secuencia de fragmentos (texto o blocks.CachedBlock), con memoria acotada.
+
+    Con `executor` los archivos se leen y renderizan en paralelo sin alterar el orden de salida.
+    `cache`, `dedupe` y `minify`: ver iter_codebase_blocks.
+    """
+    yield prompt.strip() + "\n\n"
+
+    # Header según modo
+    header = context_header(structure_only, minify)
+    yield f"# CONTEXTO: {len(files)} ARCHIVOS - {header}\n"
+
+    sorted_sel = sort_files(files)
+
+    for f in sorted_sel:
+        yield f"- {f['path']}\n"
+
+    yield "\n# CONTENIDO\n<codebase>\n"
+
+    yield from iter_codebase(sorted_sel, index, structure_only, executor, cache, dedupe, minify)
+
+    yield "</codebase>"
+
+
+def iter_changes_context(changed, deleted, dependents, prompt, index, since, old_texts=None):
+    """Contexto de solo cambios: archivos modificados (completos, o en diff si hay `old_texts`),
+    eliminados y la estructura de sus dependientes directos. Un texto original None (modificado
+    sin contenido anterior, ver changes.collect_changes) se emite completo en lugar de en diff."""
+    yield prompt.strip() + "\n\n"
+
+    header = DIFF_HEADER if old_texts is not None else FULL_HEADER
+    yield f"# CONTEXTO: {len(changed)} ARCHIVOS CAMBIADOS DESDE {since} - {header}\n"
+    changed = sort_files(changed)
+    unknown = {p for p, text in old_texts.items() if text is None} if old_texts is not None else set()
+    for f in changed:
+        note = " (modificado, sin contenido anterior)" if f['path'] in unknown else ""
+        yield f"- {f['path']}{note}\n"
+    for path in deleted:
+        yield f"- {path} (eliminado)\n"
+
+    dependents = sort_files(dependents)
+    if dependents:
+        yield f"\n# {DEPENDENTS_HEADER}: {len(dependents)} ARCHIVOS\n"
+        for f in dependents:
+            yield f"- {f['path']}\n"
+
+    yield "\n# CONTENIDO\n<codebase>\n"
+    for f in changed:
+        if old_texts is None or f['path'] in unknown:
+            yield from iter_file_block(f, index)
+        else:
+            yield from iter_diff_block(f['path'], old_texts.get(f['path']), index.iter_content(f['path']))
+    if old_texts is not None:
+        for path in deleted:
+            yield from iter_diff_block(path, old_texts.get(path, ""), ())
+    for f in dependents:
+        yield from iter_file_block(f, index, structure_only=True)
+    yield "</codebase>"
+
+
+def iter_query_context(chunks, prompt, index, query):
+    """Contexto de una consulta: un bloque <file> por fragmento (ver retrieval.query_chunks), en el
+    orden de sort_files y de línea para que los de un mismo archivo salgan juntos y leídos una vez"""
+    yield prompt.strip() + "\n\n"
+
+    files = sort_files({c['file']['path']: c['file'] for c in chunks}.values())
+    order = {f['path']: i for i, f in enumerate(files)}
+    chunks = sorted(chunks, key=lambda c: (order[c['file']['path']], c['first']))
+    yield f"# CONTEXTO: {len(chunks)} FRAGMENTOS DE {len(files)} ARCHIVOS - {QUERY_HEADER}: {' '.join(query.split())}\n"
+    for chunk in chunks:
+        yield chunk_line(chunk)
+
+    yield "\n# CONTENIDO\n<codebase>\n"
+    path, lines = None, None
+    for chunk in chunks:
+        if chunk['file']['path'] != path:
+            path = chunk['file']['path']
+            lines = list(index.iter_content(path))
+        yield chunk_block_header(chunk)
+        yield chunk_body(lines[chunk['first'] - 1:chunk['last']])
+        yield BLOCK_FOOTER
+    yield "</codebase>"
+
+
+def render_query_context(out, chunks, prompt, index, query):
+    """Escribe en `out` el contexto de los fragmentos elegidos para `query`"""
+    for chunk in iter_query_context(chunks, prompt, index, query):
+        write_chunk(out, chunk)
+
+
+def render_context(out, files, prompt, index, structure_only=False, executor=None, cache=None,
+                   dedupe=DEDUPE_BLOCKS, minify=None):
+    """Escribe en `out` el prompt, el índice de archivos y el <codebase> de `files`"""
+    for chunk in iter_context(files, prompt, index, structure_only, executor, cache, dedupe, minify):
+        write_chunk(out, chunk)
+    if cache is not None:
+        cache.evict()
@@ -0,0 +1,387 @@
+"""Selección automática por pregunta: índice de fragmentos (tipos y métodos) con BM25.
+
+Cada archivo se parte en fragmentos de declaración (csharp.declaration_spans; los que no
+son .cs, en ventanas de CHUNK_MAX_LINES líneas) y sus términos (identificadores enteros y
+partidos por mayúsculas y guiones bajos, y las palabras de los comentarios) van a una tabla
+FTS5 en el mismo SQLite que el índice del escaneo de cada raíz. Solo se trocean de nuevo
+los archivos cuyo hash cambió. Una consulta puntúa con bm25 (el ámbito y el nombre del
+archivo pesan más que el cuerpo) sin los términos que aparecen en casi todos los fragmentos
+y, si hay un modelo de embeddings local (EMBEDDING_MODEL), reordena los mejores candidatos
+por similitud. Se quedan los K más relevantes que caben en el presupuesto de tokens.
+"""
+import bisect
+import functools
+import heapq
+import os
+import re
+import sqlite3
+import unicodedata
+from array import array
+from itertools import islice
+
+from .config import CHUNK_MAX_LINES, CHUNK_MIN_LINES, EMBEDDING_MODEL, QUERY_TOP_K
+from .csharp import declaration_spans
+from .parallel import ordered_map
+from .profiling import current as current_profiler
+from .render import BLOCK_FOOTER, chunk_block_header, chunk_body, chunk_line
+from .roots import MultiIndex, split_path
+from .scanner import iter_source_lines
+from .tokens import count_tokens, tokenizer_name
+
+CHUNK_VERSION = 1  # Subirlo rehace los fragmentos guardados
+DEFAULT_EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+NAME_WEIGHT = 4.0  # Peso en bm25 del ámbito y el nombre del archivo frente al cuerpo
+MAX_TERM_SHARE = 0.2  # Términos de la consulta presentes en más fragmentos que esta fracción no puntúan
+MAX_RANKED = 50000  # Coincidencias como máximo que puntúa bm25 en una consulta (el coste es lineal)
+CANDIDATES_PER_RESULT = 10  # Candidatos examinados (y reordenados) por fragmento pedido
+RRF_K = 60  # Constante de la fusión por rango recíproco de bm25 y embeddings
+WRITE_BATCH = 512  # Archivos por transacción al poner al día el índice
+
+_WORD_RE = re.compile(r'[^\W\d]\w*')
+_PART_RE = re.compile(r'[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+')
+# Palabras que no distinguen fragmentos: palabras clave de C# y palabras vacías (sin tildes)
+STOPWORDS = frozenset("""
+    abstract as base bool break byte case catch char checked class const continue decimal default
+    delegate do double else enum event explicit extern false finally fixed float for foreach goto if
+    implicit in int interface internal is lock long namespace new null object operator out override
+    params private protected public readonly ref return sbyte sealed short sizeof stackalloc static
+    string struct switch this throw true try typeof uint ulong unchecked unsafe ushort using virtual
+    void volatile while var get set value async await record init yield nameof where summary param
+    returns see cref
+    the an of to and or on be it that with from by at not no what how why when which does do
+    de la el en los las del que un una por con para es se no al lo como su sus este esta esto hay
+    mas pero si ya donde cual cuales porque sobre entre cuando
+""".split())
+
+_embedder = None
+_embedder_name = None
+
+
+def _fold(word):
+    """Minúsculas y sin tildes, como el tokenizador unicode61 de FTS5"""
+    word = word.lower()
+    if word.isascii():
+        return word
+    return ''.join(c for c in unicodedata.normalize('NFKD', word) if not unicodedata.combining(c))
+
+
+@functools.lru_cache(maxsize=65536)
+def _word_terms(word):
+    """Términos de una palabra: ella misma y, si es un identificador compuesto, sus partes"""
+    folded = _fold(word).strip('_')
+    result = [folded] if len(folded) > 1 and folded not in STOPWORDS else []
+    if word.isascii():
+        parts = _PART_RE.findall(word)
+        if len(parts) > 1:
+            result.extend(p for p in map(str.lower, parts) if len(p) > 1 and p not in STOPWORDS)
+    return tuple(result)
+
+
+def terms(text):
+    """Términos de búsqueda de un texto: cada palabra y, si es un identificador compuesto
+    (GetRuleConfig, max_rate), también sus partes (los identificadores se repiten: van por caché)"""
+    return [term for word in _WORD_RE.findall(text) for term in _word_terms(word)]
+
+
+def file_chunks(path, lines):
+    """[(primera línea, última línea, ámbito)] de los fragmentos de un archivo (líneas desde 1).
+
+    Los tramos sin palabras (llaves de cierre) se unen al anterior y los cortos, a los siguientes
+    del mismo ámbito hasta CHUNK_MIN_LINES; los largos se parten en ventanas de CHUNK_MAX_LINES.
+    """
+    if path.endswith('.cs'):
+        starts = [0]  # Posición de inicio de cada línea
+        for line in lines:
+            starts.append(starts[-1] + len(line))
+        spans = [(bisect.bisect_right(starts, start), bisect.bisect_right(starts, end - 1), scope)
+                 for start, end, scope in declaration_spans("".join(lines))]
+    else:
+        spans = [(1, len(lines), '')]
+    merged = []
+    for first, last, scope in spans:
+        if merged:
+            prev_first, prev_last, prev_scope = merged[-1]
+            trivial = not any(_WORD_RE.search(line) for line in lines[first - 1:last])
+            if trivial or (prev_scope == scope and prev_last - prev_first + 1 < CHUNK_MIN_LINES):
+                merged[-1] = (prev_first, last, prev_scope)
+                continue
+        merged.append((first, last, scope))
+    chunks = []
+    for first, last, scope in merged:
+        while first <= last and not lines[first - 1].strip():
+            first += 1
+        while last >= first and not lines[last - 1].strip():
+            last -= 1
+        for start in range(first, last + 1, CHUNK_MAX_LINES):
+            chunks.append((start, min(last, start + CHUNK_MAX_LINES - 1), scope))
+    return chunks
+
+
+def chunk_file_job(path, full_path, data, with_text=False):
+    """Fragmentos de un archivo como filas (primera, última, ámbito, términos del nombre, términos
+    del cuerpo, tokens, texto o None); None si no se puede leer. Función de módulo para el pool"""
+    try:
+        lines = list(iter_source_lines(full_path, data))
+    except OSError:
+        return None
+    names = os.path.splitext(os.path.basename(path))[0]
+    rows = []
+    for first, last, scope in file_chunks(path, lines):
+        body = chunk_body(lines[first - 1:last])
+        rows.append((first, last, scope, ' '.join(terms(f"{scope} {names}")), ' '.join(terms(body)),
+                     count_tokens(body), body if with_text else None))
+    return rows
+
+
+def _load_embedder():
+    """Resuelve EMBEDDING_MODEL: (función textos -> vectores normalizados en bytes, nombre) o (None, '')"""
+    if not EMBEDDING_MODEL:
+        return None, ''
+    auto = EMBEDDING_MODEL == 'auto'
+    name = DEFAULT_EMBEDDING_MODEL if auto else EMBEDDING_MODEL
+    try:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(name, local_files_only=True)  # Sin red: solo modelos ya descargados
+    except ImportError:
+        if auto:
+            return None, ''
+        raise ValueError("EMBEDDING_MODEL requiere el paquete 'sentence-transformers' (pip install sentence-transformers).")
+    except (OSError, ValueError) as e:
+        if auto:
+            return None, ''
+        raise ValueError(f"No se pudo cargar el modelo de embeddings {name!r} en local: {e}")
+
+    def embed(texts):
+        return [array('f', map(float, vector)).tobytes()
+                for vector in model.encode(list(texts), normalize_embeddings=True)]
+    return embed, f"st:{name}"
+
+
+def embedder():
+    """(embed, nombre) del modelo de embeddings activo; embed es None sin modelo"""
+    global _embedder, _embedder_name
+    if _embedder_name is None:
+        _embedder, _embedder_name = _load_embedder()
+    return _embedder, _embedder_name
+
+
+class ChunkIndex:
+    """Fragmentos y términos de los archivos de un ScanIndex, en su mismo SQLite (en memoria si no persiste)"""
+
+    def __init__(self, index):
+        self.index = index
+        try:
+            if index.db_path:
+                os.makedirs(os.path.dirname(index.db_path) or '.', exist_ok=True)
+            self.conn = sqlite3.connect(index.db_path or ':memory:')
+            self._prepare()
+        except sqlite3.Error as e:
+            raise ValueError(f"No se pudo abrir el índice de fragmentos ({index.db_path or 'memoria'}): {e}")
+
+    def _prepare(self):
+        conn = self.conn
+        # Los fragmentos dependen del troceado, del tokenizador y del modelo de embeddings
+        schema = f"{CHUNK_VERSION}/{CHUNK_MIN_LINES}:{CHUNK_MAX_LINES}/{tokenizer_name()}/{embedder()[1]}"
+        with conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            row = conn.execute("SELECT value FROM meta WHERE key = 'chunks'").fetchone()
+            if row is None or row[0] != schema:
+                for table in ('chunk_files', 'chunks', 'chunk_terms'):
+                    conn.execute(f"DROP TABLE IF EXISTS {table}")
+                conn.execute("INSERT OR REPLACE INTO meta VALUES ('chunks', ?)", (schema,))
+            conn.execute("CREATE TABLE IF NOT EXISTS chunk_files (path TEXT PRIMARY KEY, hash TEXT)")
+            conn.execute("CREATE TABLE IF NOT EXISTS chunks (id INTEGER PRIMARY KEY, path TEXT, first_line INTEGER, "
+                         "last_line INTEGER, scope TEXT, tokens INTEGER, vector BLOB)")
+            conn.execute("CREATE INDEX IF NOT EXISTS chunks_path ON chunks (path)")
+            exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'chunk_terms'").fetchone()
+            if not exists:
+                try:
+                    conn.execute("CREATE VIRTUAL TABLE chunk_terms USING fts5(names, body)")
+                except sqlite3.OperationalError as e:
+                    raise ValueError(f"Las consultas necesitan SQLite con FTS5: {e}")
+                conn.execute("INSERT INTO chunk_terms (chunk_terms, rank) VALUES ('rank', ?)",
+                             (f"bm25({NAME_WEIGHT}, 1.0)",))
+        conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS temp.chunk_vocab USING fts5vocab(main, chunk_terms, 'row')")
+
+    def close(self):
+        self.conn.close()
+
+    def update(self, files, executor=None, evict=True):
+        """Trocea los archivos de `files` cuyo hash cambió desde la última vez; con `evict` olvida
+        los fragmentos de los que ya no están (no debe usarse con un escaneo parcial)"""
+        try:
+            known = dict(self.conn.execute("SELECT path, hash FROM chunk_files"))
+            current = {f['path']: f for f in files}
+            stale = [f for path, f in current.items() if known.get(path) != f['hash']]
+            gone = [(path,) for path in known if path not in current] if evict else []
+            if not stale and not gone:
+                return
+            embed = embedder()[0]
+            jobs = ((f['path'], f['full_path'], self.index.block_inputs(f['path'])[0], embed is not None)
+                    for f in stale)
+            if executor is None:
+                results = (chunk_file_job(*args) for args in jobs)
+            else:
+                results = ordered_map(executor, chunk_file_job, jobs)
+            next_id = (self.conn.execute("SELECT MAX(id) FROM chunks").fetchone()[0] or 0) + 1
+            batch = []
+            for f, rows in zip(stale, results):
+                if rows is not None:
+                    batch.append((f, rows))
+                if len(batch) >= WRITE_BATCH:
+                    next_id = self._write(batch, next_id, embed)
+                    batch = []
+            self._write(batch, next_id, embed, gone)
+        except sqlite3.Error as e:
+            raise ValueError(f"No se pudo actualizar el índice de fragmentos ({self.index.db_path or 'memoria'}): {e}")
+
+    def _write(self, batch, next_id, embed, gone=()):
+        """Sustituye en una transacción los fragmentos de los archivos de `batch` y borra los de `gone`"""
+        vectors = iter(embed([row[6] for _, rows in batch for row in rows])) if embed is not None else None
+        chunk_rows, term_rows = [], []
+        for f, rows in batch:
+            for first, last, scope, names, body, tokens, _ in rows:
+                chunk_rows.append((next_id, f['path'], first, last, scope, tokens,
+                                   next(vectors) if vectors is not None else None))
+                term_rows.append((next_id, names, body))
+                next_id += 1
+        paths = [(f['path'],) for f, _ in batch] + list(gone)
+        with self.conn as conn:
+            conn.executemany("DELETE FROM chunk_terms WHERE rowid IN (SELECT id FROM chunks WHERE path = ?)", paths)
+            conn.executemany("DELETE FROM chunks WHERE path = ?", paths)
+            conn.executemany("DELETE FROM chunk_files WHERE path = ?", gone)
+            conn.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?, ?, ?, ?)", chunk_rows)
+            conn.executemany("INSERT INTO chunk_terms (rowid, names, body) VALUES (?, ?, ?)", term_rows)
+            conn.executemany("INSERT OR REPLACE INTO chunk_files VALUES (?, ?)", [(f['path'], f['hash']) for f, _ in batch])
+        current_profiler().count('chunks.files', len(batch))
+        current_profiler().count('chunks.rows', len(chunk_rows))
+        return next_id
+
+    def _plan(self, words):
+        """(términos a buscar, si se ordenan por bm25): de los más raros a los más comunes, sin los
+        que están en más de MAX_TERM_SHARE de los fragmentos y mientras sus coincidencias no pasen
+        de MAX_RANKED (puntuar cuesta por coincidencia); si ni el más raro cabe, se busca solo ese
+        y sin ordenar"""
+        total = self.conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        docs = []
+        for word in words:
+            row = self.conn.execute("SELECT doc FROM chunk_vocab WHERE term = ?", (word,)).fetchone()
+            if row is not None:
+                docs.append((row[0], word))
+        chosen, matched = [], 0
+        for count, word in sorted(docs):
+            if chosen and (count > total * MAX_TERM_SHARE or matched + count > MAX_RANKED):
+                break
+            chosen.append(word)
+            matched += count
+        return chosen, matched <= MAX_RANKED
+
+    def search(self, words):
+        """(rango bm25, ruta, primera, última, ámbito, tokens, vector) de los fragmentos con alguno de
+        los términos, de más a menos relevante (rango menor = mejor) y, a igual rango, por ruta y
+        línea. Si hay demasiadas coincidencias para puntuarlas (ver _plan) el rango es 0 y el
+        orden solo por ruta y línea, para que los candidatos no dependan del orden de inserción."""
+        try:
+            words, ranked = self._plan(words)
+            if not words:
+                return
+            cursor = self.conn.execute(
+                f"SELECT chunk_terms.rowid, {'chunk_terms.rank' if ranked else '0'} FROM chunk_terms "
+                f"JOIN chunks ON chunks.id = chunk_terms.rowid WHERE chunk_terms MATCH ? "
+                f"ORDER BY {'chunk_terms.rank, ' if ranked else ''}chunks.path, chunks.first_line",
+                (' OR '.join(f'"{w}"' for w in words),))
+            for hits in iter(lambda: cursor.fetchmany(256), []):
+                rows = {row[0]: row[1:] for row in self.conn.execute(
+                    f"SELECT id, path, first_line, last_line, scope, tokens, vector FROM chunks "
+                    f"WHERE id IN ({', '.join('?' * len(hits))})", [rowid for rowid, _ in hits])}
+                for rowid, rank in hits:
+                    yield (rank, *rows[rowid])
+        except sqlite3.Error as e:
+            raise ValueError(f"No se pudo consultar el índice de fragmentos ({self.index.db_path or 'memoria'}): {e}")
+
+
+class MultiChunkIndex:
+    """ChunkIndex de cada raíz de un roots.MultiIndex; los resultados se mezclan por rango bm25"""
+
+    def __init__(self, index):
+        self.roots = index.roots
+        self.parts = {}
+        try:
+            for root in self.roots:
+                self.parts[root.name] = ChunkIndex(index.part(root))
+        except ValueError:
+            self.close()
+            raise
+
+    def close(self):
+        for part in self.parts.values():
+            part.close()
+
+    def update(self, files, executor=None, evict=True):
+        groups = {root.name: [] for root in self.roots}
+        for f in files:
+            root, rel_path = split_path(self.roots, f['path'])
+            groups[root.name].append(dict(f, path=rel_path))
+        for root in self.roots:
+            self.parts[root.name].update(groups[root.name], executor, evict)
+
+    def search(self, words):
+        return heapq.merge(*(_prefixed(self.parts[root.name].search(words), root) for root in self.roots),
+                           key=lambda hit: hit[0])
+
+
+def _prefixed(hits, root):
+    for rank, path, *rest in hits:
+        yield (rank, root.prefixed(path), *rest)
+
+
+def chunk_index(index):
+    """Índice de fragmentos de un ScanIndex o de un roots.MultiIndex (hay que cerrarlo con close())"""
+    return MultiChunkIndex(index) if isinstance(index, MultiIndex) else ChunkIndex(index)
+
+
+def _rerank(candidates, query, embed):
+    """Candidatos reordenados por fusión de rangos: bm25 y similitud de su vector con el de la consulta"""
+    target = array('f')
+    target.frombytes(embed([query])[0])
+
+    def similarity(hit):
+        if hit[6] is None:
+            return -1.0
+        vector = array('f')
+        vector.frombytes(hit[6])
+        return sum(a * b for a, b in zip(target, vector))
+
+    by_similarity = sorted(range(len(candidates)), key=lambda i: similarity(candidates[i]), reverse=True)
+    similarity_rank = {i: rank for rank, i in enumerate(by_similarity)}
+    fused = sorted(range(len(candidates)), key=lambda i: 1 / (RRF_K + i) + 1 / (RRF_K + similarity_rank[i]),
+                   reverse=True)
+    return [candidates[i] for i in fused]
+
+
+def query_chunks(chunks, query, files, budget, top_k=QUERY_TOP_K):
+    """Hasta `top_k` fragmentos de `files` relevantes para `query` que caben juntos en `budget` tokens
+    (con su cabecera), de más a menos relevante, como dicts {"file", "first", "last", "scope", "tokens"}.
+
+    `chunks` es un índice de chunk_index ya puesto al día con update().
+    """
+    words = list(dict.fromkeys(terms(query)))
+    if not words:
+        raise ValueError(f"La consulta no tiene términos que buscar: {query!r}")
+    by_path = {f['path']: f for f in files}
+    hits = (hit for hit in chunks.search(words) if hit[1] in by_path)
+    candidates = list(islice(hits, top_k * CANDIDATES_PER_RESULT))
+    embed = embedder()[0]
+    if embed is not None and candidates:
+        candidates = _rerank(candidates, query, embed)
+    chosen = []
+    remaining = budget
+    for _, path, first, last, scope, tokens, _ in candidates:
+        chunk = {"file": by_path[path], "first": first, "last": last, "scope": scope, "tokens": tokens}
+        cost = tokens + count_tokens(chunk_line(chunk) + chunk_block_header(chunk) + BLOCK_FOOTER)
+        if cost <= remaining:
+            chosen.append(chunk)
+            remaining -= cost
+            if len(chosen) >= top_k:
+                break
+    return chosen
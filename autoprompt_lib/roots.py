@@ -0,0 +1,241 @@
+"""Varias raíces (repos hermanos) en un mismo contexto.
+
+Cada raíz tiene nombre, ruta, extensiones y reglas de filtrado propias, y su propio
+índice persistente (default_index_path de su ruta), así que añadir o quitar una raíz no
+invalida las demás. Sus archivos aparecen como `nombre/ruta relativa`; con el nombre de
+carpeta por defecto, las referencias entre .csproj de repos hermanos (../otro/X.csproj)
+se resuelven también en el grafo. Con una sola raíz sin nombre todo se comporta como
+antes: rutas sin prefijo y un ScanIndex normal.
+"""
+import os
+import queue
+import threading
+
+from .config import EXCLUDE, EXTENSIONS, INCLUDE, ROOT_DIR, ROOTS, USE_GITIGNORE
+from .ignore import PathFilter
+from .profiling import current as current_profiler
+from .scanner import ScanIndex, default_index_path, iter_scan_files
+
+_DONE = object()  # Fin del escaneo de una raíz en la cola de iter_scan_roots
+
+
+class Root:
+    """Una raíz del escaneo; `name` None es la raíz única sin prefijo"""
+
+    def __init__(self, name, path, extensions=None, include=INCLUDE, exclude=EXCLUDE, gitignore=USE_GITIGNORE,
+                 path_filter=None):
+        self.name = name
+        self.path = path
+        self.extensions = list(extensions) if extensions else list(EXTENSIONS)
+        self.path_filter = path_filter or PathFilter(path, include=include, exclude=exclude, gitignore=gitignore)
+
+    def prefixed(self, rel_path):
+        return rel_path if self.name is None else os.path.join(self.name, rel_path)
+
+
+def make_roots(spec=ROOTS, root_dir=ROOT_DIR, include=INCLUDE, exclude=EXCLUDE, gitignore=USE_GITIGNORE):
+    """Raíces a partir de ROOTS ({nombre: ruta} o {nombre: {"path", "extensions", "include",
+    "exclude", "gitignore"}}); sin `spec`, solo root_dir sin prefijo.
+
+    Los filtros globales se aplican a todas: "include" de la raíz sustituye al global y su
+    "exclude" se suma.
+    """
+    if not spec:
+        return [Root(None, root_dir, include=include, exclude=exclude, gitignore=gitignore)]
+    roots = []
+    for name, options in spec.items():
+        if not name or '/' in name or os.sep in name or name in ('.', '..'):
+            raise ValueError(f"Nombre de raíz no válido: {name!r}")
+        if isinstance(options, str):
+            options = {"path": options}
+        if not os.path.isdir(options["path"]):
+            raise ValueError(f"La raíz {name!r} no es un directorio: {options['path']}")
+        roots.append(Root(name, options["path"], options.get("extensions"),
+                          options.get("include") or include, list(exclude) + list(options.get("exclude", ())),
+                          options.get("gitignore", gitignore)))
+    return roots
+
+
+def parse_root_args(values):
+    """{nombre: ruta} de argumentos 'RUTA' o 'NOMBRE=RUTA' (el nombre por defecto es la carpeta)"""
+    spec = {}
+    for value in values:
+        name, sep, path = value.partition('=')
+        if not sep:
+            path = value
+            name = os.path.basename(os.path.normpath(os.path.abspath(value)))
+        if name in spec:
+            raise ValueError(f"Raíz repetida: {name!r} (usa NOMBRE=RUTA)")
+        spec[name] = path
+    return spec
+
+
+def split_path(roots, path):
+    """(raíz, ruta relativa a ella) de una ruta del modelo"""
+    if len(roots) == 1 and roots[0].name is None:
+        return roots[0], path
+    name, _, rel_path = path.partition(os.sep)
+    for root in roots:
+        if root.name == name:
+            return root, rel_path
+    raise KeyError(path)
+
+
+class MultiIndex:
+    """Índice de varias raíces con la interfaz de ScanIndex: cada operación va al índice
+    de la raíz según el prefijo de la ruta. Los índices se cargan al primer uso, así que
+    el escaneo en paralelo de iter_scan_roots también los carga en paralelo."""
+
+    def __init__(self, roots):
+        self.roots = roots
+        self.indexes = {}  # nombre de raíz -> ScanIndex
+        self.lock = threading.Lock()
+
+    def part(self, root):
+        index = self.indexes.get(root.name)
+        if index is None:
+            index = ScanIndex(root.path, default_index_path(root.path))
+            with self.lock:
+                index = self.indexes.setdefault(root.name, index)
+        return index
+
+    def _split(self, path):
+        root, rel_path = split_path(self.roots, path)
+        return root, self.part(root), rel_path
+
+    def lookup(self, path, st=None):
+        _, index, rel_path = self._split(path)
+        return index.lookup(rel_path, st)
+
+    def scan_file(self, path, full_path, st):
+        _, index, rel_path = self._split(path)
+        return index.scan_file(rel_path, full_path, st)
+
+    def store(self, path, record):
+        _, index, rel_path = self._split(path)
+        return index.store(rel_path, record)
+
+    def discard(self, path):
+        _, index, rel_path = self._split(path)
+        index.discard(rel_path)
+
+    def facts(self, path):
+        _, index, rel_path = self._split(path)
+        return index.facts(rel_path)
+
+    def derive(self, paths, derived, executor=None):
+        records = {}
+        for root, rel_paths in self._group(paths).items():
+            records.update((root.prefixed(p), record)
+                           for p, record in self.part(root).derive(rel_paths, derived, executor).items())
+        return records
+
+    def block_inputs(self, path):
+        _, index, rel_path = self._split(path)
+        return index.block_inputs(rel_path)
+
+    def iter_content(self, path, structure_only=False):
+        _, index, rel_path = self._split(path)
+        return index.iter_content(rel_path, structure_only)
+
+    def flush(self):
+        for index in list(self.indexes.values()):
+            index.flush()
+
+    def last_run_hashes(self):
+        hashes = {}
+        for root in self.roots:
+            hashes.update((root.prefixed(p), digest) for p, digest in self.part(root).last_run_hashes().items())
+        return hashes
+
+    def last_run_texts(self, paths):
+        texts = {}
+        for root, rel_paths in self._group(paths).items():
+            texts.update((root.prefixed(p), text) for p, text in self.part(root).last_run_texts(rel_paths).items())
+        return texts
+
+    def enable_snapshots(self):
+        for root in self.roots:
+            self.part(root).enable_snapshots()
+
+    def record_run(self, files):
+        by_root = {root: [] for root in self.roots}
+        for f in files:
+            root, rel_path = split_path(self.roots, f['path'])
+            by_root[root].append({"path": rel_path, "hash": f['hash']})
+        for root, root_files in by_root.items():
+            self.part(root).record_run(root_files)
+
+    def _group(self, paths):
+        groups = {}
+        for path in paths:
+            root, rel_path = split_path(self.roots, path)
+            groups.setdefault(root, []).append(rel_path)
+        return groups
+
+
+def roots_index(roots):
+    """ScanIndex para la raíz única sin prefijo; MultiIndex en otro caso"""
+    if len(roots) == 1 and roots[0].name is None:
+        return ScanIndex(roots[0].path, default_index_path(roots[0].path))
+    return MultiIndex(roots)
+
+
+def index_roots(index, root_dir, path_filter=None):
+    """Raíces de `index`: las de un MultiIndex, o root_dir como raíz única"""
+    if isinstance(index, MultiIndex):
+        return index.roots
+    return [Root(None, root_dir, path_filter=path_filter)]
+
+
+def _prefix_entry(f, root):
+    f['path'] = root.prefixed(f['path'])
+    f['directory'] = os.path.dirname(f['path'])
+    return f
+
+
+def iter_scan_roots(roots, index, include_csproj=False, executor=None, cancel=None):
+    """Como scanner.iter_scan_files para todas las raíces, con las rutas prefijadas.
+
+    Con varias raíces cada una se recorre en su propio hilo (compartiendo `executor` para
+    las lecturas) y los archivos llegan intercalados según se descubren.
+    """
+    if not isinstance(index, MultiIndex):
+        root = roots[0]
+        yield from iter_scan_files(root.path, include_csproj, index, executor, cancel, root.path_filter,
+                                   root.extensions)
+        return
+
+    results = queue.Queue()
+    stop = cancel if cancel is not None else threading.Event()
+    profiler = current_profiler()
+
+    def scan(root):
+        try:
+            with profiler.phase(f'scan.{root.name}'):
+                for f in iter_scan_files(root.path, include_csproj, index.part(root), executor, stop,
+                                         root.path_filter, root.extensions):
+                    results.put(_prefix_entry(f, root))
+        except Exception as e:
+            results.put(e)
+        finally:
+            results.put(_DONE)
+
+    threads = [threading.Thread(target=scan, args=(root,), daemon=True) for root in roots]
+    for thread in threads:
+        thread.start()
+    try:
+        running = len(threads)
+        while running:
+            item = results.get()
+            if item is _DONE:
+                running -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield item
+    finally:
+        if cancel is None:
+            stop.set()  # Consumidor que abandona o error: que los demás hilos terminen
+        for thread in threads:
+            thread.join()
@@ -0,0 +1,625 @@
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import zlib
+
+from .config import (CACHE_DIR, CACHE_FILE_MAX_BYTES, CACHE_TOTAL_MAX_BYTES, EXTENSIONS, INDEX_FILE,
+                     MINIFY_MAX_BODY_LINES, READ_CHUNK, ROOT_DIR)
+from .csharp import FACTS_VERSION, OUTLINE_VERSION, file_facts, iter_tokens, outline_lines, project_facts
+from .ignore import GITIGNORE, PathFilter
+from .minify import MINIFY_VERSION, minify_savings
+from .parallel import ordered_map
+from .profiling import current as current_profiler
+from .tokens import count_lines_tokens, count_tokens, tokenizer_name
+
+# Columnas del índice que solo se calculan cuando un modo las pide (ver ScanIndex.derive)
+STRUCTURE = 'structure'  # Estructura y sus tokens: modo estructura
+FACTS = 'facts'  # Datos del grafo de dependencias (.cs y .csproj): semillas y solo cambios
+MINIFIED = 'minified'  # Ahorro de cada nivel de minificado: presupuesto y estadísticas minificados
+DERIVED = (STRUCTURE, FACTS, MINIFIED)
+
+
+def walk_source_files(root_dir, exts, path_filter=None):
+    """Recorre root_dir con os.scandir y devuelve (DirEntry, stat) de cada archivo con extensión válida.
+
+    `path_filter` (ignore.PathFilter; por defecto el de config) decide qué carpetas se
+    recorren y qué archivos se devuelven; las carpetas excluidas no llegan a listarse.
+    """
+    if path_filter is None:
+        path_filter = PathFilter(root_dir)
+    exts = tuple(exts)
+    profiler = current_profiler()
+    pending = [(root_dir, '', path_filter.base_rules())]  # (ruta, ruta relativa con '/', reglas heredadas)
+    while pending:
+        current, rel_dir, rules = pending.pop()
+        try:
+            with os.scandir(current) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.name == GITIGNORE:
+                rules = path_filter.dir_rules(rel_dir, rules, entry.path)
+                break
+        for entry in entries:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                if entry.is_dir():
+                    # Igual que os.walk: no se desciende por enlaces simbólicos
+                    if entry.is_symlink():
+                        continue
+                    if path_filter.keep_dir(rules, rel_path, entry.name):
+                        pending.append((entry.path, rel_path, rules))
+                    else:
+                        profiler.count('dirs.pruned')
+                elif entry.name.endswith(exts) and entry.is_file() and path_filter.keep_file(rules, rel_path, entry.name):
+                    yield entry, entry.stat()
+            except OSError:
+                continue
+
+
+def count_lines(data):
+    """Cuenta líneas como lo haría iterar el archivo en modo texto"""
+    lines = data.count(b'\n')
+    if data and not data.endswith(b'\n'):
+        lines += 1
+    return lines
+
+
+def content_hash():
+    """Hash de contenido de los archivos (BLAKE2b de 128 bits sobre los bytes en disco)"""
+    return hashlib.blake2b(digest_size=16)
+
+
+class _CountingReader(io.RawIOBase):
+    """Envoltorio binario que calcula hash y saltos de línea de lo que se va leyendo"""
+
+    def __init__(self, raw, digest):
+        self.raw = raw
+        self.digest = digest
+        self.newlines = 0
+        self.last = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = self.raw.readinto(buffer)
+        if n:
+            chunk = memoryview(buffer)[:n]
+            self.digest.update(chunk)
+            self.newlines += bytes(chunk).count(b'\n')
+            self.last = bytes(chunk[-1:])
+        return n
+
+    def lines(self):
+        return self.newlines + (1 if self.last and self.last != b'\n' else 0)
+
+
+def read_and_count(full_path, size):
+    """Lee el archivo una sola vez: (líneas, bytes o None si es demasiado grande, hash, tokens).
+
+    Los archivos grandes no se retienen: se decodifican en streaming con la misma normalización
+    que el modo texto mientras se calculan hash, líneas y tokens.
+    """
+    digest = content_hash()
+    current_profiler().count('bytes.read', size)
+    with open(full_path, 'rb', buffering=0) as f:
+        if size <= CACHE_FILE_MAX_BYTES:
+            data = f.readall()
+            digest.update(data)
+            return count_lines(data), data, digest.hexdigest(), count_tokens(decode_source(data))
+        reader = _CountingReader(f, digest)
+        text = io.TextIOWrapper(io.BufferedReader(reader, READ_CHUNK), encoding='utf-8', errors='replace')
+        tokens = count_lines_tokens(text)
+        return reader.lines(), None, digest.hexdigest(), tokens
+
+
+def iter_source_lines(full_path, data=None):
+    """Líneas del archivo desde los bytes ya leídos o, si no se retuvieron, leyendo el disco en streaming"""
+    if data is not None:
+        yield from decode_source(data).splitlines(keepends=True)
+        return
+    with open(full_path, 'r', encoding='utf-8', errors='replace') as src:
+        current_profiler().count('bytes.read', os.fstat(src.fileno()).st_size)
+        yield from src
+
+
+def decode_source(data):
+    """Decodifica bytes leídos en binario con la misma normalización de saltos de línea que el modo texto"""
+    return data.decode('utf-8', errors='replace').replace('\r\n', '\n').replace('\r', '\n')
+
+
+def file_structure(full_path, data=None):
+    """Estructura de un .cs (ver csharp.outline), tokenizado línea a línea. Los archivos mayores
+    que CACHE_FILE_MAX_BYTES no se analizan: su lista de tokens no cabría en memoria acotada."""
+    size = len(data) if data is not None else os.path.getsize(full_path)
+    if size > CACHE_FILE_MAX_BYTES:
+        return f"// (Estructura omitida: archivo de {size // 1024} KB)"
+    return outline_lines(iter_source_lines(full_path, data))
+
+
+def file_minify_savings(full_path, data=None):
+    """minify.minify_savings de un .cs, o None (cuenta como sin minificar) si es mayor que
+    CACHE_FILE_MAX_BYTES: el minificador trabaja sobre el texto entero"""
+    size = len(data) if data is not None else os.path.getsize(full_path)
+    if size > CACHE_FILE_MAX_BYTES:
+        return None
+    return minify_savings("".join(iter_source_lines(full_path, data)))
+
+
+def read_file_record(full_path, size, mtime_ns):
+    """Lee un archivo una sola vez: líneas, bytes retenibles, hash y tokens.
+
+    Lo que solo algunos modos necesitan (estructura, datos del grafo, ahorros de minificado) no
+    se calcula aquí sino al pedirlo (ver ScanIndex.derive). Es una función de módulo sin estado
+    para poder ejecutarse en un pool de hilos o procesos.
+    """
+    with current_profiler().timer('read', full_path):
+        lines, data, digest, tokens = read_and_count(full_path, size)
+    return {"size": size, "mtime_ns": mtime_ns, "lines": lines, "structure": None,
+            "tokens": tokens, "struct_tokens": None, "hash": digest, "facts": None,
+            "minified": None, "derived": "", "data": data}
+
+
+def _read_file_record_job(full_path, size, mtime_ns):
+    try:
+        return read_file_record(full_path, size, mtime_ns)
+    except OSError:
+        return None
+
+
+def derive_columns(full_path, data, derived):
+    """Valores de las columnas derivadas `derived` (ver DERIVED) de un archivo; función de módulo
+    para poder ejecutarse en un pool"""
+    values = {}
+    with current_profiler().timer('derive', full_path):
+        if STRUCTURE in derived and full_path.endswith('.cs'):
+            structure = file_structure(full_path, data)
+            values.update(structure=structure, struct_tokens=count_tokens(structure))
+        if FACTS in derived:
+            facts = None
+            if full_path.endswith('.cs'):
+                facts = file_facts(iter_tokens(iter_source_lines(full_path, data)))
+            elif full_path.endswith('.csproj'):
+                facts = project_facts("".join(iter_source_lines(full_path, data)))
+            values["facts"] = json.dumps(facts, separators=(',', ':')) if facts is not None else None
+        if MINIFIED in derived and full_path.endswith('.cs'):
+            savings = file_minify_savings(full_path, data)
+            values["minified"] = json.dumps(savings, separators=(',', ':')) if savings is not None else None
+    return values
+
+
+def _derive_columns_job(full_path, data, derived):
+    try:
+        return derive_columns(full_path, data, derived)
+    except OSError:
+        return None
+
+
+class ScanIndex:
+    """Índice del escaneo por ruta relativa: size, mtime, líneas, tokens y estructura.
+
+    Se persiste en SQLite (INDEX_FILE) para que un arranque en caliente solo lea
+    los archivos cuyo stat cambió. Los bytes leídos se retienen solo en memoria.
+    """
+
+    SCHEMA_VERSION = 7
+    # Columnas persistidas además de `path`; "data" vive solo en memoria. "derived" lista las
+    # columnas de DERIVED ya calculadas (separadas por comas): las demás valen None
+    COLUMNS = ('size', 'mtime_ns', 'lines', 'structure', 'tokens', 'struct_tokens', 'hash', 'facts', 'minified',
+               'derived')
+
+    def __init__(self, root_dir, db_path=None):
+        self.root_dir = root_dir
+        self.db_path = db_path
+        self.records = {}  # rel_path -> {columna: valor, ..., "data": bytes o None}
+        self.dirty = set()
+        self.removed = set()
+        self.cached_bytes = 0
+        if db_path:
+            self._load()
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        # Estructuras, tokens y ahorros de minificado dependen del extractor, del tokenizador y
+        # del minificador: si cambian, se reindexa
+        schema = (f"{self.SCHEMA_VERSION}/{OUTLINE_VERSION}/{FACTS_VERSION}/{tokenizer_name()}"
+                  f"/{MINIFY_VERSION}:{MINIFY_MAX_BODY_LINES}")
+        row = conn.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+        if row is None or row[0] != schema:
+            conn.execute("DROP TABLE IF EXISTS files")
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('schema', ?)", (schema,))
+        conn.execute(f"CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, {', '.join(self.COLUMNS)})")
+        # Contenido de cada archivo en la última generación (zlib), para "cambios desde la última vez"
+        conn.execute("CREATE TABLE IF NOT EXISTS last_run (path TEXT PRIMARY KEY, hash TEXT, content BLOB)")
+        return conn
+
+    def _load(self):
+        with current_profiler().phase('index.load'):
+            try:
+                conn = self._connect()
+                try:
+                    rows = conn.execute(f"SELECT path, {', '.join(self.COLUMNS)} FROM files").fetchall()
+                finally:
+                    conn.close()
+            except sqlite3.Error:
+                return  # Índice corrupto o ilegible: se reconstruye en el próximo flush
+            for path, *values in rows:
+                record = dict(zip(self.COLUMNS, values))
+                record["data"] = None
+                self.records[path] = record
+
+    def lookup(self, rel_path, st=None):
+        """Registro vigente de rel_path, o None si el archivo cambió o ya no existe desde que se indexó"""
+        record = self.records.get(rel_path)
+        if record is None:
+            return None
+        if st is None:
+            try:
+                st = os.stat(os.path.join(self.root_dir, rel_path))
+            except OSError:
+                return None
+        if record["size"] != st.st_size or record["mtime_ns"] != st.st_mtime_ns:
+            return None
+        return record
+
+    def scan_file(self, rel_path, full_path, st):
+        """Devuelve el registro del archivo, leyendo el disco solo si el stat cambió"""
+        record = self.lookup(rel_path, st)
+        if record is not None:
+            current_profiler().count('index.hit')
+            return record
+        current_profiler().count('index.miss')
+        return self.store(rel_path, read_file_record(full_path, st.st_size, st.st_mtime_ns))
+
+    def store(self, rel_path, record):
+        """Registra el resultado de read_file_record (posiblemente leído en otro hilo o proceso)"""
+        old = self.records.get(rel_path)
+        if old and old["data"] is not None:
+            self.cached_bytes -= len(old["data"])
+        data = record["data"]
+        if data is not None and self.cached_bytes + len(data) > CACHE_TOTAL_MAX_BYTES:
+            record["data"] = None
+        elif data is not None:
+            self.cached_bytes += len(data)
+
+        self.records[rel_path] = record
+        self.dirty.add(rel_path)
+        self.removed.discard(rel_path)
+        return record
+
+    def evict_missing(self, seen, exts):
+        """Elimina las entradas con extensión escaneada que ya no aparecieron en disco"""
+        exts = tuple(exts)
+        for rel_path in [p for p in self.records if p.endswith(exts) and p not in seen]:
+            self.discard(rel_path)
+
+    def discard(self, rel_path):
+        """Olvida rel_path (borrado del disco); se elimina de SQLite en el próximo flush"""
+        record = self.records.pop(rel_path, None)
+        if record is None:
+            return
+        if record["data"] is not None:
+            self.cached_bytes -= len(record["data"])
+        self.dirty.discard(rel_path)
+        self.removed.add(rel_path)
+
+    def flush(self):
+        """Escribe en SQLite solo las entradas modificadas o eliminadas"""
+        if not self.db_path or not (self.dirty or self.removed):
+            return
+        try:
+            with current_profiler().phase('index.flush'):
+                conn = self._connect()
+                try:
+                    with conn:
+                        conn.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in self.removed])
+                        conn.executemany(
+                            f"INSERT OR REPLACE INTO files (path, {', '.join(self.COLUMNS)}) "
+                            f"VALUES (?{', ?' * len(self.COLUMNS)})",
+                            [(p, *(self.records[p][c] for c in self.COLUMNS)) for p in self.dirty])
+                finally:
+                    conn.close()
+        except sqlite3.Error:
+            return  # El índice es solo una caché: un fallo no debe impedir generar
+        self.dirty.clear()
+        self.removed.clear()
+
+    def last_run_hashes(self):
+        """{ruta: hash} de la última generación registrada con record_run (vacío si no hay)"""
+        if not self.db_path:
+            return {}
+        try:
+            conn = self._connect()
+            try:
+                return dict(conn.execute("SELECT path, hash FROM last_run"))
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return {}
+
+    def last_run_texts(self, paths):
+        """{ruta: texto} guardado en la última generación para las rutas pedidas que lo tengan"""
+        if not self.db_path or not paths:
+            return {}
+        texts = {}
+        try:
+            conn = self._connect()
+            try:
+                for path in paths:
+                    row = conn.execute("SELECT content FROM last_run WHERE path = ?", (path,)).fetchone()
+                    if row is not None and row[0] is not None:
+                        texts[path] = zlib.decompress(row[0]).decode('utf-8')
+            finally:
+                conn.close()
+        except (sqlite3.Error, zlib.error):
+            return texts
+        return texts
+
+    def enable_snapshots(self):
+        """A partir de ahora record_run guarda también el contenido (para los diffs de "cambios
+        desde la última vez"); hasta que se usa ese modo solo guarda los hashes"""
+        if not self.db_path:
+            return
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute("INSERT OR REPLACE INTO meta VALUES ('snapshots', '1')")
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return
+
+    def record_run(self, files):
+        """Guarda los hashes de `files` como referencia de la próxima comparación y, si se activó
+        (ver enable_snapshots), su contenido.
+
+        Solo se leen y comprimen, en streaming, los archivos cuyo hash cambió desde la anterior o
+        que aún no tienen contenido guardado.
+        """
+        if not self.db_path:
+            return
+        try:
+            conn = self._connect()
+            try:
+                snapshots = conn.execute("SELECT value FROM meta WHERE key = 'snapshots'").fetchone() is not None
+                previous = {path: (digest, stored)
+                            for path, digest, stored in conn.execute(
+                                "SELECT path, hash, content IS NOT NULL FROM last_run")}
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return
+        current = {f['path']: f['hash'] for f in files}
+        rows = []
+        for path, digest in current.items():
+            previous_digest, stored = previous.get(path, (None, False))
+            if previous_digest == digest and (stored or not snapshots):
+                continue
+            content = None
+            if snapshots:
+                try:
+                    content = self._snapshot(path)
+                except OSError:
+                    continue
+            rows.append((path, digest, content))
+        stale = [(p,) for p in previous if p not in current]
+        if not rows and not stale:
+            return
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.executemany("DELETE FROM last_run WHERE path = ?", stale)
+                    conn.executemany("INSERT OR REPLACE INTO last_run VALUES (?, ?, ?)", rows)
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return
+
+    def _snapshot(self, rel_path):
+        """Contenido de rel_path comprimido con zlib línea a línea, sin unirlo en un texto"""
+        compressor = zlib.compressobj()
+        parts = []
+        for line in iter_source_lines(os.path.join(self.root_dir, rel_path), self.block_inputs(rel_path)[0]):
+            parts.append(compressor.compress(line.encode('utf-8')))
+        parts.append(compressor.flush())
+        return b"".join(parts)
+
+    def derive(self, paths, derived, executor=None):
+        """Calcula las columnas `derived` (ver DERIVED) que falten en los registros de `paths` y las
+        guarda. Devuelve {ruta: registro} de las rutas indexadas, con el hecho o sin él."""
+        records = {}
+        pending = []  # (ruta, registro, columnas que faltan)
+        for path in paths:
+            record = self.records.get(path)
+            if record is None:
+                continue
+            records[path] = record
+            done = record["derived"].split(',')
+            missing = [name for name in derived if name not in done]
+            if missing:
+                pending.append((path, record, missing))
+        if not pending:
+            return records
+        jobs = ((os.path.join(self.root_dir, path), record["data"], missing) for path, record, missing in pending)
+        if executor is None:
+            results = (_derive_columns_job(*args) for args in jobs)
+        else:
+            results = ordered_map(executor, _derive_columns_job, jobs)
+        for (path, record, missing), values in zip(pending, results):
+            if values is None:
+                continue
+            record.update(values)
+            record["derived"] = ",".join(name for name in DERIVED
+                                         if name in missing or name in record["derived"].split(','))
+            self.dirty.add(path)
+        self.flush()
+        return records
+
+    def facts(self, rel_path):
+        """Datos del grafo de dependencias de rel_path (ver csharp.file_facts), o None.
+
+        Si aún no se calcularon se calculan solo para esta ruta; para muchas, antes derive.
+        """
+        record = self.derive([rel_path], (FACTS,)).get(rel_path)
+        if record is None or not record["facts"]:
+            return None
+        return json.loads(record["facts"])
+
+    def block_inputs(self, rel_path):
+        """(bytes, estructura) vigentes de rel_path para renderizar fuera del índice; None si no hay"""
+        record = self.lookup(rel_path)
+        if record is None:
+            return None, None
+        return record["data"], record["structure"]
+
+    def iter_content(self, rel_path, structure_only=False):
+        """Líneas a emitir de rel_path, reutilizando bytes y estructura del escaneo si el archivo no cambió"""
+        data, structure = self.block_inputs(rel_path)
+        return iter_content_lines(os.path.join(self.root_dir, rel_path), structure_only, data, structure)
+
+
+def iter_content_lines(full_path, structure_only=False, data=None, structure=None):
+    """Contenido completo, o solo estructura usando la indexada si existe"""
+    if not structure_only:
+        return iter_source_lines(full_path, data)
+    if structure is None:
+        structure = file_structure(full_path, data)
+    return iter(structure.splitlines(keepends=True))
+
+
+def default_index_path(root_dir):
+    """INDEX_FILE para ROOT_DIR; otras raíces usan su propio archivo dentro de CACHE_DIR"""
+    root_abs = os.path.abspath(root_dir)
+    if root_abs == os.path.abspath(ROOT_DIR):
+        return INDEX_FILE
+    digest = hashlib.sha1(root_abs.encode('utf-8')).hexdigest()[:8]
+    return os.path.join(CACHE_DIR, f"index-{os.path.basename(root_abs) or 'root'}-{digest}.sqlite")
+
+
+def scan_extensions(include_csproj=False, extensions=None):
+    """Extensiones a escanear según el modo (`extensions` sustituye a EXTENSIONS)"""
+    exts = list(extensions or EXTENSIONS)
+    if include_csproj:
+        exts.append('.csproj')
+    return exts
+
+
+def file_entry(rel_path, full_path, st, record):
+    """Dict de un archivo escaneado, tal como lo consumen la selección y el render"""
+    return {
+        "path": rel_path,
+        "full_path": full_path,
+        "name": os.path.basename(rel_path),
+        "lines": record["lines"],
+        "kb": round(st.st_size / 1024, 1),
+        "tokens": record["tokens"],
+        "hash": record["hash"],
+        "directory": os.path.dirname(rel_path),
+        **derived_fields(record)
+    }
+
+
+def derived_fields(record):
+    """Campos de file_entry que salen de columnas derivadas; None si aún no se calcularon"""
+    return {"struct_tokens": record["struct_tokens"],
+            "minified": json.loads(record["minified"]) if record["minified"] else None}
+
+
+def derive_files(files, index, derived, executor=None):
+    """Completa en los dicts de `files` (ver file_entry) los campos de las columnas `derived`,
+    calculando en el índice las que falten. Devuelve los dicts que cambiaron."""
+    records = index.derive([f['path'] for f in files], derived, executor)
+    changed = []
+    for f in files:
+        record = records.get(f['path'])
+        if record is None:
+            continue
+        fields = derived_fields(record)
+        if any(f.get(key) != value for key, value in fields.items()):
+            f.update(fields)
+            changed.append(f)
+    return changed
+
+
+def iter_scan_files(root_dir=ROOT_DIR, include_csproj=False, index=None, executor=None, cancel=None,
+                    path_filter=None, extensions=None):
+    """Escanea root_dir y va devolviendo un dict por archivo a medida que se descubre (sin ordenar).
+
+    Con `executor` (ver parallel.make_executor) los archivos cuyo stat cambió se leen en
+    paralelo y llegan al final. `cancel` (p. ej. threading.Event) detiene el recorrido;
+    en ese caso no se expulsan entradas del índice, porque el recorrido quedó incompleto.
+    `path_filter` ver walk_source_files; `extensions` ver scan_extensions.
+    """
+    if index is None:
+        index = ScanIndex(root_dir, default_index_path(root_dir))
+    if path_filter is None:
+        path_filter = PathFilter(root_dir)
+    current_exts = scan_extensions(include_csproj, extensions)
+
+    def entry_data(rel_path, entry, st, record):
+        seen.add(rel_path)
+        return file_entry(rel_path, entry.path, st, record)
+
+    profiler = current_profiler()
+    seen = set()
+    stale = []  # (rel_path, entry, st) pendientes de leer en el pool
+    cancelled = False
+    for entry, st in walk_source_files(root_dir, current_exts, path_filter):
+        if cancel is not None and cancel.is_set():
+            cancelled = True
+            break
+        rel_path = os.path.relpath(entry.path, root_dir)
+        if executor is not None:
+            record = index.lookup(rel_path, st)
+            if record is None:
+                profiler.count('index.miss')
+                stale.append((rel_path, entry, st))
+            else:
+                profiler.count('index.hit')
+                yield entry_data(rel_path, entry, st, record)
+            continue
+        try:
+            record = index.scan_file(rel_path, entry.path, st)
+        except OSError:
+            continue
+        yield entry_data(rel_path, entry, st, record)
+
+    if stale and not cancelled:
+        jobs = ((entry.path, st.st_size, st.st_mtime_ns) for _, entry, st in stale)
+        for (rel_path, entry, st), record in zip(stale, ordered_map(executor, _read_file_record_job, jobs)):
+            if cancel is not None and cancel.is_set():
+                cancelled = True
+                break
+            if record is not None:
+                yield entry_data(rel_path, entry, st, index.store(rel_path, record))
+
+    if not cancelled and not path_filter.narrows:
+        # Con un filtro que recorta, lo no visto no está borrado: se conserva para otras ejecuciones
+        index.evict_missing(seen, current_exts)
+    index.flush()
+
+
+def scan_files(root_dir=ROOT_DIR, include_csproj=False, index=None, executor=None, path_filter=None):
+    """Escanea root_dir y devuelve un dict por archivo (sin ordenar)"""
+    return list(iter_scan_files(root_dir, include_csproj, index, executor, path_filter=path_filter))
+
+
+def sort_files(files_data):
+    """Orden de salida: archivos de la raíz primero, luego por carpeta y nombre"""
+    return sorted(files_data, key=lambda x: (
+        0 if not x['directory'] else 1,
+        x['directory'] if x['directory'] else "",
+        x['name']
+    ))
+
+
+def scan_and_sort_files(root_dir=ROOT_DIR, include_csproj=False, index=None, executor=None, path_filter=None):
+    return sort_files(scan_files(root_dir, include_csproj, index, executor, path_filter))
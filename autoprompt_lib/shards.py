@@ -0,0 +1,221 @@
+"""Salida en varias partes acotadas en bytes o en tokens.
+
+Cada parte repite el prompt y el índice completo de archivos, y lleva su propio
+<codebase>. Los bloques se escriben en una sola pasada: solo se retiene en memoria
+el bloque en curso. Un archivo que no cabe ni en una parte vacía se divide en
+límites de miembro (csharp.member_boundaries) o, si hace falta, de línea; una sola
+línea más larga que una parte se corta en trozos. Cada parte se lee sola, así que
+los archivos repetidos no se emiten como referencia a otro bloque.
+"""
+import contextlib
+import os
+
+from .blocks import CachedBlock
+from .config import SHARD_SUFFIX
+from .csharp import member_boundaries
+from .output import open_output, write_chunk
+from .render import context_header, iter_codebase_blocks
+from .scanner import sort_files
+from .tokens import count_tokens
+
+COMPRESSED_SUFFIXES = ('.gz', '.zst')
+
+
+def shard_path(target, number):
+    """'salida.txt' -> 'salida.part01.txt' (la extensión de compresión se conserva al final)"""
+    base, compressed = target, ''
+    for suffix in COMPRESSED_SUFFIXES:
+        if target.endswith(suffix):
+            base, compressed = target[:-len(suffix)], suffix
+    stem, ext = os.path.splitext(base)
+    return f"{stem}{SHARD_SUFFIX.format(number=number)}{ext}{compressed}"
+
+
+def existing_shards(target):
+    """Rutas de las partes de `target` presentes en disco, en orden"""
+    paths = []
+    while os.path.exists(shard_path(target, len(paths) + 1)):
+        paths.append(shard_path(target, len(paths) + 1))
+    return paths
+
+
+def _measure(unit):
+    if unit == 'tokens':
+        return count_tokens
+    return lambda text: len(text.encode('utf-8'))
+
+
+def _chunk_text(chunk):
+    return chunk if isinstance(chunk, str) else chunk.text()
+
+
+def _split_line(line, capacity, measure):
+    """Trozos de una línea que no cabe entera en `capacity`: el prefijo más largo que cabe, por
+    búsqueda binaria (la medida en tokens no es aditiva). Al menos un carácter por trozo."""
+    pieces = []
+    while line:
+        if measure(line) <= capacity:
+            pieces.append(line)
+            break
+        low, high = 1, len(line) - 1  # `low` siempre cabe o es el mínimo de un carácter
+        while low < high:
+            middle = (low + high + 1) // 2
+            if measure(line[:middle]) <= capacity:
+                low = middle
+            else:
+                high = middle - 1
+        pieces.append(line[:low])
+        line = line[low:]
+    return pieces
+
+
+def _split_body(body, capacity, measure, is_cs):
+    """Trozos de `body` que caben en `capacity`, cortando entre miembros, si no basta entre líneas
+    y, para una línea que no cabe sola, dentro de ella (ver _split_line)"""
+    cuts = member_boundaries(body) if is_cs else []
+    segments = []
+    start = 0
+    for cut in cuts + [len(body)]:
+        if cut > start:
+            segments.append(body[start:cut])
+            start = cut
+    pieces = []
+    current = []  # Partes del trozo en curso
+    size = 0  # Suma de sus medidas
+    for segment in segments:
+        parts = [segment] if measure(segment) <= capacity else segment.splitlines(keepends=True)
+        for part in parts:
+            part_size = measure(part)
+            if part_size > capacity:
+                if current:
+                    pieces.append("".join(current))
+                    current, size = [], 0
+                pieces.extend(_split_line(part, capacity, measure))
+                continue
+            if current and size + part_size > capacity:
+                # En tokens la suma puede pasarse de la medida real: se mide el trozo solo en el límite
+                joined = "".join(current)
+                size = measure(joined + part) - part_size
+                if size + part_size > capacity:
+                    pieces.append(joined)
+                    current, size = [], 0
+            current.append(part)
+            size += part_size
+    if current:
+        pieces.append("".join(current))
+    # Cada trozo termina en un salto de línea que el cierre del bloque ya aporta
+    return [piece[:-1] if piece.endswith('\n') else piece for piece in pieces]
+
+
+class ShardWriter:
+    """Abre partes sucesivas de `target` y reparte bloques sin superar `limit` por parte"""
+
+    def __init__(self, target, head, limit, unit):
+        self.target = target
+        self.head = head  # Prompt + índice; se repite en cada parte
+        self.limit = limit
+        self.measure = _measure(unit)
+        self.paths = []
+        self.stack = contextlib.ExitStack()
+        self.out = None
+        self.used = 0
+        self.blocks = 0
+        # Espacio para bloques en cada parte, descontando cabecera y cierre (con holgura para
+        # números de parte de hasta 4 cifras)
+        self.capacity = limit - (self.measure(self._head(9999)) + self.measure(self._tail(9999))
+                                 + self.measure("</codebase>"))
+
+    def _head(self, number):
+        return f"{self.head}\n# CONTENIDO - PARTE {number}\n<codebase>\n"
+
+    @staticmethod
+    def _tail(next_number):
+        return f"\n# CONTINÚA EN LA PARTE {next_number}\n"
+
+    def _open_next(self):
+        number = len(self.paths) + 1
+        if self.out is not None:
+            self.out.write("</codebase>")
+            self.out.write(self._tail(number))
+            self.stack.close()
+            self.stack = contextlib.ExitStack()
+        path = shard_path(self.target, number)
+        self.out = self.stack.enter_context(open_output(path))
+        self.paths.append(path)
+        self.out.write(self._head(number))
+        self.used = 0
+        self.blocks = 0
+
+    def add_block(self, chunks, size):
+        """Escribe un bloque entero, abriendo otra parte si no cabe en la actual"""
+        if self.out is None or (self.blocks and self.used + size > self.capacity):
+            self._open_next()
+        for chunk in chunks:
+            write_chunk(self.out, chunk)
+        self.used += size
+        self.blocks += 1
+
+    def close(self):
+        if self.out is not None:
+            self.out.write("</codebase>")
+        self.stack.close()
+        # Partes sobrantes de una ejecución anterior con más partes
+        number = len(self.paths) + 1
+        while os.path.exists(shard_path(self.target, number)):
+            os.remove(shard_path(self.target, number))
+            number += 1
+
+
+def render_sharded(target, files, prompt, index, structure_only=False, executor=None, cache=None,
+                   max_bytes=None, max_tokens=None, minify=None):
+    """Escribe el contexto en partes de `target` de como mucho `max_bytes` o `max_tokens`,
+    creando su carpeta si no existe.
+
+    Devuelve las rutas de las partes escritas.
+    """
+    if not isinstance(target, str) or target == '-':
+        raise ValueError("La salida por partes necesita una ruta de archivo.")
+    if (max_bytes is None) == (max_tokens is None):
+        raise ValueError("Indica un límite por parte: en bytes o en tokens.")
+    unit, limit = ('bytes', max_bytes) if max_bytes is not None else ('tokens', max_tokens)
+
+    header = context_header(structure_only, minify)
+    sorted_sel = sort_files(files)
+    manifest = "".join(f"- {f['path']}\n" for f in sorted_sel)
+    head = f"{prompt.strip()}\n\n# CONTEXTO: {len(files)} ARCHIVOS - {header} (EN PARTES)\n{manifest}"
+
+    writer = ShardWriter(target, head, limit, unit)
+    capacity = writer.capacity
+    if capacity <= 0:
+        raise ValueError(f"El límite por parte ({limit} {unit}) no alcanza para el prompt y el índice.")
+    directory = os.path.dirname(target)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    try:
+        for f, chunks in iter_codebase_blocks(sorted_sel, index, structure_only, executor, cache, False,
+                                                 minify):
+            chunks = list(chunks)
+            if unit == 'bytes':
+                size = sum(c.size if isinstance(c, CachedBlock) else len(c.encode('utf-8')) for c in chunks)
+            else:
+                size = writer.measure("".join(map(_chunk_text, chunks)))
+            if size <= capacity:
+                writer.add_block(chunks, size)
+                continue
+            # Archivo más grande que una parte: trozos con path y part="i/n"
+            text = "".join(map(_chunk_text, chunks))
+            opening = f'<file path="{f["path"]}">\n<![CDATA[\n'
+            closing = '\n]]>\n</file>\n'
+            body = text[len(opening):-len(closing)]
+            wrapper = writer.measure(f'<file path="{f["path"]}" part="00/00">\n<![CDATA[\n' + closing)
+            if wrapper >= capacity:
+                raise ValueError(f"El límite por parte ({limit} {unit}) no alcanza para trozos de {f['path']}.")
+            pieces = _split_body(body, capacity - wrapper, writer.measure, f['path'].endswith('.cs'))
+            for number, piece in enumerate(pieces, 1):
+                block = f'<file path="{f["path"]}" part="{number}/{len(pieces)}">\n<![CDATA[\n{piece}{closing}'
+                writer.add_block((block,), writer.measure(block))
+    finally:
+        writer.close()
+    if cache is not None:
+        cache.evict()
+    return writer.paths
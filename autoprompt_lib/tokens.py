@@ -0,0 +1,121 @@
+"""Conteo de tokens: estimación rápida o tokenizador exacto (tiktoken) si está instalado."""
+import math
+
+from .config import CHARS_PER_TOKEN, FULL_HEADER, PRIORITY_DIRS, STRUCTURE_HEADER, TOKENIZER
+from .minify import remaining_fraction
+
+_counter = None
+_counter_name = None
+
+
+def _load_counter():
+    """Resuelve TOKENIZER: 'estimate', 'tiktoken:<encoding>' o 'auto' (tiktoken si existe)"""
+    kind, _, encoding = TOKENIZER.partition(':')
+    if kind in ('auto', 'tiktoken'):
+        try:
+            import tiktoken
+            enc = tiktoken.get_encoding(encoding or 'o200k_base')
+            return (lambda text: len(enc.encode(text, disallowed_special=()))), f"tiktoken:{enc.name}"
+        except ImportError:
+            if kind == 'tiktoken':
+                raise ValueError("TOKENIZER requiere el paquete 'tiktoken' (pip install tiktoken).")
+    return estimate_tokens, f"estimate:{CHARS_PER_TOKEN}"
+
+
+def estimate_tokens(text):
+    """Aproximación por longitud; el código C# ronda 3-4 caracteres por token"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def count_tokens(text):
+    global _counter, _counter_name
+    if _counter is None:
+        _counter, _counter_name = _load_counter()
+    return _counter(text)
+
+
+def tokenizer_name():
+    """Identifica el contador activo; el índice invalida los conteos si cambia"""
+    global _counter, _counter_name
+    if _counter is None:
+        _counter, _counter_name = _load_counter()
+    return _counter_name
+
+
+def count_lines_tokens(lines, chunk_chars=1024 * 1024):
+    """Tokens de un archivo leído línea a línea, agrupando en bloques para no cargarlo entero"""
+    total = 0
+    buf = []
+    size = 0
+    for line in lines:
+        buf.append(line)
+        size += len(line)
+        if size >= chunk_chars:
+            total += count_tokens("".join(buf))
+            buf.clear()
+            size = 0
+    if buf:
+        total += count_tokens("".join(buf))
+    return total
+
+
+def file_overhead_tokens(path):
+    """Tokens del envoltorio <file>/CDATA y de la línea del índice de archivos"""
+    return count_tokens(f'- {path}\n<file path="{path}">\n<![CDATA[\n\n]]>\n</file>\n')
+
+
+def file_tokens(f, structure_only=False, minify=None):
+    """Tokens que aporta un archivo a la salida, según el modo.
+
+    Con `minify` (nivel de minify.LEVELS) se estiman a partir de los ahorros indexados.
+    """
+    return content_tokens(f, structure_only, minify) + file_overhead_tokens(f['path'])
+
+
+def content_tokens(f, structure_only=False, minify=None):
+    """Como file_tokens pero sin el envoltorio <file> (que no depende del modo).
+
+    Sin la estructura calculada (ver scanner.derive_files) un .cs cuenta como completo.
+    """
+    if structure_only and f['name'].endswith('.cs') and f['struct_tokens'] is not None:
+        return f['struct_tokens']
+    if minify is not None and f.get('minified'):
+        return math.ceil(f['tokens'] * remaining_fraction(f['minified'], minify))
+    return f['tokens']
+
+
+def priority_rank(f, priorities=PRIORITY_DIRS):
+    """Posición del primer prefijo de carpeta prioritario que contiene al archivo"""
+    path = f['path'].replace('\\', '/')
+    for rank, prefix in enumerate(priorities):
+        if path == prefix or path.startswith(prefix.rstrip('/') + '/'):
+            return rank
+    return len(priorities)
+
+
+def fit_to_budget(files, budget, structure_only=False, reserved=0, priorities=PRIORITY_DIRS, rank=None,
+                  minify=None):
+    """Selección voraz tipo mochila que nunca supera `budget` tokens.
+
+    Recorre por prioridad de carpeta (o por `rank(f)`, p. ej. la distancia en el grafo
+    de dependencias) y, dentro de cada prioridad, de menor a mayor coste, saltando los
+    archivos que ya no caben. `reserved` descuenta prompt y cabeceras; `minify` como en file_tokens.
+    """
+    remaining = budget - reserved
+    if rank is None:
+        def rank(f):
+            return priority_rank(f, priorities)
+    candidates = sorted(files, key=lambda f: (rank(f), file_tokens(f, structure_only, minify)))
+    chosen = []
+    for f in candidates:
+        cost = file_tokens(f, structure_only, minify)
+        if cost <= remaining:
+            chosen.append(f)
+            remaining -= cost
+    return chosen
+
+
+def header_tokens(prompt, count, structure_only=False):
+    """Tokens del prompt y las cabeceras fijas de la salida"""
+    header = STRUCTURE_HEADER if structure_only else FULL_HEADER
+    return count_tokens(f"{prompt.strip()}\n\n# CONTEXTO: {count} ARCHIVOS - {header}\n\n# CONTENIDO\n<codebase>\n</codebase>")
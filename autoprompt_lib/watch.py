@@ -0,0 +1,218 @@
+"""Vigilancia del árbol: inotify (Linux) cuando está disponible, sondeo de stat en otro caso.
+
+Ambos vigilantes mantienen una instantánea rel_path -> (size, mtime_ns) y su poll()
+devuelve la lista de cambios [(tipo, rel_path)] con tipo 'added', 'modified' o 'removed'.
+"""
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+
+from .scanner import walk_source_files
+
+ADDED = 'added'
+MODIFIED = 'modified'
+REMOVED = 'removed'
+
+
+class PollingWatcher:
+    """Recorre el árbol en cada poll() y compara con la instantánea anterior"""
+
+    def __init__(self, root_dir, exts, path_filter):
+        self.root_dir = root_dir
+        self.exts = tuple(exts)
+        self.path_filter = path_filter
+        self.snapshot = {}
+        self.start()
+
+    def start(self):
+        self.snapshot = self._walk()
+
+    def _walk(self):
+        return {os.path.relpath(entry.path, self.root_dir): (st.st_size, st.st_mtime_ns)
+                for entry, st in walk_source_files(self.root_dir, self.exts, self.path_filter)}
+
+    def _full_diff(self):
+        current = self._walk()
+        changes = [(REMOVED, p) for p in self.snapshot if p not in current]
+        for p, stamp in current.items():
+            old = self.snapshot.get(p)
+            if old is None:
+                changes.append((ADDED, p))
+            elif old != stamp:
+                changes.append((MODIFIED, p))
+        self.snapshot = current
+        return changes
+
+    def _classify(self, rel_paths):
+        """Cambios reales de un conjunto de rutas candidatas, comparando su stat con la instantánea"""
+        changes = []
+        for rel_path in rel_paths:
+            if not rel_path.endswith(self.exts):
+                continue
+            try:
+                st = os.stat(os.path.join(self.root_dir, rel_path))
+                stamp = (st.st_size, st.st_mtime_ns)
+            except OSError:
+                stamp = None
+            if stamp is not None and self.path_filter.is_ignored(rel_path):
+                stamp = None  # Excluido (p. ej. por un .gitignore): como si no existiera
+            old = self.snapshot.get(rel_path)
+            if stamp is None:
+                if old is not None:
+                    del self.snapshot[rel_path]
+                    changes.append((REMOVED, rel_path))
+            elif old is None:
+                self.snapshot[rel_path] = stamp
+                changes.append((ADDED, rel_path))
+            elif old != stamp:
+                self.snapshot[rel_path] = stamp
+                changes.append((MODIFIED, rel_path))
+        return changes
+
+    def poll(self):
+        return self._full_diff()
+
+    def close(self):
+        pass
+
+
+# Constantes de <sys/inotify.h>
+IN_MODIFY = 0x2
+IN_ATTRIB = 0x4
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ONLYDIR = 0x1000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_ONLYDIR)
+_EVENT = struct.Struct('iIII')
+
+
+def _load_libc():
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1  # noqa: B018 (solo comprueba que existe)
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class InotifyWatcher(PollingWatcher):
+    """Un watch de inotify por directorio; poll() solo hace stat de las rutas con eventos"""
+
+    def __init__(self, root_dir, exts, path_filter, libc):
+        self.libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        self.dirs = {}  # wd -> directorio relativo ('' = raíz)
+        try:
+            super().__init__(root_dir, exts, path_filter)
+        except OSError:
+            self.close()
+            raise
+
+    def start(self):
+        # Watches antes de la instantánea: un cambio intermedio llega como evento, no se pierde
+        self._watch_tree('')
+        super().start()
+
+    def _watch_tree(self, rel_dir):
+        """Añade watches a rel_dir y sus subdirectorios no ignorados; devuelve los directorios añadidos"""
+        added = []
+        pending = [rel_dir]
+        while pending:
+            current = pending.pop()
+            path = os.path.join(self.root_dir, current) if current else self.root_dir
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                if current == rel_dir or errno == 28:  # ENOSPC: límite max_user_watches
+                    raise OSError(errno, f"inotify_add_watch: {path}")
+                continue  # Directorio borrado entre el listado y el watch
+            self.dirs[wd] = current
+            added.append(current)
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        child = os.path.join(current, entry.name) if current else entry.name
+                        if entry.is_dir(follow_symlinks=False) and not self.path_filter.is_ignored(child, True):
+                            pending.append(child)
+            except OSError:
+                continue
+        return added
+
+    def _read_events(self):
+        events = []
+        while True:
+            try:
+                buf = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset < len(buf):
+                wd, mask, _cookie, length = _EVENT.unpack_from(buf, offset)
+                name = buf[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b'\0')
+                events.append((wd, mask, os.fsdecode(name)))
+                offset += _EVENT.size + length
+
+    def poll(self):
+        candidates = set()
+        for wd, mask, name in self._read_events():
+            if mask & IN_Q_OVERFLOW:
+                return self._full_diff()  # Se perdieron eventos: resincronizar
+            if mask & IN_IGNORED:
+                self.dirs.pop(wd, None)
+                continue
+            rel_dir = self.dirs.get(wd)
+            if rel_dir is None or not name:
+                continue
+            rel_path = os.path.join(rel_dir, name) if rel_dir else name
+            if not mask & IN_ISDIR:
+                candidates.add(rel_path)
+            elif mask & (IN_CREATE | IN_MOVED_TO):
+                if not self.path_filter.is_ignored(rel_path, True):
+                    # Los archivos creados antes de añadir el watch se descubren listando
+                    for new_dir in self._watch_tree(rel_path):
+                        candidates.update(self._list_files(new_dir))
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                prefix = rel_path + os.sep
+                candidates.update(p for p in self.snapshot if p.startswith(prefix))
+        return self._classify(sorted(candidates))
+
+    def _list_files(self, rel_dir):
+        path = os.path.join(self.root_dir, rel_dir)
+        try:
+            with os.scandir(path) as it:
+                return [os.path.join(rel_dir, e.name) for e in it if e.is_file()]
+        except OSError:
+            return []
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def make_watcher(root_dir, exts, path_filter):
+    """InotifyWatcher si el sistema lo permite; si no, PollingWatcher (`path_filter`: ignore.PathFilter)"""
+    libc = _load_libc()
+    if libc is not None:
+        try:
+            return InotifyWatcher(root_dir, exts, path_filter, libc)
+        except OSError:
+            pass
+    return PollingWatcher(root_dir, exts, path_filter)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Los tests importan autoprompt_lib desde la raíz del repositorio, sin instalarlo
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,96 @@
+import gzip
+import io
+import os
+
+import pytest
+
+from autoprompt_lib import output
+from autoprompt_lib.blocks import FULL, BlockCache, block_key
+from autoprompt_lib.output import open_output
+from autoprompt_lib.render import render_context
+from autoprompt_lib.scanner import ScanIndex, scan_and_sort_files
+
+A = "namespace N\n{\n    public class A { }\n}\n"
+
+
+@pytest.fixture
+def source(tmp_path):
+    root = tmp_path / "src"
+    (root / "Sub").mkdir(parents=True)
+    (root / "A.cs").write_text(A)
+    (root / "B.cs").write_text("namespace N { public class B { } }\n")
+    (root / "Sub" / "Dup.cs").write_text(A)  # Idéntico a A.cs
+    index = ScanIndex(str(root), str(tmp_path / "index.sqlite"))
+    return root, index, BlockCache(str(tmp_path / "blocks"), max_bytes=1 << 30)
+
+
+def render(root, index, cache, out=None):
+    files = scan_and_sort_files(str(root), index=index)
+    out = io.StringIO() if out is None else out
+    with open_output(out) as stream:
+        render_context(stream, files, "", index, cache=cache)
+    return out.getvalue() if isinstance(out, io.StringIO) else None
+
+
+def test_cache_hit_and_miss_follow_size_and_mtime(source):
+    root, index, cache = source
+    first = render(root, index, cache)
+    assert (cache.hits, cache.misses) == (0, 2)  # El duplicado no consulta la caché
+    assert render(root, index, cache) == first
+    assert (cache.hits, cache.misses) == (2, 2)
+
+    path = root / "B.cs"
+    st = os.stat(path)
+    path.write_text("namespace N { public class C { } }\n")  # Mismo tamaño, otro contenido
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    text = render(root, index, cache)
+    assert (cache.hits, cache.misses) == (3, 3)
+    assert "class C" in text and "class B" not in text
+
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 2_000_000_000))  # Solo mtime: mismo contenido
+    assert render(root, index, cache) == text
+    assert (cache.hits, cache.misses) == (5, 3)
+
+
+def test_duplicate_is_a_reference(source):
+    root, index, cache = source
+    text = render(root, index, cache)
+    assert '<file path="Sub/Dup.cs" ref="A.cs"/>\n' in text
+    assert text.count("public class A") == 1
+
+
+def test_evict_removes_least_recently_used(tmp_path):
+    cache = BlockCache(str(tmp_path / "blocks"), max_bytes=250)
+    keys = [block_key(str(i), FULL) for i in range(3)]
+    for i, key in enumerate(keys):
+        cache.put(key, "x" * 100)
+        os.utime(cache._path(key), ns=(0, (i + 1) * 1_000_000_000))
+    assert cache.get(keys[0]) is not None  # Un acierto lo vuelve el más reciente
+    cache.evict()
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]).text() == "x" * 100 and cache.get(keys[2]) is not None
+
+
+def test_kernel_copy_matches_fallback(source, tmp_path, monkeypatch):
+    root, index, cache = source
+    expected = render(root, index, None)
+    render(root, index, cache)  # Llena la caché: a partir de aquí los cuerpos son CachedBlock
+
+    copies = []
+    copy_fd = output._copy_fd
+    monkeypatch.setattr(output, '_copy_fd', lambda *args: copies.append(copy_fd(*args)) or copies[-1])
+    kernel = tmp_path / "kernel.txt"
+    render(root, index, cache, str(kernel))
+    assert copies and all(copies)
+
+    monkeypatch.setattr(output, '_copy_fd', lambda *args: False)
+    fallback = tmp_path / "fallback.txt"
+    render(root, index, cache, str(fallback))
+    compressed = tmp_path / "out.txt.gz"
+    render(root, index, cache, str(compressed))
+
+    data = expected.encode('utf-8')
+    assert kernel.read_bytes() == data
+    assert fallback.read_bytes() == data
+    assert gzip.decompress(compressed.read_bytes()) == data
+    assert render(root, index, cache) == expected
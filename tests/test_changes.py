@@ -0,0 +1,84 @@
+import io
+import subprocess
+
+import pytest
+
+from autoprompt_lib import core
+from autoprompt_lib.changes import LAST_RUN
+from autoprompt_lib.core import generate_context
+from autoprompt_lib.scanner import ScanIndex
+
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    monkeypatch.setattr(core, 'BLOCK_CACHE', False)  # Sin tocar la caché de bloques del repositorio
+    root = tmp_path / "src"
+    root.mkdir()
+    (root / "A.cs").write_text("namespace N { public class A { } }\n")
+    (root / "B.cs").write_text("namespace N { public class B { } }\n")
+    return root, ScanIndex(str(root), str(tmp_path / "index.sqlite"))
+
+
+def generate(root, index, since=None, diffs=False):
+    out = io.StringIO()
+    generate_context(str(root), out=out, index=index, since=since, diffs=diffs, workers=1)
+    return out.getvalue()
+
+
+def test_last_run_without_snapshot_emits_full_content(source):
+    root, index = source
+    generate(root, index)  # Primera generación: solo hashes
+    (root / "A.cs").write_text("namespace N { public class A { int x; } }\n")
+    text = generate(root, index, LAST_RUN, diffs=True)
+    assert "- A.cs (modificado, sin contenido anterior)" in text
+    assert '<file path="A.cs">' in text and "int x;" in text
+    assert "/dev/null" not in text and "B.cs" not in text
+
+
+def test_last_run_diff_against_snapshot(source):
+    root, index = source
+    generate(root, index, LAST_RUN, diffs=True)  # Activa y guarda el contenido
+    (root / "A.cs").write_text("namespace N { public class A { int y; } }\n")
+    (root / "C.cs").write_text("namespace N { public class C { } }\n")
+    (root / "B.cs").unlink()
+    text = generate(root, index, LAST_RUN, diffs=True)
+    assert "--- a/A.cs\n+++ b/A.cs\n" in text
+    assert "-namespace N { public class A { } }\n+namespace N { public class A { int y; } }\n" in text
+    assert "--- /dev/null\n+++ b/C.cs\n" in text  # Nuevo de verdad
+    assert "- B.cs (eliminado)" in text and "--- a/B.cs\n+++ /dev/null\n" in text
+    assert "sin contenido anterior" not in text
+
+
+def test_last_run_without_changes(source):
+    root, index = source
+    generate(root, index)
+    with pytest.raises(ValueError):
+        generate(root, index, LAST_RUN)
+
+
+def git(root, *args):
+    subprocess.run(['git', '-c', 'user.name=t', '-c', 'user.email=t@t', *args], cwd=root, check=True,
+                   stdout=subprocess.DEVNULL)
+
+
+def test_git_ref(source):
+    root, index = source
+    git(root, 'init', '-q')
+    git(root, 'add', '.')
+    git(root, 'commit', '-q', '-m', 'base')
+    (root / "A.cs").write_text("namespace N { public class A { int z; } }\n")
+    (root / "C.cs").write_text("namespace N { public class C { } }\n")
+    text = generate(root, index, 'HEAD', diffs=True)
+    assert "DESDE HEAD" in text
+    assert "-namespace N { public class A { } }\n+namespace N { public class A { int z; } }\n" in text
+    assert "--- /dev/null\n+++ b/C.cs\n" in text
+    assert "B.cs" not in text
+    full = generate(root, index, 'HEAD')
+    assert '<file path="A.cs">' in full and "int z;" in full
+
+
+def test_unknown_git_ref(source):
+    root, index = source
+    git(root, 'init', '-q')
+    with pytest.raises(ValueError):
+        generate(root, index, 'no-such-ref')
@@ -0,0 +1,58 @@
+from autoprompt_lib.csharp import NO_DECLARATIONS, outline, outline_lines
+
+SOURCE = '''using System;
+using System.Collections.Generic;
+
+namespace Demo.Core
+{
+    [Serializable]
+    [Obsolete("x")]
+    public sealed class Cache<TKey, TValue> : IDisposable where TKey : notnull
+    {
+        private readonly Dictionary<TKey, List<TValue>> _items = new();
+
+        [MethodImpl(MethodImplOptions.AggressiveInlining)]
+        public bool TryGet(TKey key, out List<TValue> value)
+        {
+            return _items.TryGetValue(key, out value);
+        }
+
+        public class Node<T>
+        {
+            public T Value { get; set; }
+            public enum Kind { A, B }
+        }
+
+        private void Secret() { }
+        public void Dispose() { }
+    }
+}
+'''
+
+
+def test_outline_generics_attributes_and_nested_types():
+    text = outline(SOURCE)
+    lines = [line.strip() for line in text.splitlines()]
+    assert lines[:3] == ["using System;", "using System.Collections.Generic;", "namespace Demo.Core"]
+    assert ('[Serializable][Obsolete("x")] public sealed class Cache<TKey, TValue> : IDisposable '
+            'where TKey : notnull') in lines
+    assert "public bool TryGet(TKey key, out List<TValue> value);" in lines
+    assert "public class Node<T>" in lines
+    assert "public T Value { get; set; }" in lines
+    assert "public enum Kind" in lines
+    assert "public void Dispose();" in lines
+    # Sin cuerpos ni miembros privados
+    assert "TryGetValue" not in text
+    assert "Secret" not in text and "_items" not in text
+    # Los tipos anidados quedan dentro del que los contiene
+    indent = {line.strip(): len(line) - len(line.lstrip()) for line in text.splitlines()}
+    assert indent["public class Node<T>"] == indent["public void Dispose();"]
+    assert indent["public T Value { get; set; }"] > indent["public class Node<T>"]
+
+
+def test_outline_lines_matches_outline():
+    assert outline_lines(SOURCE.splitlines(keepends=True)) == outline(SOURCE)
+
+
+def test_outline_without_declarations():
+    assert outline("// solo un comentario\n") == NO_DECLARATIONS
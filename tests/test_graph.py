@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+from autoprompt_lib.graph import build_graph
+from autoprompt_lib.scanner import ScanIndex, scan_and_sort_files
+
+TREE = {
+    "Core/Core.csproj": "<Project></Project>\n",
+    "Core/Models/Order.cs": "namespace Shop.Core.Models { public class Order { public Customer Buyer; } }\n",
+    "Core/Models/Customer.cs": "namespace Shop.Core.Models { public class Customer { } }\n",
+    "App/App.csproj": '<Project><ItemGroup><ProjectReference Include="..\\Core\\Core.csproj" />'
+                      '</ItemGroup></Project>\n',
+    "App/Program.cs": "using Shop.Core.Models;\nnamespace Shop.App { class Program { Order Last; Helper H; } }\n",
+    "App/Services/Helper.cs": "namespace Shop.App.Services { public class Helper { } }\n",
+    "App/Helper.cs": "namespace Shop.App { public class Helper { } }\n",
+    # Mismo nombre y namespace que Core, pero en un proyecto que App no referencia
+    "Other/Other.csproj": "<Project></Project>\n",
+    "Other/Order.cs": "namespace Shop.Core.Models { public class Order { } }\n",
+}
+
+
+def write(root, rel_path, text):
+    path = root / rel_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+@pytest.fixture
+def source(tmp_path):
+    root = tmp_path / "src"
+    for rel_path, text in TREE.items():
+        write(root, rel_path, text)
+    return root, ScanIndex(str(root), str(tmp_path / "index.sqlite"))
+
+
+def graph_of(root, index):
+    return build_graph(scan_and_sort_files(str(root), index=index), index, str(root))
+
+
+def p(rel_path):
+    return rel_path.replace('/', os.sep)
+
+
+def test_closure_follows_usings_types_and_project_references(source):
+    root, index = source
+    graph = graph_of(root, index)
+    assert graph.closure([p("App/Program.cs")]) == {
+        p("App/Program.cs"): 0,
+        p("Core/Models/Order.cs"): 1,  # using + tipo, en un proyecto referenciado
+        p("App/Helper.cs"): 1,  # Namespace padre, sin using
+        p("Core/Models/Customer.cs"): 2,  # Mismo namespace
+    }
+    assert graph.closure([p("App/Program.cs")], depth=1).keys() == {
+        p("App/Program.cs"), p("Core/Models/Order.cs"), p("App/Helper.cs")}
+    assert graph.dependents(p("Core/Models/Customer.cs")) == {p("Core/Models/Order.cs")}
+
+
+def test_without_project_reference_or_using(source):
+    root, index = source
+    write(root, "App/App.csproj", "<Project></Project>\n")
+    assert p("Core/Models/Order.cs") not in graph_of(root, index).dependencies(p("App/Program.cs"))
+    write(root, "App/App.csproj", TREE["App/App.csproj"])
+    write(root, "App/Program.cs", "namespace Shop.App { class Program { Order Last; } }\n")
+    assert not graph_of(root, index).dependencies(p("App/Program.cs"))
+
+
+def edges(graph):
+    return {path: set(graph.dependencies(path)) for path in graph.facts}
+
+
+def test_incremental_update_matches_rebuild(source):
+    root, index = source
+    graph = graph_of(root, index)
+    graph.closure([p("App/Program.cs")])  # Llena las cachés de aristas
+
+    write(root, "Core/Models/Customer.cs", "namespace Shop.Core.Models { public class Client { } }\n")
+    write(root, "Core/Models/Order.cs", "namespace Shop.Core.Models { public class Order { Client C; } }\n")
+    write(root, "App/Audit.cs", "using Shop.Core.Models;\nnamespace Shop.App { class Audit { Client C; } }\n")
+    os.remove(root / "App" / "Helper.cs")
+    write(root, "App/App.csproj", "<Project></Project>\n")
+
+    scan_and_sort_files(str(root), True, index=index)  # Pone al día el índice, como apply_changes
+    for rel_path in ["Core/Models/Customer.cs", "Core/Models/Order.cs", "App/Audit.cs"]:
+        graph.set_file(p(rel_path), index.facts(p(rel_path)))
+    graph.remove_file(p("App/Helper.cs"))
+    graph.set_project(p("App/App.csproj"), index.facts(p("App/App.csproj"))["project_refs"])
+
+    rebuilt = graph_of(root, index)
+    assert edges(graph) == edges(rebuilt)
+    assert graph.closure([p("App/Audit.cs")]) == rebuilt.closure([p("App/Audit.cs")])
+    assert graph.dependents(p("Core/Models/Customer.cs")) == rebuilt.dependents(p("Core/Models/Customer.cs"))
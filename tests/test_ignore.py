@@ -0,0 +1,51 @@
+import pytest
+
+from autoprompt_lib.ignore import PathFilter
+
+
+@pytest.fixture
+def tree(tmp_path):
+    (tmp_path / "sub" / "build").mkdir(parents=True)
+    (tmp_path / "build").mkdir()
+    (tmp_path / ".gitignore").write_text("*.log\n!keep.log\n/build/\ndocs/*.md\n")
+    (tmp_path / "sub" / ".gitignore").write_text("!x.log\n")
+    return tmp_path
+
+
+@pytest.mark.parametrize("path, is_dir, ignored", [
+    ("a.log", False, True),
+    ("keep.log", False, False),  # Re-incluido con '!'
+    ("sub/keep.log", False, False),
+    ("sub/y.log", False, True),
+    ("sub/x.log", False, False),  # El .gitignore más profundo gana
+    ("build", True, True),  # '/build/' anclado a la raíz
+    ("build/keep.log", False, True),  # Dentro de una carpeta excluida no se re-incluye
+    ("sub/build", True, False),
+    ("sub/build/a.cs", False, False),
+    ("docs/a.md", False, True),  # Con '/' en medio también se ancla
+    ("sub/docs/a.md", False, False),
+    ("docs/a.cs", False, False),
+    ("bin/a.cs", False, True),  # IGNORE_DIRS
+])
+def test_gitignore_negation_and_anchoring(tree, path, is_dir, ignored):
+    path_filter = PathFilter(str(tree), include=(), exclude=(), gitignore=True)
+    assert path_filter.is_ignored(path, is_dir) is ignored
+
+
+def test_gitignore_disabled(tree):
+    path_filter = PathFilter(str(tree), include=(), exclude=(), gitignore=False)
+    assert not path_filter.is_ignored("a.log")
+    assert not path_filter.is_ignored("build/a.cs")
+
+
+@pytest.mark.parametrize("path, ignored", [
+    ("src/a.cs", False),
+    ("src/x/a.Designer.cs", True),
+    ("src/keep.Designer.cs", False),
+    ("other/a.cs", True),
+])
+def test_include_and_exclude(tree, path, ignored):
+    path_filter = PathFilter(str(tree), include=["src/**"], exclude=["*.Designer.cs", "!keep.Designer.cs"],
+                             gitignore=False)
+    assert path_filter.is_ignored(path) is ignored
+    assert path_filter.narrows
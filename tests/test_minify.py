@@ -0,0 +1,72 @@
+import pytest
+
+from autoprompt_lib.minify import BODIES, LEVELS, minify
+
+SOURCE = '''using System;
+
+namespace Demo
+{
+    /// <summary>Documentación</summary>
+    public class Texts
+    {
+        #region Campos
+        private const string Url = "http://example.com/a//b"; // comentario
+        private const string Block = "/* no es comentario */";
+        #endregion
+
+        /** doc de bloque */
+        public string Path(string name)
+        {
+            var verbatim = @"C:\\dir\\    ""quoted""   // x
+    second line";
+            var interpolated = $"{name}   /* y */ {{literal}}";
+            var mixed = $@"{name}\\   ""z""";
+            var quote = '"';
+            return verbatim + interpolated + mixed + quote;
+        }
+
+        public int Twice(int value)
+        {
+            return value * 2;
+        }
+
+        public int Short() => 1;
+    }
+}
+'''
+
+FIELD_LITERALS = ['"http://example.com/a//b"', '"/* no es comentario */"']
+BODY_LITERALS = ['@"C:\\dir\\    ""quoted""   // x\n    second line"', '$"{name}   /* y */ {{literal}}"',
+                 '$@"{name}\\   ""z"""', "'\"'"]
+SIGNATURES = ["public class Texts", "public string Path(string name)", "public int Twice(int value)",
+              "public int Short() => 1;"]
+
+
+@pytest.mark.parametrize("level", LEVELS)
+def test_literals_and_signatures_survive(level):
+    text = minify(SOURCE, level, max_body_lines=3)
+    for literal in FIELD_LITERALS + (BODY_LITERALS if level != BODIES else []):
+        assert literal in text
+    for signature in SIGNATURES:
+        assert signature in text
+
+
+def test_levels_remove_what_they_promise():
+    docs = minify(SOURCE, 'docs', max_body_lines=3)
+    assert "Documentación" not in docs and "doc de bloque" not in docs and "#region" not in docs
+    assert "// comentario" in docs
+    assert "// comentario" not in minify(SOURCE, 'comments', max_body_lines=3)
+    whitespace = minify(SOURCE, 'whitespace', max_body_lines=3)
+    assert "\n\n" not in whitespace and "\n    public" not in whitespace
+
+
+def test_bodies_keeps_signatures_and_short_bodies():
+    text = minify(SOURCE, BODIES, max_body_lines=3)
+    assert "public string Path(string name)\n{ /* … 7 líneas */ }" in text
+    assert "return value * 2;" in text  # Cuerpo corto: se conserva
+    assert "var verbatim" not in text
+
+
+def test_unknown_level():
+    with pytest.raises(ValueError):
+        minify(SOURCE, 'everything')
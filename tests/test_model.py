@@ -0,0 +1,95 @@
+import os
+
+from autoprompt_lib.core import select_files
+from autoprompt_lib.model import COST_MODES, SUMMED, FileTable, SelectionModel, cost_mode
+from autoprompt_lib.tokens import file_tokens
+
+
+def entry(path, lines, kb, tokens, struct_tokens=None):
+    path = path.replace('/', os.sep)
+    return {"path": path, "full_path": os.path.join(os.sep, "src", path), "name": os.path.basename(path),
+            "lines": lines, "kb": kb, "tokens": tokens, "struct_tokens": struct_tokens,
+            "hash": f"h-{path}", "minified": None, "directory": os.path.dirname(path)}
+
+
+FILES = [
+    entry("Program.cs", 10, 0.5, 40, 8),
+    entry("Core/A.cs", 100, 3.2, 900, 50),
+    entry("Core/B.cs", 20, 1.1, 150),
+    entry("Core/Sub/C.cs", 5, 0.1, 30, 10),
+    entry("Core2/D.cs", 7, 0.3, 60, 12),
+    entry("Web/[Gen]*.cs", 3, 0.1, 20, 5),
+]
+
+
+def expected(model, structure_only=False):
+    chosen = model.selected_files()
+    return (len(chosen), sum(f['lines'] for f in chosen), round(sum(round(f['kb'] * 10) for f in chosen)) / 10,
+            sum(file_tokens(f, structure_only) for f in chosen))
+
+
+def test_file_table_round_trip():
+    table = FileTable()
+    for f in FILES:
+        table.append(f)
+    assert [table.entry(i) for i in range(len(FILES))] == FILES
+    changed = dict(FILES[1], lines=1, kb=0.1, tokens=5, struct_tokens=None, hash="h2")
+    table.overwrite(1, changed)
+    assert table.entry(1) == changed
+    assert len(SUMMED) == 3 + len(COST_MODES)
+
+
+def test_running_sums_match_recount():
+    model = SelectionModel(FILES)
+    assert model.stats() == expected(model)
+    model.set_folder("Core", False)
+    model.set(model.index_of[FILES[3]['path']], True)
+    for structure_only in (False, True):
+        assert model.stats(structure_only) == expected(model, structure_only)
+    model.replace(model.index_of[FILES[3]['path']], dict(FILES[3], lines=50, tokens=500))
+    model.remove(FILES[0]['path'])
+    model.add(entry("Core/E.cs", 9, 0.2, 70), selected=True)
+    assert model.stats() == expected(model)
+    assert model.stats(True) == expected(model, True)
+    model.set_all(True)
+    assert model.stats() == expected(model) and model.stats()[0] == len(model) == len(FILES)
+    model.select_only([FILES[4]['path']])
+    assert model.stats() == expected(model) and model.stats()[0] == 1
+    assert cost_mode(True) in SUMMED and cost_mode(False, 'bodies') in SUMMED
+
+
+def round_trip(model, files):
+    return {f['path'] for f in select_files(files, model.selection_patterns())}
+
+
+def test_selection_patterns_round_trip():
+    model = SelectionModel(FILES)
+    model.set_folder("Core" + os.sep + "Sub", False)
+    model.set_folder("Core2", False)
+    model.set(model.index_of[FILES[0]['path']], False)
+    selected = {f['path'] for f in model.selected_files()}
+    assert round_trip(model, FILES) == selected
+    # Un archivo nuevo en una carpeta marcada entera entra; en una carpeta a medias, no
+    newcomers = FILES + [entry("Web/New.cs", 1, 0.1, 1), entry("Core/New.cs", 1, 0.1, 1)]
+    assert round_trip(model, newcomers) == selected | {os.path.join("Web", "New.cs")}
+
+    model.set_all(True)
+    model.set(model.index_of[FILES[4]['path']], False)
+    patterns = model.selection_patterns()
+    assert "/Core/**" in patterns  # El subárbol entero, incluida Core/Sub
+    assert round_trip(model, FILES) == {f['path'] for f in model.selected_files()}
+
+
+def test_star_does_not_cross_folders():
+    paths = {f['path'] for f in select_files(FILES, ["Core/*"])}
+    assert paths == {os.path.join("Core", "A.cs"), os.path.join("Core", "B.cs")}
+    assert len(select_files(FILES, ["Core/**"])) == 3
+    assert len(select_files(FILES, ["*.cs"])) == len(FILES)  # Sin '/': solo el nombre
+    assert not select_files(FILES, ["Core*"])
+
+
+def test_literal_paths_escape_wildcards():
+    files = FILES + [entry("Web/Gx.cs", 1, 0.1, 1), entry("Program2.cs", 1, 0.1, 1)]
+    model = SelectionModel(files)
+    model.select_only([FILES[5]['path'], FILES[0]['path']])
+    assert round_trip(model, files) == {FILES[5]['path'], FILES[0]['path']}
@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+from autoprompt_lib.config import SELECTION_PROFILES
+from autoprompt_lib.core import select_files
+from autoprompt_lib.profiles import delete_profile, get_profile, load_profiles, manifest_files, store_profile
+from autoprompt_lib.roots import make_roots
+from autoprompt_lib.scanner import ScanIndex, scan_and_sort_files
+
+PATTERNS = ["Core/**", "/Program.cs"]
+
+
+@pytest.fixture
+def source(tmp_path):
+    root = tmp_path / "src"
+    (root / "Core" / "Sub").mkdir(parents=True)
+    (root / "Other").mkdir()
+    for rel_path in ("Program.cs", "Core/A.cs", "Core/Sub/B.cs", "Other/C.cs"):
+        (root / rel_path).write_text(f"// {rel_path}\nclass X {{ }}\n")
+    roots = make_roots(None, str(root))
+    index = ScanIndex(str(root), str(tmp_path / "index.sqlite"))
+    return root, roots, index, str(tmp_path / "profiles.json")
+
+
+def save(source, name="core"):
+    root, roots, index, path = source
+    files = select_files(scan_and_sort_files(str(root), index=index), PATTERNS)
+    store_profile(name, PATTERNS, files, index, roots, path=path)
+    return files
+
+
+def summary(files):
+    return [(f['path'], f['hash'], f['lines'], f['tokens']) for f in files]
+
+
+def test_saved_manifest_round_trip(source):
+    root, roots, index, path = source
+    files = save(source)
+    assert len(files) == 3
+    profile = get_profile("core", path)
+    assert profile["patterns"] == PATTERNS
+    loaded = manifest_files(profile["manifest"], roots, patterns=PATTERNS)
+    assert summary(loaded) == summary(files)
+    assert all(os.path.exists(f['full_path']) for f in loaded)
+
+
+def test_manifest_invalidated_by_changes(source):
+    root, roots, index, path = source
+    save(source)
+    manifest = get_profile("core", path)["manifest"]
+    assert manifest_files(manifest, roots, patterns=["Core/**"]) is None  # Otros patrones
+    assert manifest_files(manifest, roots, include_csproj=True, patterns=PATTERNS) is None
+
+    (root / "Core" / "Sub" / "New.cs").write_text("class New { }\n")  # Alta bajo la base de un patrón
+    assert manifest_files(manifest, roots, patterns=PATTERNS) is None
+    save(source)
+    manifest = get_profile("core", path)["manifest"]
+    assert len(manifest_files(manifest, roots, patterns=PATTERNS)) == 4
+
+    target = root / "Core" / "A.cs"
+    st = os.stat(target)
+    os.utime(target, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert manifest_files(manifest, roots, patterns=PATTERNS) is None
+
+
+def test_profiles_file(source):
+    path = source[3]
+    assert set(load_profiles(path)) == set(SELECTION_PROFILES)
+    save(source, "mine")
+    assert "mine" in load_profiles(path)
+    delete_profile("mine", path)
+    assert "mine" not in load_profiles(path)
+    with pytest.raises(ValueError):
+        get_profile("mine", path)
@@ -0,0 +1,33 @@
+import random
+
+import pytest
+
+from autoprompt_lib.render import strip_lines
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "\n\n  \n",
+    "a",
+    "a\n",
+    "\n\n  a\n",
+    "  a  \n\n\tb \n \n\n",
+    "a\r\n\r\n b\r\n  \r\n",
+    "　a　\n　\n",
+    "class A\n{\n\n    void M() { }\n\n}\n\n\n",
+])
+def test_strip_lines_matches_join_strip(text):
+    lines = text.splitlines(keepends=True)
+    assert "".join(strip_lines(lines)) == "".join(lines).strip()
+
+
+def test_strip_lines_matches_join_strip_random():
+    """Fragmentos arbitrarios, no solo líneas enteras: el resultado no depende de cómo se corte"""
+    alphabet = ['a', 'b', ' ', '\t', '\n', '\r\n', '\x0b', '　']
+    rng = random.Random(3)
+    for _ in range(5000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 16)))
+        cuts = sorted(rng.sample(range(len(text) + 1), rng.randint(0, len(text) + 1)))
+        pieces = [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+        for lines in (text.splitlines(keepends=True), pieces):
+            assert "".join(strip_lines(lines)) == "".join(lines).strip(), lines
@@ -0,0 +1,70 @@
+import pytest
+
+from autoprompt_lib import retrieval
+from autoprompt_lib.render import BLOCK_FOOTER, chunk_block_header, chunk_line
+from autoprompt_lib.retrieval import chunk_index, query_chunks
+from autoprompt_lib.scanner import ScanIndex, scan_and_sort_files
+from autoprompt_lib.tokens import count_tokens
+
+
+def service(name, body):
+    return (f"namespace Shop\n{{\n    public class {name}\n    {{\n"
+            f"        public decimal Run(decimal amount)\n        {{\n"
+            f"            // {body}\n            return amount;\n        }}\n    }}\n}}\n")
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "src"
+    root.mkdir()
+    (root / "InvoiceTotals.cs").write_text(service("InvoiceTotals", "sums the invoice lines into the total"))
+    (root / "Shipping.cs").write_text(service("Shipping", "ships the parcel, the invoice is printed later"))
+    (root / "Users.cs").write_text(service("Users", "creates a user account"))
+    for i in range(10):  # Para que "invoice" no pase de MAX_TERM_SHARE de los fragmentos
+        (root / f"Filler{i}.cs").write_text(service(f"Filler{i}", "does something else"))
+    return root
+
+
+def search(root, tmp_path, query, budget=10_000, top_k=5, files=None):
+    index = ScanIndex(str(root), str(tmp_path / "index.sqlite"))
+    scanned = scan_and_sort_files(str(root), index=index)
+    chunks = chunk_index(index)
+    try:
+        chunks.update(scanned if files is None else files(scanned))
+        return query_chunks(chunks, query, scanned, budget, top_k)
+    finally:
+        chunks.close()
+
+
+def cost(chunk):
+    return chunk['tokens'] + count_tokens(chunk_line(chunk) + chunk_block_header(chunk) + BLOCK_FOOTER)
+
+
+def test_ranking_prefers_name_and_more_matches(tree, tmp_path):
+    chosen = search(tree, tmp_path, "invoice total")
+    assert [c['file']['path'] for c in chosen] == ["InvoiceTotals.cs", "Shipping.cs"]
+
+
+def test_token_budget(tree, tmp_path):
+    everything = search(tree, tmp_path, "invoice")
+    budget = cost(everything[0])
+    chosen = search(tree, tmp_path, "invoice", budget=budget)
+    assert chosen == everything[:1]
+    assert search(tree, tmp_path, "invoice", budget=budget - 1) == [
+        c for c in everything[1:2] if cost(c) <= budget - 1]
+    assert search(tree, tmp_path, "invoice", budget=0) == []
+
+
+def test_stopwords_only_query(tree, tmp_path):
+    with pytest.raises(ValueError):
+        search(tree, tmp_path, "what is the public class")
+
+
+def test_unranked_candidates_follow_path_order(tmp_path, monkeypatch):
+    root = tmp_path / "src"
+    root.mkdir()
+    for i in range(30):
+        (root / f"Widget{i:02}.cs").write_text(service(f"Widget{i:02}", "renders the widget"))
+    monkeypatch.setattr(retrieval, 'MAX_RANKED', 1)  # Demasiadas coincidencias: no se puntúa
+    chosen = search(root, tmp_path, "renders", top_k=2, files=lambda scanned: scanned[::-1])
+    assert [c['file']['path'] for c in chosen] == ["Widget00.cs", "Widget01.cs"]
@@ -0,0 +1,71 @@
+import io
+import os
+import subprocess
+
+import pytest
+
+from autoprompt_lib import roots as roots_module
+from autoprompt_lib.core import generate_context
+from autoprompt_lib.roots import MultiIndex, iter_scan_roots, make_roots, parse_root_args, split_path
+
+
+@pytest.fixture
+def two_roots(tmp_path, monkeypatch):
+    monkeypatch.setattr(roots_module, 'default_index_path',
+                        lambda path: str(tmp_path / f"index-{os.path.basename(path)}.sqlite"))
+    for name, cls in (("engine", "Engine"), ("tools", "Tool")):
+        (tmp_path / name / "Core").mkdir(parents=True)
+        (tmp_path / name / "Core" / f"{cls}.cs").write_text(f"namespace {cls} {{ public class {cls} {{ }} }}\n")
+    return {"engine": str(tmp_path / "engine"), "tools": str(tmp_path / "tools")}
+
+
+def test_multi_index_prefixes_paths(two_roots):
+    roots = make_roots(two_roots)
+    index = MultiIndex(roots)
+    files = sorted(iter_scan_roots(roots, index), key=lambda f: f['path'])
+    assert [f['path'] for f in files] == [os.path.join("engine", "Core", "Engine.cs"),
+                                          os.path.join("tools", "Core", "Tool.cs")]
+    assert files[0]['directory'] == os.path.join("engine", "Core")
+    assert index.lookup(files[1]['path'])['hash'] == files[1]['hash']
+    assert "".join(index.iter_content(files[1]['path'])).startswith("namespace Tool")
+    root, rel_path = split_path(roots, files[1]['path'])
+    assert root.name == "tools" and rel_path == os.path.join("Core", "Tool.cs")
+    assert set(index.indexes) == {"engine", "tools"}  # Un índice por raíz
+
+
+def test_root_names_are_validated(two_roots, tmp_path):
+    with pytest.raises(ValueError):
+        make_roots({"a/b": two_roots["engine"]})
+    with pytest.raises(ValueError):
+        make_roots({"x": str(tmp_path / "missing")})
+    assert parse_root_args([two_roots["engine"], "t=" + two_roots["tools"]]) == {
+        "engine": two_roots["engine"], "t": two_roots["tools"]}
+    with pytest.raises(ValueError):
+        parse_root_args([two_roots["engine"], "engine=" + two_roots["tools"]])
+
+
+def git(root, *args):
+    subprocess.run(['git', '-c', 'user.name=t', '-c', 'user.email=t@t', *args], cwd=root, check=True,
+                   stdout=subprocess.DEVNULL)
+
+
+def test_git_ref_is_resolved_in_each_root(two_roots):
+    for path in two_roots.values():
+        git(path, 'init', '-q')
+        git(path, 'add', '.')
+        git(path, 'commit', '-q', '-m', 'base')
+    git(two_roots["tools"], 'commit', '-q', '--allow-empty', '-m', 'second')
+    with open(os.path.join(two_roots["engine"], "Core", "Engine.cs"), 'a') as fh:
+        fh.write("// cambio\n")
+    with open(os.path.join(two_roots["tools"], "Core", "Tool.cs"), 'a') as fh:
+        fh.write("// otro cambio\n")
+
+    out = io.StringIO()
+    generate_context(roots=two_roots, out=out, since='HEAD~0', diffs=True, workers=1)
+    text = out.getvalue()
+    assert "+++ b/" + os.path.join("engine", "Core", "Engine.cs") in text
+    assert "+++ b/" + os.path.join("tools", "Core", "Tool.cs") in text
+
+    # HEAD~1 solo existe en tools: el error dice qué raíz falla
+    with pytest.raises(ValueError, match="Raíz engine"):
+        generate_context(roots=two_roots, out=io.StringIO(), since='HEAD~1', workers=1)
@@ -0,0 +1,87 @@
+import os
+
+import pytest
+
+from autoprompt_lib.scanner import STRUCTURE, ScanIndex
+
+
+@pytest.fixture
+def source(tmp_path):
+    root = tmp_path / "src"
+    root.mkdir()
+    path = root / "A.cs"
+    path.write_text("namespace N { public class A { } }\n")
+    return root, path
+
+
+def scan(index, root, name="A.cs"):
+    full_path = os.path.join(root, name)
+    return index.scan_file(name, full_path, os.stat(full_path))
+
+
+def test_unchanged_stat_reuses_record(source, tmp_path):
+    root, path = source
+    index = ScanIndex(str(root), str(tmp_path / "index.sqlite"))
+    record = scan(index, root)
+    assert scan(index, root) is record
+    assert index.lookup("A.cs") is record
+
+
+def test_size_change_invalidates(source, tmp_path):
+    root, path = source
+    index = ScanIndex(str(root), str(tmp_path / "index.sqlite"))
+    record = scan(index, root)
+    st = os.stat(path)
+    path.write_text("namespace N { public class A { int x; } }\n")
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))  # Mismo mtime: solo cambia el tamaño
+    assert index.lookup("A.cs") is None
+    changed = scan(index, root)
+    assert changed is not record and changed["size"] != record["size"]
+
+
+def test_mtime_change_invalidates(source, tmp_path):
+    root, path = source
+    index = ScanIndex(str(root), str(tmp_path / "index.sqlite"))
+    record = scan(index, root)
+    st = os.stat(path)
+    path.write_text("namespace M { public class A { } }\n")  # Mismo tamaño
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert os.stat(path).st_size == record["size"]
+    assert index.lookup("A.cs") is None
+    changed = scan(index, root)
+    assert changed is not record and changed["mtime_ns"] != record["mtime_ns"]
+
+
+def test_derived_columns_reset_on_change(source, tmp_path):
+    root, path = source
+    index = ScanIndex(str(root), str(tmp_path / "index.sqlite"))
+    scan(index, root)
+    record = index.derive(["A.cs"], (STRUCTURE,))["A.cs"]
+    assert "public class A" in record["structure"]
+    st = os.stat(path)
+    path.write_text("namespace N { public class B { } }\n")
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    changed = scan(index, root)
+    assert changed["structure"] is None and changed["derived"] == ""
+    assert "public class B" in index.derive(["A.cs"], (STRUCTURE,))["A.cs"]["structure"]
+
+
+def test_persisted_index_checks_stat(source, tmp_path):
+    root, path = source
+    db_path = str(tmp_path / "index.sqlite")
+    index = ScanIndex(str(root), db_path)
+    record = scan(index, root)
+    index.flush()
+    reloaded = ScanIndex(str(root), db_path)
+    assert reloaded.lookup("A.cs")["mtime_ns"] == record["mtime_ns"]
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert ScanIndex(str(root), db_path).lookup("A.cs") is None
+
+
+def test_lookup_of_deleted_file(source, tmp_path):
+    root, path = source
+    index = ScanIndex(str(root), str(tmp_path / "index.sqlite"))
+    scan(index, root)
+    path.unlink()
+    assert index.lookup("A.cs") is None
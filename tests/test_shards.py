@@ -0,0 +1,94 @@
+import re
+
+import pytest
+
+from autoprompt_lib.scanner import ScanIndex, scan_and_sort_files
+from autoprompt_lib.shards import render_sharded
+from autoprompt_lib.tokens import count_tokens
+
+
+def member(i):
+    return (f"        public int Method{i}(int value)\n"
+            f"        {{\n"
+            f"            return value * {i} + {i};\n"
+            f"        }}\n\n")
+
+
+BIG = "namespace Demo\n{\n    public class Big\n    {\n" + "".join(member(i) for i in range(60)) + "    }\n}\n"
+SMALL = "namespace Demo { public class Small { } }\n"
+
+
+@pytest.fixture
+def source(tmp_path):
+    root = tmp_path / "src"
+    (root / "Sub").mkdir(parents=True)
+    (root / "Big.cs").write_text(BIG)
+    (root / "Small.cs").write_text(SMALL)
+    (root / "Sub" / "Copy.cs").write_text(SMALL)  # Idéntico a Small.cs
+    (root / "Long.cs").write_text("// " + "x" * 5000 + "\n")
+    index = ScanIndex(str(root), str(tmp_path / "index.sqlite"))
+    return scan_and_sort_files(str(root), index=index), index
+
+
+def shards(paths):
+    texts = []
+    for path in paths:
+        with open(path, encoding='utf-8') as fh:
+            texts.append(fh.read())
+    return texts
+
+
+def parts_of(texts, path):
+    """{número: (total, cuerpo)} de los trozos de `path` en todas las partes"""
+    found = {}
+    for text in texts:
+        for number, total, body in re.findall(
+                rf'<file path="{path}" part="(\d+)/(\d+)">\n<!\[CDATA\[\n(.*?)\n\]\]>\n</file>', text, re.S):
+            found[int(number)] = (int(total), body)
+    return found
+
+
+@pytest.mark.parametrize("unit, limit, measure", [
+    ('max_bytes', 1500, lambda text: len(text.encode('utf-8'))),
+    ('max_tokens', 400, count_tokens),
+])
+def test_every_shard_within_limit(source, tmp_path, unit, limit, measure):
+    files, index = source
+    paths = render_sharded(str(tmp_path / "ctx.txt"), files, "Prompt", index, **{unit: limit})
+    assert len(paths) > 2
+    for text in shards(paths):
+        assert measure(text) <= limit
+
+
+def test_part_numbering_and_member_boundaries(source, tmp_path):
+    files, index = source
+    texts = shards(render_sharded(str(tmp_path / "ctx.txt"), files, "", index, max_bytes=1500))
+    found = parts_of(texts, "Big.cs")
+    total = len(found)
+    assert total > 1 and sorted(found) == list(range(1, total + 1))
+    assert {t for t, _ in found.values()} == {total}
+    bodies = [found[i][1] for i in range(1, total + 1)]
+    assert "\n".join(bodies) + "\n" == BIG
+    for body in bodies[:-1]:
+        assert body.endswith("}")  # Cada corte cae tras el cierre de un miembro
+
+
+def test_long_line_is_split(source, tmp_path):
+    files, index = source
+    texts = shards(render_sharded(str(tmp_path / "ctx.txt"), files, "", index, max_bytes=1500))
+    found = parts_of(texts, "Long.cs")
+    assert len(found) > 1
+    assert "".join(found[i][1] for i in sorted(found)) == "// " + "x" * 5000
+
+
+def test_no_references_across_shards(source, tmp_path):
+    files, index = source
+    texts = shards(render_sharded(str(tmp_path / "ctx.txt"), files, "", index, max_bytes=1500))
+    assert not any('ref="' in text for text in texts)
+    assert sum(text.count("public class Small") for text in texts) == 2
+
+
+def test_creates_missing_directory(source, tmp_path):
+    files, index = source
+    paths = render_sharded(str(tmp_path / "new" / "dir" / "ctx.txt"), files, "", index, max_bytes=1500)
+    assert paths[0] == str(tmp_path / "new" / "dir" / "ctx.part01.txt")
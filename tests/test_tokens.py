@@ -0,0 +1,52 @@
+from autoprompt_lib.tokens import file_tokens, fit_to_budget
+
+
+def entry(path, tokens, struct_tokens=None):
+    return {"path": path, "name": path.rsplit('/', 1)[-1], "tokens": tokens, "struct_tokens": struct_tokens}
+
+
+FILES = [
+    entry("Other/Big.cs", 900, 90),
+    entry("Core/Small.cs", 50, 10),
+    entry("Core/Medium.cs", 400, 40),
+    entry("Core/Huge.cs", 5000, 100),
+    entry("Other/Tiny.cs", 20, 5),
+]
+
+
+def cost(paths, structure_only=False):
+    return sum(file_tokens(f, structure_only) for f in FILES if f['path'] in paths)
+
+
+def test_never_exceeds_budget():
+    for budget in range(0, 7000, 97):
+        chosen = fit_to_budget(FILES, budget, priorities=['Core'])
+        assert cost({f['path'] for f in chosen}) <= budget
+
+
+def test_priority_then_cheapest_first():
+    budget = cost({"Core/Small.cs", "Core/Medium.cs", "Other/Tiny.cs"})
+    chosen = fit_to_budget(FILES, budget, priorities=['Core'])
+    # Huge no cabe y se salta; lo siguiente más barato sí entra
+    assert [f['path'] for f in chosen] == ["Core/Small.cs", "Core/Medium.cs", "Other/Tiny.cs"]
+
+
+def test_reserved_is_discounted():
+    budget = cost({"Core/Small.cs"})
+    assert [f['path'] for f in fit_to_budget(FILES, budget, priorities=['Core'])] == ["Core/Small.cs"]
+    assert fit_to_budget(FILES, budget, reserved=1, priorities=['Core']) == [
+        f for f in FILES if f['path'] == "Other/Tiny.cs"]
+
+
+def test_structure_costs():
+    everything = {f['path'] for f in FILES}
+    chosen = fit_to_budget(FILES, cost(everything, structure_only=True), structure_only=True)
+    assert len(chosen) == len(FILES)
+
+
+def test_rank_overrides_priorities():
+    distances = {"Other/Big.cs": 0, "Core/Small.cs": 2, "Core/Medium.cs": 1, "Core/Huge.cs": 1,
+                 "Other/Tiny.cs": 3}
+    budget = cost({"Other/Big.cs", "Core/Medium.cs"})
+    chosen = fit_to_budget(FILES, budget, priorities=['Core'], rank=lambda f: distances[f['path']])
+    assert [f['path'] for f in chosen] == ["Other/Big.cs", "Core/Medium.cs"]
@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+from autoprompt_lib.ignore import PathFilter
+from autoprompt_lib.watch import ADDED, MODIFIED, REMOVED, PollingWatcher
+
+
+@pytest.fixture
+def root(tmp_path):
+    (tmp_path / "Sub").mkdir()
+    (tmp_path / "A.cs").write_text("class A { }\n")
+    (tmp_path / "B.cs").write_text("class B { }\n")
+    (tmp_path / "Sub" / "C.cs").write_text("class C { }\n")
+    return tmp_path
+
+
+def watcher(root):
+    return PollingWatcher(str(root), ['.cs'], PathFilter(str(root), include=(), exclude=(), gitignore=True))
+
+
+def touch(path, text):
+    st = os.stat(path)
+    path.write_text(text)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_full_diff_reports_added_modified_removed(root):
+    w = watcher(root)
+    assert w.poll() == []
+    (root / "Sub" / "D.cs").write_text("class D { }\n")
+    (root / "notes.txt").write_text("no es código\n")
+    touch(root / "A.cs", "class A { int x; }\n")
+    os.remove(root / "B.cs")
+    assert sorted(w.poll()) == sorted([(ADDED, os.path.join("Sub", "D.cs")), (MODIFIED, "A.cs"),
+                                       (REMOVED, "B.cs")])
+    assert w.poll() == []
+
+
+def test_classify_treats_newly_ignored_path_as_removed(root):
+    w = watcher(root)
+    (root / ".gitignore").write_text("B.cs\n")
+    assert w._classify(["B.cs", "A.cs"]) == [(REMOVED, "B.cs")]
+    assert "B.cs" not in w.snapshot
+    (root / ".gitignore").write_text("")
+    assert w._classify(["B.cs"]) == [(ADDED, "B.cs")]
+
+
+def test_classify_ignores_other_extensions_and_unchanged(root):
+    w = watcher(root)
+    (root / "x.txt").write_text("x\n")
+    assert w._classify(["x.txt", "A.cs", os.path.join("Sub", "C.cs")]) == []
+    touch(root / "A.cs", "class A { int y; }\n")
+    assert w._classify(["A.cs"]) == [(MODIFIED, "A.cs")]